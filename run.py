@@ -13,6 +13,13 @@ import os
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+# 動画フェーズのシーン名・メディアソース名
+MEDIA_PHASES = {
+    "preparation": ("開演準備", "準備動画"),
+    "opening": ("オープニング", "オープニング動画"),
+    "ending": ("エンディング", "エンディング動画"),
+}
+
 def main():
     parser = argparse.ArgumentParser(
         description="ずんだもんタイムラインシステム統合版",
@@ -25,6 +32,9 @@ def main():
         """
     )
     
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='起動時間とモジュールごとの import 時間を表示（環境変数 ZUNDAMON_PROFILE_STARTUP=1 でも可）')
+    
     subparsers = parser.add_subparsers(dest='mode', help='実行モード')
     
     # 配信モード
@@ -49,6 +59,10 @@ def main():
     
     args = parser.parse_args()
     
+    # 起動時間計測（以降の import を記録）
+    if args.profile_startup or os.environ.get("ZUNDAMON_PROFILE_STARTUP"):
+        enable_startup_profile(args.mode)
+    
     # 設定読み込み
     from server.config_manager import ConfigManager
     config_manager = ConfigManager()
@@ -91,6 +105,10 @@ class IntegratedBroadcastSystem:
         self.current_phase = "idle"
         self.termination_event = asyncio.Event()
         self.db_range_data = None
+        self.voicevox_ready = False
+        self.phase_preparations = {}  # フェーズ名 -> 準備タスク
+        self.phase_finished_at = None
+        self.audio_warm_task = None
         self.setup_logging()
         
     def setup_logging(self):
@@ -149,6 +167,7 @@ class IntegratedBroadcastSystem:
     async def initialize_systems(self):
         """システム初期化"""
         print("[処理] システム初期化中...")
+        started_at = time.monotonic()
         
         startup_tasks = []
         
@@ -174,29 +193,50 @@ class IntegratedBroadcastSystem:
             
             print(f"[統計] 初期化完了: {success_count}/{len(startup_tasks)}")
             
-            # 安定化待機
-            wait_time = self.config.get("niconico", {}).get("wait_before_start", 30)
-            print(f"[タイマー] システム安定化中 ({wait_time}秒)...", end="", flush=True)
-            for i in range(wait_time):
-                print(".", end="", flush=True)
-                time.sleep(1)
-            print(" 完了!")
+            # 準備完了待機（必要なコンポーネントがすべて応答した時点で次へ）
+            await self.wait_for_readiness(started_at)
 
             # 30秒経過後、ニコニコ生放送開始
             if self.username and hasattr(self, 'chrome_driver'):
                 self.start_niconico_broadcast()
     
+    async def wait_for_readiness(self, started_at):
+        """起動したコンポーネントの準備完了を待ち、起動時間を表示"""
+        from server.readiness import (all_required_ready, obs_websocket_probe, print_report,
+                                      readiness_options, server_probes, voicevox_probe, wait_for_all)
+
+        probes = server_probes(self.config)
+        probes.append(voicevox_probe(self.config, required=self.voicevox_ready))
+        probes.append(obs_websocket_probe(self.config, required=self.obs is not None))
+
+        # wait_before_start は最大待機時間
+        timeout = self.config.get("niconico", {}).get("wait_before_start", 30)
+        print(f"[タイマー] コンポーネント準備完了待機中（最大{timeout}秒）...")
+        results = await wait_for_all(probes, timeout, started_at=started_at, **readiness_options(self.config))
+        print_report(results)
+        ready = all_required_ready(results)
+        print(f"[処理] 準備完了: {time.monotonic() - started_at:.1f}秒" if ready else "[警告] 一部コンポーネントが未応答のまま続行します")
+        return ready
+    
     async def execute_broadcast_flow(self):
-        """配信フロー実行"""
+        """配信フロー実行
+
+        各フェーズの再生中に次のフェーズを準備しておき（シーン・メディアソース作成、
+        DBタイムライン生成、音声の先行合成）、切り替え時は待ち時間なしで始められるようにする。
+        """
         print("\n[配信] 配信フロー開始")
 
-        # OBS接続
+        # OBS接続（Identified 応答まで待つので安定化待機は不要）
         if self.obs:
             print("[処理] OBS接続中...")
-            self.obs.connect()
-            print("[待機] OBS接続安定化待機（3秒）...")
-            await asyncio.sleep(3)
-            print("[処理] OBS接続完了")
+            if await self.obs.connect():
+                print("[処理] OBS接続完了")
+            else:
+                print("[警告] OBS接続失敗")
+
+        # 最初のフェーズと次のフェーズの準備を並行して開始
+        self.start_preparation("preparation")
+        self.start_preparation("opening")
 
         await self.phase_a_preparation()
         await self.phase_b_opening()
@@ -204,139 +244,121 @@ class IntegratedBroadcastSystem:
         await self.phase_d_ending()
 
         print("[完了] 配信フロー完了")
+
+    def phase_video(self, phase):
+        return {
+            "preparation": self.prep_video,
+            "opening": self.opening_video,
+            "ending": self.ending_video,
+        }.get(phase)
+
+    def start_preparation(self, phase):
+        """フェーズの準備をバックグラウンドで開始（開始済みなら何もしない）"""
+        if phase is None or phase in self.phase_preparations:
+            return
+        self.phase_preparations[phase] = asyncio.create_task(self.prepare_phase(phase))
+
+    async def prepare_phase(self, phase):
+        """フェーズ開始前にできる準備"""
+        started_at = time.monotonic()
+        if phase in MEDIA_PHASES:
+            video = self.phase_video(phase)
+            if not (self.obs and video):
+                return False
+            scene_name, source_name = MEDIA_PHASES[phase]
+            # シーン・メディアソースを作成して読み込ませておく（切り替え・再生はしない）
+            result = await self.obs.prepare_media_scene(scene_name, source_name, video, switch=False, play=False)
+        elif phase == "zundamon_interactive":
+            result = await self.prepare_timeline_from_db()
+        else:
+            return False
+        logging.info(f"フェーズ準備完了[{phase}]: {time.monotonic() - started_at:.2f}秒")
+        return result
+
+    async def wait_for_preparation(self, phase):
+        """フェーズの準備完了を待つ（未開始ならここで準備）"""
+        self.start_preparation(phase)
+        started_at = time.monotonic()
+        try:
+            result = await self.phase_preparations[phase]
+        except Exception as e:
+            print(f"   [警告] フェーズ準備エラー: {e}")
+            return None
+        waited = time.monotonic() - started_at
+        if waited >= 0.05:
+            print(f"   [時間]  準備完了待ち: {waited:.2f}秒")
+        return result
+
+    def log_phase_transition(self):
+        """前フェーズの終了から現フェーズの開始までの時間を表示"""
+        if self.phase_finished_at is not None:
+            print(f"   [時間]  フェーズ切り替え: {time.monotonic() - self.phase_finished_at:.2f}秒")
+
+    def finish_phase(self, label):
+        self.phase_finished_at = time.monotonic()
+        print(f"[処理] {label}完了")
+
+    async def run_media_phase(self, phase, next_phase):
+        """動画フェーズ共通処理: 準備済みシーンへ切り替えて再生し、再生中に次のフェーズを準備"""
+        video = self.phase_video(phase)
+        if self.obs and video:
+            scene_name, source_name = MEDIA_PHASES[phase]
+            print(f"   動画パス: {video}")
+            await self.wait_for_preparation(phase)
+
+            # 切り替え・再生開始（準備済みなら作成要求を含まない1往復）
+            print("   [処理] シーン切り替え・再生中...")
+            await self.obs.prepare_media_scene(scene_name, source_name, video)
+            self.log_phase_transition()
+            self.start_preparation(next_phase)
+
+            # 再生終了イベントまで待機（イベントが来なければ再生時間で打ち切り）
+            print("   [時間]  動画再生終了待機中...")
+            if not await self.obs.wait_for_media_end(source_name):
+                print("   [警告] 再生終了イベント未受信、待機を打ち切りました")
+        else:
+            self.log_phase_transition()
+            self.start_preparation(next_phase)
     
     async def phase_a_preparation(self):
         """フェーズA: 開演準備動画"""
         print("\n[データ] フェーズA: 開演準備動画")
         self.current_phase = "preparation"
-
-        if self.obs and self.prep_video:
-            print(f"   動画パス: {self.prep_video}")
-
-            # 準備画面シーン作成
-            print("   [処理] シーン作成中...")
-            self.obs.create_scene(scene_name := "開演準備")
-            await asyncio.sleep(1.0)
-
-            # 動画ソース追加
-            print("   [フェーズ] メディアソース追加中...")
-            self.obs.add_media_source(scene_name, "準備動画", self.prep_video)
-            await asyncio.sleep(2.0)  # メディアソースの読み込み待機
-
-            # シーン切り替え
-            print("   [切替] シーン切り替え中...")
-            self.obs.switch_scene(scene_name)
-            await asyncio.sleep(1.0)
-
-            # 動画再生開始
-            print("   [再生] 動画再生開始...")
-            self.obs.play_media_source("準備動画")
-            await asyncio.sleep(1.0)  # 再生開始待機
-
-            # 動画再生時間取得
-            duration = self.obs.get_media_duration("準備動画")
-            if duration:
-                print(f"   [時間]  再生時間: {duration:.1f}秒")
-                await asyncio.sleep(duration + 1.0)
-            else:
-                print("   [警告] 動画長さ取得失敗、10秒待機")
-                await asyncio.sleep(10)
-
-        print("[処理] フェーズA完了")
+        await self.run_media_phase("preparation", "opening")
+        self.finish_phase("フェーズA")
     
     async def phase_b_opening(self):
         """フェーズB: オープニング動画"""
         print("\n[フェーズ] フェーズB: オープニング動画")
         self.current_phase = "opening"
-
-        if self.obs and self.opening_video:
-            print(f"   動画パス: {self.opening_video}")
-
-            # オープニングシーン作成
-            print("   [処理] シーン作成中...")
-            self.obs.create_scene(scene_name := "オープニング")
-            await asyncio.sleep(1.0)
-
-            # 動画ソース追加
-            print("   [フェーズ] メディアソース追加中...")
-            self.obs.add_media_source(scene_name, "オープニング動画", self.opening_video)
-            await asyncio.sleep(2.0)
-
-            # シーン切り替え
-            print("   [切替] シーン切り替え中...")
-            self.obs.switch_scene(scene_name)
-            await asyncio.sleep(1.0)
-
-            # 動画再生開始
-            print("   [再生] 動画再生開始...")
-            self.obs.play_media_source("オープニング動画")
-            await asyncio.sleep(1.0)
-
-            # 動画再生時間取得
-            duration = self.obs.get_media_duration("オープニング動画")
-            if duration:
-                print(f"   [時間]  再生時間: {duration:.1f}秒")
-                await asyncio.sleep(duration + 1.0)
-            else:
-                print("   [警告] 動画長さ取得失敗、5秒待機")
-                await asyncio.sleep(5)
-
-        print("[処理] フェーズB完了")
+        await self.run_media_phase("opening", "zundamon_interactive")
+        self.finish_phase("フェーズB")
     
     async def phase_c_zundamon_interactive(self):
         """フェーズC: ずんだもん+めたんタイムライン実行"""
         print("[発話] フェーズC: ずんだもん+めたんタイムライン実行")
         self.current_phase = "zundamon_interactive"
 
+        timeline_json = await self.wait_for_preparation("zundamon_interactive")
         if self.obs:
-            self.obs.switch_scene("ずんだもんシーン")
-
-        # DB範囲データからタイムライン生成・実行
-        if self.db_range_data:
-            await self.execute_timeline_from_db()
-        else:
+            await self.obs.switch_scene("ずんだもんシーン")
+        self.log_phase_transition()
+        self.start_preparation("ending")
+
+        # DB範囲データから生成済みのタイムラインを実行
+        if timeline_json:
+            await self.execute_timeline_from_db(timeline_json)
+        elif not self.db_range_data:
             print("[警告] DB範囲データが未設定です")
 
-        print("[処理] フェーズC完了")
+        self.finish_phase("フェーズC")
     
     async def phase_d_ending(self):
         """フェーズD: エンディング動画"""
         print("\n[フェーズ] フェーズD: エンディング動画")
         self.current_phase = "ending"
-
-        if self.obs and self.ending_video:
-            print(f"   動画パス: {self.ending_video}")
-
-            # エンディングシーン作成
-            print("   [処理] シーン作成中...")
-            self.obs.create_scene(scene_name := "エンディング")
-            await asyncio.sleep(1.0)
-
-            # 動画ソース追加
-            print("   [フェーズ] メディアソース追加中...")
-            self.obs.add_media_source(scene_name, "エンディング動画", self.ending_video)
-            await asyncio.sleep(2.0)
-
-            # シーン切り替え
-            print("   [切替] シーン切り替え中...")
-            self.obs.switch_scene(scene_name)
-            await asyncio.sleep(1.0)
-
-            # 動画再生開始
-            print("   [再生] 動画再生開始...")
-            self.obs.play_media_source("エンディング動画")
-            await asyncio.sleep(1.0)
-
-            # 動画再生時間取得
-            duration = self.obs.get_media_duration("エンディング動画")
-            if duration:
-                print(f"   [時間]  再生時間: {duration:.1f}秒")
-                await asyncio.sleep(duration + 1.0)
-            else:
-                print("   [警告] 動画長さ取得失敗、5秒待機")
-                await asyncio.sleep(5)
-
-        print("[処理] フェーズD完了")
+        await self.run_media_phase("ending", None)
+        self.finish_phase("フェーズD")
     
     async def handle_comments(self):
         """コメント処理"""
@@ -351,14 +373,13 @@ class IntegratedBroadcastSystem:
             if self.debug:
                 print("[処理] コメント処理中...")
     
-    async def execute_timeline_from_db(self):
-        """DB範囲データからタイムライン生成・実行"""
-        print("[処理] タイムライン生成・実行開始")
+    async def prepare_timeline_from_db(self):
+        """DB範囲データからタイムライン生成（DB読み込みは別スレッド）し、先頭から音声を先行合成"""
+        if not self.db_range_data:
+            return None
 
         try:
             from server.timeline_generator import TimelineGenerator
-            from server.timeline_executor import TimelineExecutor
-            from server.main import broadcast_to_browser
 
             # DB範囲データ取得
             user_id = self.db_range_data.get("user_id")
@@ -366,28 +387,21 @@ class IntegratedBroadcastSystem:
 
             if not user_id or not broadcast_ids:
                 print("[処理] DB範囲データ不正: user_idまたはbroadcast_idsが未設定")
-                return
+                return None
 
-            # タイムライン生成
+            # タイムライン生成（同期DBアクセスなので動画再生を止めないよう別スレッドで）
             generator = TimelineGenerator()
-            timeline_json = generator.generate_from_broadcasts(
+            loop = asyncio.get_running_loop()
+            timeline_json = await loop.run_in_executor(None, lambda: generator.generate_from_broadcasts(
                 broadcast_ids=broadcast_ids,
                 user_id=user_id,
                 title=f"{self.username}さんのコメント読み上げ"
-            )
+            ))
 
             print(f"[処理] タイムライン生成完了: {len(timeline_json.get('timeline', []))}項目")
 
-            # タイムラインデータをコンソール出力
-            print(f"[処理] タイムライン内容:")
-            for i, action in enumerate(timeline_json.get('timeline', [])[:5]):
-                print(f"   {i+1}. {action.get('text', '')[:50]}")
-            if len(timeline_json.get('timeline', [])) > 5:
-                print(f"   ... 他 {len(timeline_json.get('timeline', [])) - 5} 項目")
-
             # JSONファイルに出力
             import json
-            from pathlib import Path
             output_dir = Path("test/generated_timelines")
             output_dir.mkdir(parents=True, exist_ok=True)
             output_file = output_dir / f"timeline_{user_id}_{'-'.join(broadcast_ids)}.json"
@@ -395,6 +409,47 @@ class IntegratedBroadcastSystem:
                 json.dump(timeline_json, f, indent=2, ensure_ascii=False)
             print(f"[処理] タイムライン保存: {output_file}")
 
+            # 冒頭の発話を先に合成しておく（サーバー側は同じファイルをキャッシュとして使う）
+            if self.voicevox_ready:
+                self.audio_warm_task = asyncio.create_task(self.warm_timeline_audio(timeline_json))
+
+            return timeline_json
+
+        except Exception as e:
+            print(f"[処理] タイムライン生成エラー: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    async def warm_timeline_audio(self, timeline_json):
+        """タイムライン冒頭の発話を先行合成"""
+        from server.voicevox_client import VoicevoxClient
+
+        limit = self.config.get("timeline", {}).get("warm_audio_items", 10)
+        items = [
+            (action.get("text", ""), action.get("character", "zundamon"))
+            for action in timeline_json.get("timeline", [])
+            if action.get("text")
+        ]
+        started_at = time.monotonic()
+        warmed = await VoicevoxClient(self.config).warm_speech(items, limit)
+        logging.info(f"音声先行合成: {warmed}件 ({time.monotonic() - started_at:.2f}秒)")
+
+    async def execute_timeline_from_db(self, timeline_json):
+        """生成済みタイムラインの実行"""
+        print("[処理] タイムライン実行開始")
+
+        try:
+            from server.timeline_executor import TimelineExecutor
+            from server.main import broadcast_to_browser
+
+            # タイムラインデータをコンソール出力
+            print(f"[処理] タイムライン内容:")
+            for i, action in enumerate(timeline_json.get('timeline', [])[:5]):
+                print(f"   {i+1}. {action.get('text', '')[:50]}")
+            if len(timeline_json.get('timeline', [])) > 5:
+                print(f"   ... 他 {len(timeline_json.get('timeline', [])) - 5} 項目")
+
             # タイムライン実行（broadcast_to_browserをcallbackとして渡す）
             timeline_executor = TimelineExecutor(self.config, self.obs, broadcast_callback=broadcast_to_browser)
             await timeline_executor.execute_timeline_from_json(timeline_json)
@@ -402,7 +457,7 @@ class IntegratedBroadcastSystem:
             print("[処理] タイムライン実行完了")
 
         except Exception as e:
-            print(f"[処理] タイムライン生成・実行エラー: {e}")
+            print(f"[処理] タイムライン実行エラー: {e}")
             import traceback
             traceback.print_exc()
 
@@ -442,9 +497,12 @@ class IntegratedBroadcastSystem:
         try:
             print("[処理] OBS初期化中...", end="", flush=True)
             from server.obs_controller import OBSController
+            from server.obs_async_controller import AsyncOBSController
             
-            self.obs = OBSController(self.config)
-            result = self.obs.ensure_obs_ready()
+            # プロセス起動確認は同期版、配信中の操作は非同期版を使う
+            result = OBSController(self.config).ensure_obs_ready()
+            if result:
+                self.obs = AsyncOBSController(self.config)
             
             print(" [OK]" if result else " [NG]")
             return result
@@ -468,6 +526,7 @@ class IntegratedBroadcastSystem:
                 asyncio.set_event_loop(loop)
             
             result = loop.run_until_complete(voicevox.ensure_voicevox_ready())
+            self.voicevox_ready = result
             
             print(" [OK]" if result else " [NG]")
             return result
@@ -502,9 +561,9 @@ class IntegratedBroadcastSystem:
             self.zundamon_server_thread = threading.Thread(target=run_server, daemon=False, name="ZundamonServer")
             self.zundamon_server_thread.start()
 
-            time.sleep(3)
-            print(" [OK]")
-            return True
+            result = wait_for_server_ready(self.config)
+            print(" [OK]" if result else " [NG]")
+            return result
 
         except Exception as e:
             print(" [NG]")
@@ -594,6 +653,11 @@ class IntegratedBroadcastSystem:
         """システム終了処理"""
         print("[処理] システム終了処理中...")
 
+        # 未完了のフェーズ準備・音声先行合成を停止
+        for task in [*self.phase_preparations.values(), self.audio_warm_task]:
+            if task and not task.done():
+                task.cancel()
+
         # WebSocketサーバー停止
         if self.zundamon_server_loop:
             print("[処理] WebSocketサーバー停止中...")
@@ -622,7 +686,7 @@ class IntegratedBroadcastSystem:
 
         # OBS切断
         if self.obs:
-            self.obs.disconnect()
+            await self.obs.disconnect()
 
         print("[処理] システム終了完了")
 
@@ -649,6 +713,7 @@ def run_auto_mode(config, debug=False):
     automation = config.get("automation", {})
     components = automation.get("auto_start_components", ["server"])
     stabilization_wait = automation.get("stabilization_wait", 30)
+    started_at = time.monotonic()
     
     print("[自動] 自動実行モード開始")
     print(f"   起動コンポーネント: {', '.join(components)}")
@@ -699,12 +764,20 @@ def run_auto_mode(config, debug=False):
     if failed_count > 0:
         print("[警告] 一部システムの起動に失敗しましたが、処理を続行します")
     
-    # 安定化待機
-    print(f"[タイマー] 安定化待機中", end="", flush=True)
-    for i in range(stabilization_wait):
-        print(".", end="", flush=True)
-        time.sleep(1)
-    print(" 完了!")
+    # 準備完了待機（stabilization_wait は最大待機時間）
+    from server.readiness import (obs_websocket_probe, print_report, readiness_options,
+                                  server_probes, voicevox_probe, wait_until_ready)
+    probes = []
+    if "server" in components:
+        probes.extend(server_probes(config))
+    if automation.get("auto_voicevox_check", True):
+        probes.append(voicevox_probe(config))
+    if automation.get("auto_obs_connect", True):
+        probes.append(obs_websocket_probe(config))
+    if probes:
+        print(f"[タイマー] コンポーネント準備完了待機中（最大{stabilization_wait}秒）...")
+        results = wait_until_ready(probes, stabilization_wait, started_at=started_at, **readiness_options(config))
+        print_report(results)
     
     print("[処理] 全システム準備完了！")
     
@@ -715,15 +788,37 @@ def run_auto_mode(config, debug=False):
     except KeyboardInterrupt:
         print("\n[停止] システム停止中...")
 
+def enable_startup_profile(mode):
+    """import 時間の記録を開始し、起動完了時（サーバーのみモード）または終了時に結果を表示"""
+    import atexit
+    from server.startup_profile import enable
+    
+    profiler = enable()
+    if mode != 'server':
+        atexit.register(profiler.print_report, "起動から終了まで")
+
+def report_server_startup(config):
+    """サーバーの準備完了を待って起動時間を表示（別スレッドで実行）"""
+    from server.startup_profile import get_profiler
+    
+    def run():
+        ready = wait_for_server_ready(config)
+        get_profiler().print_report("サーバー準備完了まで" if ready else "サーバー準備待ち打ち切りまで")
+    
+    threading.Thread(target=run, daemon=True).start()
+
 def run_server_only(config, debug=False):
     """サーバーのみ起動"""
     from server.main import main_server, setup_logging
+    from server.startup_profile import get_profiler
     
     if debug:
         config["logging"]["level"] = "DEBUG"
     
     setup_logging(config)
     print("[処理] ずんだもんサーバー起動")
+    if get_profiler():
+        report_server_startup(config)
     
     try:
         asyncio.run(main_server(config))
@@ -798,14 +893,22 @@ def start_zundamon_server(config):
         server_thread = threading.Thread(target=run_server, daemon=True, name="ZundamonServer")
         server_thread.start()
         
-        time.sleep(3)
-        print(" [OK]")
-        return True
+        result = wait_for_server_ready(config)
+        print(" [OK]" if result else " [NG]")
+        return result
         
     except Exception as e:
         print(" [NG]")
         return False
 
+def wait_for_server_ready(config):
+    """ずんだもんサーバー（HTTP・WebSocket・プラグイン）の準備完了待機"""
+    from server.readiness import all_required_ready, readiness_options, server_probes, wait_until_ready
+    
+    timeout = config.get("readiness", {}).get("server_timeout", 30)
+    results = wait_until_ready(server_probes(config), timeout, **readiness_options(config))
+    return all_required_ready(results)
+
 def start_gui_system(config):
     """GUI起動"""
     try:
@@ -0,0 +1,95 @@
+"""
+アニメーション用バイナリWebSocketサブプロトコル（zundamon.anim.v1）
+
+高頻度の volume_level / animation_frame をJSONの代わりに固定長バイナリで送る。
+接続時に Sec-WebSocket-Protocol で zundamon.anim.v1 を要求したクライアントだけが対象で、
+それ以外のメッセージ（speech_start 等）はこれまで通りJSONテキストで届く。
+
+フレーム形式（リトルエンディアン）:
+  ヘッダ 5バイト: version(uint8) type(uint8) seq(uint16) count(uint8)
+  エントリ count×2バイト: character_id(uint8) level(uint8, 0-255に量子化)
+
+1フレームに複数キャラクター・複数サンプルをまとめられる（最大255エントリ）。
+"""
+import struct
+
+ANIMATION_SUBPROTOCOL = "zundamon.anim.v1"
+PROTOCOL_VERSION = 1
+
+# メッセージ種別
+MSG_VOLUME_FRAME = 1
+
+HEADER = struct.Struct("<BBHB")
+ENTRY = struct.Struct("<BB")
+MAX_ENTRIES = 255
+
+# キャラクターID（web/app.js の ANIM_CHARACTERS と合わせること）
+CHARACTER_IDS = {
+    "zundamon": 0,
+    "metan": 1,
+}
+CHARACTER_NAMES = {character_id: name for name, character_id in CHARACTER_IDS.items()}
+
+
+def select_subprotocol(*args):
+    """サブプロトコル選択（要求がなければ従来のJSONのみで接続を許可）
+
+    websockets 14以降は (connection, client_subprotocols)、
+    旧API（legacy）は (client_subprotocols, server_subprotocols) で呼ばれる。
+    """
+    client_subprotocols = args[0] if isinstance(args[0], (list, tuple)) else args[1]
+    if ANIMATION_SUBPROTOCOL in client_subprotocols:
+        return ANIMATION_SUBPROTOCOL
+    return None
+
+
+def quantize_level(level) -> int:
+    """0.0-1.0 の音量を 0-255 に量子化"""
+    return max(0, min(255, int(round(float(level) * 255))))
+
+
+def dequantize_level(value: int) -> float:
+    return value / 255
+
+
+def encode_animation_entries(data: dict):
+    """volume_level / animation_frame をエントリ列に変換（変換できなければNone）"""
+    action = data.get("action")
+    if action == "volume_level":
+        levels = {data.get("character"): data.get("level")}
+    elif action == "animation_frame":
+        levels = data.get("levels", {})
+    else:
+        return None
+
+    entries = []
+    for character, level in levels.items():
+        character_id = CHARACTER_IDS.get(character)
+        if character_id is None or not isinstance(level, (int, float)):
+            return None
+        entries.append(ENTRY.pack(character_id, quantize_level(level)))
+    if not entries:
+        return None
+    return b"".join(entries)
+
+
+def entry_count(entries: bytes) -> int:
+    return len(entries) // ENTRY.size
+
+
+def pack_frame(seq: int, entries, msg_type=MSG_VOLUME_FRAME) -> bytes:
+    """エントリ列（エンコード済みbytesのリスト）をフレームにまとめる"""
+    payload = b"".join(entries)
+    return HEADER.pack(PROTOCOL_VERSION, msg_type, seq & 0xFFFF, entry_count(payload)) + payload
+
+
+def unpack_frame(frame: bytes):
+    """フレームを (type, seq, [(character, level), ...]) に戻す"""
+    version, msg_type, seq, count = HEADER.unpack_from(frame, 0)
+    if version != PROTOCOL_VERSION:
+        raise ValueError(f"未対応のプロトコルバージョン: {version}")
+    entries = []
+    for i in range(count):
+        character_id, value = ENTRY.unpack_from(frame, HEADER.size + i * ENTRY.size)
+        entries.append((CHARACTER_NAMES.get(character_id, character_id), dequantize_level(value)))
+    return msg_type, seq, entries
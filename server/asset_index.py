@@ -0,0 +1,261 @@
+"""
+立ち絵アセットのインデックス（ブラウザ用マニフェスト）
+
+assets_dir 以下のキャラクターディレクトリを走査し、パーツPNGごとに
+内容ハッシュ・_position.json の外接矩形・position_map.json のキャンバスサイズをまとめる。
+ブラウザは /api/assets のマニフェストを1回取得し、全キャラクター分を並行して読み込む。
+
+- テクスチャ名は config/asset_aliases.json の別名（従来の getAssetConfig と同じキー）を優先し、
+  それ以外のパーツはファイル名（腕は "_right" / "_left" 付き）で参照できる
+- ハッシュはファイルごとに (サイズ, 更新時刻) でキャッシュし、変わったファイルだけ読み直す
+- マニフェストは走査結果（パス・サイズ・更新時刻）が変わったときだけ作り直す。
+  走査も CHECK_INTERVAL 秒に1回までで、その間のリクエストはファイルシステムに触れずに返す
+- 生成済みで元PNGと一致するテクスチャアトラスがあれば、フレーム名も含める
+- 同様にプリセット別の合成画像（server/preset_compositor.py）があれば、その一覧も含める
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+ARM_SUFFIXES = {"right_arm": "_right", "left_arm": "_left"}
+CHECK_INTERVAL = 1.0  # ファイルの変更を確認する間隔（秒）
+
+
+def file_hash(path):
+    """ファイル内容のハッシュ（URLの ?v= に使う）"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def auto_key(relative_path):
+    """別名がないパーツのテクスチャ名（例: outfit1/right_arm/point.png → point_right）"""
+    path = Path(relative_path)
+    return path.stem + ARM_SUFFIXES.get(path.parent.name, "")
+
+
+def url_path(path, root):
+    """配信ルートからのURLパス（ルート外なら None）"""
+    try:
+        return "/" + Path(path).resolve().relative_to(Path(root).resolve()).as_posix()
+    except ValueError:
+        return None
+
+
+class AssetIndex:
+    def __init__(self, config, root, aliases_path=None, check_interval=CHECK_INTERVAL, clock=time.monotonic):
+        directories = config.get("directories", {})
+        self.root = Path(root)
+        self.assets_dir = self.root / directories.get("assets_dir", "./assets")
+        self.atlas_dir = self.root / directories.get("atlas_dir", "./assets_atlas")
+        self.composite_dir = self.root / directories.get("composite_dir", "./assets_composite")
+        self.atlas_enabled = config.get("atlas", {}).get("enabled", True)
+        self.composite_enabled = config.get("composite", {}).get("enabled", True)
+        self.aliases_path = Path(aliases_path) if aliases_path else self.root / "config" / "asset_aliases.json"
+        self.presets_path = self.root / "config" / "presets.json"
+        # キャラクターID -> 合成時のレイヤー構成
+        self.layers = {
+            character_id: character["layers"]
+            for character_id, character in config.get("characters", {}).items()
+            if character.get("layers")
+        }
+        # キャラクターID -> assets_dir 直下のディレクトリ名
+        self.characters = {
+            character_id: character["asset_dir"]
+            for character_id, character in config.get("characters", {}).items()
+            if character.get("asset_dir")
+        }
+        self.hashes = {}  # 絶対パス -> (サイズ, 更新時刻, ハッシュ)
+        self.check_interval = check_interval
+        self.clock = clock
+        self.checked = None  # 最後に走査した時刻
+        self.signature = None
+        self.manifest = None
+        self.body = None
+        self.etag = None
+        self.stats = {"builds": 0, "hits": 0, "hashed": 0}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def get(self):
+        """最新のマニフェスト（ファイルに変更がなければ前回のものを返す）"""
+        with self.lock:
+            now = self.clock()
+            if self.manifest is not None and self.checked is not None and now - self.checked < self.check_interval:
+                self.stats["hits"] += 1
+                return self.manifest
+            self.checked = now
+            signature = self._scan_signature()
+            if signature == self.signature and self.manifest is not None:
+                self.stats["hits"] += 1
+                return self.manifest
+            self.manifest = self._build()
+            self.body = json.dumps(self.manifest, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self.etag = f'"{hashlib.sha1(self.body).hexdigest()[:16]}"'
+            self.signature = signature
+            self.stats["builds"] += 1
+            return self.manifest
+
+    def get_body(self):
+        """(JSONバイト列, ETag)"""
+        self.get()
+        return self.body, self.etag
+
+    def _scan_signature(self):
+        """対象ファイルのパス・サイズ・更新時刻（走査のみでファイル内容は読まない）"""
+        entries = []
+        watched = [self.aliases_path, self.presets_path]
+        for directory in self.characters.values():
+            for base in (self.assets_dir / directory, self.atlas_dir / directory, self.composite_dir / directory):
+                for dirpath, dirnames, filenames in os.walk(base):
+                    dirnames.sort()
+                    watched.extend(Path(dirpath) / name for name in sorted(filenames))
+        for path in watched:
+            try:
+                stat_result = path.stat()
+            except OSError:
+                continue
+            entries.append((str(path), stat_result.st_size, stat_result.st_mtime_ns))
+        return tuple(entries)
+
+    def _hash(self, path):
+        stat_result = path.stat()
+        cached = self.hashes.get(str(path))
+        if cached and cached[:2] == (stat_result.st_size, stat_result.st_mtime_ns):
+            return cached[2]
+        digest = file_hash(path)
+        self.hashes[str(path)] = (stat_result.st_size, stat_result.st_mtime_ns, digest)
+        self.stats["hashed"] += 1
+        return digest
+
+    def _load_aliases(self):
+        if not self.aliases_path.exists():
+            return {}
+        try:
+            with open(self.aliases_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.error(f"アセット別名の読み込みエラー: {e}")
+            return {}
+
+    def _build(self):
+        aliases = self._load_aliases()
+        characters = {}
+        for character_id, directory in self.characters.items():
+            character_dir = self.assets_dir / directory
+            if not character_dir.is_dir():
+                self.logger.warning(f"アセットディレクトリがありません: {character_dir}")
+                continue
+            entry = self._build_character(character_dir, aliases.get(character_id, {}))
+            entry["composite"] = self._composite_for(character_id, character_dir)
+            characters[character_id] = entry
+        return {"version": MANIFEST_VERSION, "characters": characters}
+
+    def _build_character(self, character_dir, aliases):
+        base = url_path(character_dir, self.root)
+        if base is None:
+            self.logger.warning(f"配信ルート外のアセットディレクトリです: {character_dir}")
+        paths = sorted(character_dir.rglob("*.png"))
+
+        files = {}
+        for path in paths:
+            relative_path = path.relative_to(character_dir).as_posix()
+            entry = {"file": relative_path, "hash": self._hash(path)}
+            position = read_position(path.with_name(f"{path.stem}_position.json"))
+            if position:
+                entry.update(position)
+            files[relative_path] = entry
+
+        atlas = self._atlas_for(character_dir, paths)
+        if atlas:
+            for relative_path, entry in files.items():
+                frame = f"{character_dir.name}/{relative_path[:-len('.png')]}"
+                if frame in atlas["frames"]:
+                    entry["frame"] = frame
+
+        # 別名を先に登録し、残りはファイル名のキー（重複時はパス順で先のもの）
+        assets = {}
+        for key, relative_path in aliases.items():
+            if relative_path in files:
+                assets[key] = files[relative_path]
+            else:
+                self.logger.warning(f"別名のファイルがありません[{character_dir.name}]: {key} → {relative_path}")
+        for relative_path, entry in files.items():
+            assets.setdefault(auto_key(relative_path), entry)
+
+        canvas_size = None
+        position_map = character_dir / "position_map.json"
+        if position_map.exists():
+            try:
+                with open(position_map, "r", encoding="utf-8") as f:
+                    canvas_size = json.load(f).get("canvas_size")
+            except (OSError, json.JSONDecodeError) as e:
+                self.logger.warning(f"position_map.json の読み込みエラー: {e}")
+
+        return {
+            "dir": character_dir.name,
+            "base": base,
+            "canvas_size": canvas_size,
+            "assets": assets,
+            "atlas": atlas,
+        }
+
+    def _atlas_for(self, character_dir, paths):
+        """元PNGと一致するアトラスの情報（未生成・古い・無効なら None）"""
+        if not self.atlas_enabled:
+            return None
+        from server.sprite_atlas import MANIFEST_NAME as ATLAS_MANIFEST_NAME, source_state
+        atlas_dir = self.atlas_dir / character_dir.name
+        manifest_path = atlas_dir / ATLAS_MANIFEST_NAME
+        base = url_path(atlas_dir, self.root)
+        if base is None or not manifest_path.exists():
+            return None
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if manifest.get("sources") != source_state(paths, character_dir):
+            # 生成後に元PNGが変わった（再生成されるまで個別PNGを使う）
+            return None
+        return {"base": base, "sheets": manifest["sheets"], "frames": manifest["frames"]}
+
+
+    def _composite_for(self, character_id, character_dir):
+        """現在のプリセット・元PNGと一致する合成画像の情報（未生成・古い・無効なら None）"""
+        if not (self.composite_enabled and character_id in self.layers and self.presets_path.exists()):
+            return None
+        from server.preset_compositor import MANIFEST_NAME as COMPOSITE_MANIFEST_NAME, is_current, load_presets
+        composite_dir = self.composite_dir / character_dir.name
+        manifest_path = composite_dir / COMPOSITE_MANIFEST_NAME
+        base = url_path(composite_dir, self.root)
+        if base is None or not manifest_path.exists():
+            return None
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            presets = load_presets(self.presets_path)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not is_current(manifest, character_dir, presets, self.layers[character_id]):
+            return None
+        return {"base": base, "stack": manifest["stack"], "combos": manifest["combos"], "images": manifest["images"]}
+
+
+def read_position(path):
+    """<パーツ名>_position.json の外接矩形とレイヤー名"""
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return {"bbox": data.get("bbox"), "layer": data.get("name")}
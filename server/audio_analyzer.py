@@ -1,31 +1,44 @@
 import asyncio
-import numpy as np
 import threading
 import queue
 import logging
 from pathlib import Path
 
-try:
-    import soundfile as sf
-    import pyaudio
-    AUDIO_AVAILABLE = True
-except ImportError:
-    AUDIO_AVAILABLE = False
+# numpy・soundfile・pyaudio は読み込みが重いので、初めて音声を再生するときに読み込む
+np = None
+sf = None
+pyaudio = None
+AUDIO_AVAILABLE = None  # None: 未確認
+_audio_libs_lock = threading.Lock()
+
+
+def load_audio_libs():
+    """音声ライブラリを読み込み、使えるかどうかを返す（2回目以降は結果を返すだけ）"""
+    global np, sf, pyaudio, AUDIO_AVAILABLE
+    with _audio_libs_lock:
+        if AUDIO_AVAILABLE is None:
+            try:
+                import numpy
+                import soundfile
+                import pyaudio as pyaudio_module
+                np, sf, pyaudio = numpy, soundfile, pyaudio_module
+                AUDIO_AVAILABLE = True
+            except ImportError:
+                AUDIO_AVAILABLE = False
+                logging.getLogger(__name__).warning("音声ライブラリが見つかりません。音声再生は無効です。")
+    return AUDIO_AVAILABLE
 
 class AudioPlayer:
     def __init__(self, volume_callback=None):
         self.volume_callback = volume_callback
         self.is_playing = False
         self.logger = logging.getLogger(__name__)
-        
-        if not AUDIO_AVAILABLE:
-            self.logger.warning("音声ライブラリが見つかりません。音声再生は無効です。")
     
     def play_with_analysis(self, wav_file_path):
         """音声ファイルを再生しながら音量レベルを分析"""
-        if not AUDIO_AVAILABLE:
+        if not load_audio_libs():
             self.logger.info(f"[模擬] 音声再生: {wav_file_path}")
-            # 模擬的な音量レベル送信（別スレッドで）
+            # 模擬的な音量レベル送信（実再生と同様に再生時間分ブロック）
             self._simulate_audio_playback()
             return
 
@@ -106,33 +119,41 @@ class AudioPlayer:
                 self.volume_callback(0.0)
     
     def _simulate_audio_playback(self):
-        """音声再生の模擬実行"""
-        def simulate():
+        """音声再生の模擬実行（呼び出し元スレッドで3秒間ブロック）"""
+        import time
+        self.is_playing = True
+        # 0.1秒×30回 = 3秒
+        for i in range(30):
+            if not self.is_playing:
+                break
+            volume = 0.3 + 0.2 * (i % 10) / 10  # 0.3-0.5の範囲で変動
             if self.volume_callback:
-                # 3秒間の模擬音量レベル送信
-                import time
-                for i in range(30):  # 0.1秒×30回 = 3秒
-                    volume = 0.3 + 0.2 * (i % 10) / 10  # 0.3-0.5の範囲で変動
-                    self.volume_callback(volume)
-                    time.sleep(0.1)
-                self.volume_callback(0.0)  # 終了
-        
-        # 別スレッドで実行
-        thread = threading.Thread(target=simulate, daemon=True)
-        thread.start()
+                self.volume_callback(volume)
+            time.sleep(0.1)
+        self.is_playing = False
+        if self.volume_callback:
+            self.volume_callback(0.0)  # 終了
     
     def stop(self):
         """再生停止"""
         self.is_playing = False
         self.logger.info("音声再生停止")
     
-    def play_async(self, wav_file_path):
-        """非同期音声再生"""
-        thread = threading.Thread(
-            target=self.play_with_analysis,
-            args=(wav_file_path,),
-            daemon=True
-        )
+    def play_async(self, wav_file_path, on_finished=None):
+        """非同期音声再生
+
+        on_finished は再生スレッド終了時（正常終了・停止・エラーいずれも）に
+        再生スレッド上で呼ばれる。イベントループへの通知は呼び出し側で
+        call_soon_threadsafe を使うこと。
+        """
+        def run():
+            try:
+                self.play_with_analysis(wav_file_path)
+            finally:
+                if on_finished:
+                    on_finished()
+
+        thread = threading.Thread(target=run, daemon=True)
         thread.start()
         return thread
 
@@ -0,0 +1,184 @@
+"""
+番組全体の音声ミックスダウン（オフライン）
+
+タイムラインの各セリフの合成済み音声を、オフライン描画と同じ時刻（schedule_lines）に置いて
+1本のWAVにまとめる。VOD 用の音声トラックや、セリフのタイミング確認に使う。
+
+- 数秒単位のチャンクごとに、あらかじめ確保した1つのバッファへ重なるセリフを足し込んで書き出す。
+  読み込むのはそのチャンクにかかっているセリフだけなので、数時間の番組でもメモリは一定
+- セリフが重なって 1.0 を超えそうな部分はソフトリミッターで丸める（サンプル単位で決まるので
+  チャンクの区切り方によらず同じ結果）
+- キャラクターごとのゲイン（dB）
+- サンプルレートが異なる音声は線形補間で合わせる
+
+使い方:
+  python -m server.audio_mixdown timeline.json -o show.wav [--as-authored]
+"""
+import argparse
+import json
+import logging
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from server.offline_renderer import schedule_lines, show_duration
+from server.wav_io import open_wav_writer, read_samples, to_pcm16
+
+
+def soft_limit(buffer, threshold=0.9):
+    """threshold を超える部分を 1.0 に漸近させる（その場で書き換え、丸めたサンプル数を返す）"""
+    over = np.abs(buffer) > threshold
+    count = int(np.count_nonzero(over))
+    if count:
+        knee = 1.0 - threshold
+        values = buffer[over]
+        buffer[over] = np.sign(values) * (threshold + knee * np.tanh((np.abs(values) - threshold) / knee))
+    return count
+
+
+def overlap_seconds(lines):
+    """2つ以上のセリフが同時に鳴っている時間の合計"""
+    events = sorted(
+        [(line.start, 1) for line in lines if line.audio_path] + [(line.end, -1) for line in lines if line.audio_path]
+    )
+    total = 0.0
+    active = 0
+    previous = 0.0
+    for moment, delta in events:
+        if active >= 2:
+            total += moment - previous
+        active += delta
+        previous = moment
+    return total
+
+
+class MixSource:
+    """再生中のセリフ（チャンクにかかったときに読み込み、鳴り終わったら手放す）"""
+
+    __slots__ = ("start", "end", "samples", "gain")
+
+    def __init__(self, line, rate, gain):
+        self.samples = read_samples(line.audio_path, rate)
+        self.start = round(line.start * rate)
+        self.end = self.start + len(self.samples)
+        self.gain = gain
+
+
+def mix_lines(lines, output_path, rate=24000, duration=None, gain_db=None, chunk_seconds=10.0, limiter_threshold=0.9):
+    """セリフを1本のWAV（モノラル16bit）に書き出して統計を返す"""
+    started = time.perf_counter()
+    gain_db = gain_db or {}
+    placed = sorted((line for line in lines if line.audio_path), key=lambda line: line.start)
+    if duration is None:
+        duration = max((line.end for line in placed), default=0.0)
+    total = math.ceil(duration * rate)
+    chunk = max(1, int(chunk_seconds * rate))
+    buffer = np.zeros(chunk, dtype=np.float32)
+
+    stats = {
+        "lines": len(lines),
+        "placed": len(placed),
+        "missing": sum(1 for line in lines if line.action.get("text") and not line.audio_path),
+        "overlap_seconds": overlap_seconds(placed),
+        "peak": 0.0,
+        "limited_samples": 0,
+        "max_active": 0,
+    }
+
+    active = []
+    next_line = 0
+    with open_wav_writer(output_path, rate) as target:
+        for chunk_start in range(0, total, chunk):
+            length = min(chunk, total - chunk_start)
+            chunk_end = chunk_start + length
+            mix = buffer[:length]
+            mix.fill(0.0)
+
+            while next_line < len(placed) and round(placed[next_line].start * rate) < chunk_end:
+                line = placed[next_line]
+                active.append(MixSource(line, rate, 10 ** (gain_db.get(line.character, 0.0) / 20)))
+                next_line += 1
+            stats["max_active"] = max(stats["max_active"], len(active))
+
+            for source in active:
+                begin = max(source.start, chunk_start)
+                finish = min(source.end, chunk_end)
+                if begin >= finish:
+                    continue
+                segment = source.samples[begin - source.start:finish - source.start]
+                if source.gain == 1.0:
+                    mix[begin - chunk_start:finish - chunk_start] += segment
+                else:
+                    mix[begin - chunk_start:finish - chunk_start] += segment * source.gain
+            active = [source for source in active if source.end > chunk_end]
+
+            if length:
+                stats["peak"] = max(stats["peak"], float(np.abs(mix).max()))
+            stats["limited_samples"] += soft_limit(mix, limiter_threshold)
+            target.writeframes(to_pcm16(mix))
+
+    elapsed = time.perf_counter() - started
+    stats.update({
+        "duration": total / rate,
+        "elapsed": elapsed,
+        "realtime": (total / rate) / elapsed if elapsed else 0.0,
+        "chunk_bytes": buffer.nbytes,
+    })
+    return stats
+
+
+def mix_from_config(lines, output_path, config, duration=None):
+    """render.audio の設定でミックスダウン"""
+    audio_config = config.get("render", {}).get("audio", {})
+    return mix_lines(
+        lines,
+        output_path,
+        rate=audio_config.get("sample_rate", 24000),
+        duration=duration,
+        gain_db=audio_config.get("gain_db", {}),
+        chunk_seconds=audio_config.get("chunk_seconds", 10.0),
+        limiter_threshold=audio_config.get("limiter_threshold", 0.9),
+    )
+
+
+def print_report(stats):
+    print(f"[ミックスダウン] {stats['duration']:.1f}秒を {stats['elapsed']:.2f}秒で書き出し（実時間の {stats['realtime']:.0f}倍）")
+    print(f"   セリフ: {stats['placed']}/{stats['lines']}件（音声なし {stats['missing']}件）  同時発声: 最大{stats['max_active']}件, 計{stats['overlap_seconds']:.1f}秒")
+    print(f"   ピーク: {stats['peak']:.2f}  リミッター: {stats['limited_samples']}サンプル")
+
+
+def main(argv=None):
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+    from server.config_manager import ConfigManager
+    from server.offline_renderer import cached_audio_lookup
+    from server.voicevox_client import VoicevoxClient
+
+    config = ConfigManager().load_config()
+
+    parser = argparse.ArgumentParser(description="番組全体の音声ミックスダウン")
+    parser.add_argument("timeline", help="タイムラインJSON")
+    parser.add_argument("-o", "--output", required=True, help="出力WAV")
+    parser.add_argument("--as-authored", action="store_true", help="タイムラインの time どおりに置く（重なりを確認する）")
+    parser.add_argument("--synthesize", action="store_true", help="未合成のセリフを VOICEVOX で合成する")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.timeline, "r", encoding="utf-8") as f:
+        timeline = json.load(f)
+    speech_end_wait = config.get("timeline", {}).get("speech_end_wait", 1.0)
+    lines = schedule_lines(
+        timeline,
+        cached_audio_lookup(VoicevoxClient(config), args.synthesize),
+        config.get("render", {}).get("fps", 30),
+        speech_end_wait,
+        serialize=not args.as_authored,
+    )
+    print_report(mix_from_config(lines, args.output, config, show_duration(lines, speech_end_wait)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+WebSocketクライアントへの非ブロッキング一斉送信
+
+クライアントごとに上限付きの送信キューと専用の送信タスクを持たせ、
+遅いクライアント（OBSブラウザソース等）が他のクライアントの口パクを
+止めないようにする。
+"""
+import asyncio
+import inspect
+import logging
+from collections import deque
+
+import websockets
+
+from server.message_codec import OutboundMessage
+from server import anim_protocol
+
+# 同じキーの未送信メッセージを最新値で置き換えてよいアクション
+COALESCABLE_ACTIONS = {"volume_level", "animation_frame"}
+
+
+def coalesce_key_for(data: dict):
+    """置き換え可能なメッセージのキーを返す（置き換え不可ならNone）"""
+    action = data.get("action")
+    if action in COALESCABLE_ACTIONS:
+        return (action, data.get("character"))
+    return None
+
+
+_text_bytes_support = {}
+
+
+def supports_text_bytes(websocket):
+    """bytesをそのままテキストフレームとして送れるか（websockets 14以降の send(text=True)）"""
+    websocket_type = type(websocket)
+    if websocket_type not in _text_bytes_support:
+        try:
+            supported = "text" in inspect.signature(websocket.send).parameters
+        except (TypeError, ValueError):
+            supported = False
+        _text_bytes_support[websocket_type] = supported
+    return _text_bytes_support[websocket_type]
+
+
+class ClientConnection:
+    """1クライアント分の送信キューと送信タスク"""
+
+    def __init__(self, websocket, hub):
+        self.websocket = websocket
+        self.hub = hub
+        self.text_bytes = supports_text_bytes(websocket)
+        # zundamon.anim.v1 をネゴシエートしたクライアントには音量をバイナリで送る
+        self.binary_animation = getattr(websocket, "subprotocol", None) == anim_protocol.ANIMATION_SUBPROTOCOL
+        self.frame_seq = 0
+        self.queue = deque()  # [coalesce_key, OutboundMessage または バイナリエントリ(bytes)]
+        self.pending = {}  # coalesce_key -> 最後の置き換え不可メッセージより後ろにあるエントリ
+        self.wakeup = asyncio.Event()
+        self.task = None
+        self.closed = False
+        self.full_since = None  # キューが上限に達した時刻
+        self.stats = {"sent": 0, "coalesced": 0, "dropped": 0}
+
+    def start(self):
+        """送信タスク開始"""
+        self.task = asyncio.create_task(self._writer())
+
+    def enqueue(self, payload, coalesce_key=None):
+        """送信キューに追加（待機しない）。追加できなければFalse"""
+        if self.closed:
+            return False
+
+        # 未送信の同種メッセージがあれば最新値で上書き（順序は維持）。
+        # speech_end 等をまたいで上書きすると新しい値が状態変更より先に届くので、
+        # 置き換え不可のメッセージより前のエントリは上書きしない
+        if coalesce_key is None:
+            self.pending.clear()
+        else:
+            entry = self.pending.get(coalesce_key)
+            if entry is not None:
+                entry[1] = payload
+                self.stats["coalesced"] += 1
+                return True
+
+        if len(self.queue) >= self.hub.max_queue:
+            now = asyncio.get_running_loop().time()
+            if self.full_since is None:
+                self.full_since = now
+            # 上限超過が猶予時間以上続く、またはハード上限に達したら遅いクライアントとみなす
+            if now - self.full_since > self.hub.slow_client_grace:
+                return False
+            if not self._drop_stale() and len(self.queue) >= self.hub.max_queue * 4:
+                return False
+
+        entry = [coalesce_key, payload]
+        self.queue.append(entry)
+        if coalesce_key is not None:
+            self.pending[coalesce_key] = entry
+        self.wakeup.set()
+        return True
+
+    def _drop_stale(self):
+        """最も古い置き換え可能メッセージを捨てて空きを作る"""
+        for entry in self.queue:
+            if entry[0] is not None:
+                self.queue.remove(entry)
+                if self.pending.get(entry[0]) is entry:
+                    del self.pending[entry[0]]
+                self.stats["dropped"] += 1
+                return True
+        return False
+
+    async def _writer(self):
+        """送信ループ（クライアントごとに1タスク）"""
+        try:
+            while True:
+                while not self.queue:
+                    self.wakeup.clear()
+                    await self.wakeup.wait()
+
+                message = self._pop()[1]
+                if isinstance(message, bytes):
+                    # 先頭に続くバイナリエントリを1フレームにまとめて送る
+                    entries = [message]
+                    count = anim_protocol.entry_count(message)
+                    while (self.queue and isinstance(self.queue[0][1], bytes)
+                           and count + anim_protocol.entry_count(self.queue[0][1]) <= anim_protocol.MAX_ENTRIES):
+                        entries.append(self._pop()[1])
+                        count += anim_protocol.entry_count(entries[-1])
+                    self.frame_seq = (self.frame_seq + 1) & 0xFFFF
+                    send = self.websocket.send(anim_protocol.pack_frame(self.frame_seq, entries))
+                elif self.text_bytes:
+                    send = self.websocket.send(message.data, text=True)
+                else:
+                    send = self.websocket.send(message.text)
+                await asyncio.wait_for(send, self.hub.send_timeout)
+                self.stats["sent"] += 1
+
+                # 上限の半分まで追いついたら遅延扱いを解除
+                if len(self.queue) <= self.hub.max_queue // 2:
+                    self.full_since = None
+
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            self.hub.logger.warning(f"[{self.hub.name}] 送信タイムアウト - クライアント切断")
+            await self.close_socket()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        except Exception as e:
+            self.hub.logger.error(f"[{self.hub.name}送信エラー] {e}")
+        finally:
+            self.closed = True
+            self.hub.unregister(self.websocket)
+
+    def _pop(self):
+        entry = self.queue.popleft()
+        if entry[0] is not None and self.pending.get(entry[0]) is entry:
+            del self.pending[entry[0]]
+        return entry
+
+    async def close_socket(self):
+        """WebSocketを閉じる（送信遅延による切断）"""
+        try:
+            await self.websocket.close(code=1008, reason="client too slow")
+        except Exception:
+            pass
+
+    def close(self):
+        """送信タスク停止"""
+        self.closed = True
+        if self.task and not self.task.done() and self.task is not asyncio.current_task():
+            self.task.cancel()
+
+
+class BroadcastHub:
+    """クライアント集合への一斉送信"""
+
+    def __init__(self, name: str, max_queue=64, send_timeout=5.0, slow_client_grace=3.0):
+        self.name = name
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.slow_client_grace = slow_client_grace
+        self.clients = {}  # websocket -> ClientConnection
+        self.logger = logging.getLogger(__name__)
+
+    def apply_config(self, config):
+        """設定ファイルの broadcast セクションを反映"""
+        broadcast_config = config.get("broadcast", {})
+        self.max_queue = broadcast_config.get("client_queue_size", self.max_queue)
+        self.send_timeout = broadcast_config.get("send_timeout", self.send_timeout)
+        self.slow_client_grace = broadcast_config.get("slow_client_grace", self.slow_client_grace)
+
+    def register(self, websocket):
+        """クライアント登録と送信タスク開始"""
+        connection = ClientConnection(websocket, self)
+        self.clients[websocket] = connection
+        connection.start()
+        return connection
+
+    def unregister(self, websocket):
+        """クライアント登録解除"""
+        connection = self.clients.pop(websocket, None)
+        if connection:
+            connection.close()
+
+    def __len__(self):
+        return len(self.clients)
+
+    def encode(self, data: dict):
+        """送信用にシリアライズ（1メッセージにつき1回）"""
+        return OutboundMessage.from_dict(data)
+
+    def broadcast(self, data: dict):
+        """全クライアントの送信キューに積む（送信完了は待たない）"""
+        if not self.clients:
+            return
+
+        json_payload = None
+        binary_payload = anim_protocol.encode_animation_entries(data)
+        coalesce_key = coalesce_key_for(data)
+        slow_clients = []
+
+        for websocket, connection in self.clients.items():
+            if binary_payload is not None and connection.binary_animation:
+                payload = binary_payload
+            else:
+                # JSONは必要になった時点で1回だけエンコード
+                if json_payload is None:
+                    json_payload = self.encode(data)
+                payload = json_payload
+            if not connection.enqueue(payload, coalesce_key):
+                slow_clients.append(websocket)
+
+        for websocket in slow_clients:
+            self.disconnect_slow_client(websocket)
+
+    def send_to(self, websocket, data: dict):
+        """特定クライアントの送信キューに積む"""
+        connection = self.clients.get(websocket)
+        if not connection:
+            return
+        payload = anim_protocol.encode_animation_entries(data) if connection.binary_animation else None
+        if payload is None:
+            payload = self.encode(data)
+        if not connection.enqueue(payload, coalesce_key_for(data)):
+            self.disconnect_slow_client(websocket)
+
+    def disconnect_slow_client(self, websocket):
+        """送信が追いつかないクライアントを切断"""
+        connection = self.clients.get(websocket)
+        if not connection:
+            return
+        self.logger.warning(f"[{self.name}] 送信遅延クライアント切断 (キュー: {len(connection.queue)}件)")
+        self.unregister(websocket)
+        asyncio.ensure_future(connection.close_socket())
+
+    def get_stats(self):
+        """クライアントごとの送信統計"""
+        return [
+            {"queued": len(connection.queue), **connection.stats}
+            for connection in self.clients.values()
+        ]
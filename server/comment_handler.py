@@ -1,13 +1,17 @@
 import asyncio
+import inspect
 import logging
 import random
 from datetime import datetime
 
+from server.keyword_matcher import DEFAULT_KEYWORDS, KeywordMatcher
+
 class CommentHandler:
-    def __init__(self, config, timeline_executor=None, obs_controller=None):
+    def __init__(self, config, timeline_executor=None, obs_controller=None, keywords=None):
         self.config = config
         self.timeline_executor = timeline_executor
         self.obs_controller = obs_controller
+        self.keywords = keywords or KeywordMatcher(DEFAULT_KEYWORDS)  # classify(text) を持つもの
         self.logger = logging.getLogger(__name__)
         self.response_templates = self.load_response_templates()
         
@@ -79,27 +83,31 @@ class CommentHandler:
     
     def generate_response(self, username: str, text: str):
         """コメント応答生成"""
-        text_lower = text.lower()
-        
-        # コメント内容による分類
-        if any(word in text_lower for word in ["こんにちは", "おはよう", "こんばんは", "はじめまして"]):
-            template_key = "greeting"
-        elif any(word in text_lower for word in ["?", "？", "どう", "なぜ", "教えて"]):
-            template_key = "question"
-        elif any(word in text_lower for word in ["かわいい", "すごい", "いいね", "素晴らしい"]):
-            template_key = "compliment"
-        else:
-            template_key = "default"
-        
-        # テンプレートからランダム選択
-        templates = self.response_templates.get(template_key, self.response_templates["default"])
-        template = random.choice(templates)
+        template = self.choose_template(text)
         
         # プレースホルダー置換
         response = template.format(username=username)
         
         return response
     
+    def choose_template(self, text: str, matches=None):
+        """コメント内容から応答テンプレートを選ぶ（ユーザー名の差し込み前）
+
+        matches はキーワード照合の結果（受付時に照合済みならそれを渡す）。
+        """
+        if matches is None:
+            matches = self.keywords.classify(text)
+        
+        # コメント内容による分類
+        template_key = next(
+            (key for key in ("greeting", "question", "compliment") if key in matches),
+            "default"
+        )
+        
+        # テンプレートからランダム選択
+        templates = self.response_templates.get(template_key, self.response_templates["default"])
+        return random.choice(templates)
+    
     def estimate_speech_duration(self, text: str):
         """音声長さ推定"""
         # 日本語の場合、文字数×0.15秒程度
@@ -109,17 +117,28 @@ class CommentHandler:
     
     async def update_comment_display(self, username: str, text: str):
         """コメント表示更新"""
-        if self.obs_controller:
-            self.obs_controller.update_text_source("comment_username", username)
-            self.obs_controller.update_text_source("comment_text", text)
-            self.obs_controller.update_text_source("comment_timestamp", datetime.now().strftime("%H:%M"))
+        await self.update_text_sources({
+            "comment_username": username,
+            "comment_text": text,
+            "comment_timestamp": datetime.now().strftime("%H:%M")
+        })
     
     async def clear_comment_display(self):
         """コメント表示クリア"""
-        if self.obs_controller:
-            self.obs_controller.update_text_source("comment_username", "")
-            self.obs_controller.update_text_source("comment_text", "")
-            self.obs_controller.update_text_source("comment_timestamp", "")
+        await self.update_text_sources({
+            "comment_username": "",
+            "comment_text": "",
+            "comment_timestamp": ""
+        })
+    
+    async def update_text_sources(self, texts: dict):
+        """複数テキストソース更新（非同期コントローラーなら1バッチにまとまる）"""
+        if not self.obs_controller:
+            return
+        results = [self.obs_controller.update_text_source(name, text) for name, text in texts.items()]
+        pending = [result for result in results if inspect.isawaitable(result)]
+        if pending:
+            await asyncio.gather(*pending)
     
     def add_response_template(self, category: str, template: str):
         """応答テンプレート追加"""
@@ -0,0 +1,135 @@
+"""
+コメント応答のパイプライン（再生中に次の応答を合成しておく）
+
+応答 N を再生している間に、キューから次の lookahead 件を取り出して応答文の生成と音声合成を
+バックグラウンドで進めておき、N が終わったらすぐ N+1 の再生を始める。
+
+    キュー → [準備: 応答文・音声合成] × lookahead 件を並行 → [再生] 1件ずつ
+
+- 準備（prepare）と再生（play）は呼び出し側が渡す。prepare(entry) の戻り値がそのまま play に渡る
+- コメントごとに受付から最初の音声が鳴るまでの時間（time-to-first-audio）を記録する。
+  play は最初の音声を鳴らした時点で on_start() を呼ぶ
+- 取り出し済みの準備中コメントは優先度の並べ替えの対象外になるため、lookahead は小さめにする
+"""
+import asyncio
+import logging
+from collections import deque
+
+RECENT_REPLIES = 50  # metrics() に載せる直近の応答数
+TTFA_SAMPLES = 200
+
+
+class CommentPipeline:
+    """コメントキューから応答を先読みで準備して順に再生する"""
+
+    def __init__(self, queue, prepare, play, lookahead=2, clock=None):
+        self.queue = queue
+        self.prepare = prepare
+        self.play = play
+        self.lookahead = lookahead
+        self.clock = clock or queue.clock
+        self.pending = deque()  # (コメント, 準備タスク)
+        self.ttfa = deque(maxlen=TTFA_SAMPLES)
+        self.recent = deque(maxlen=RECENT_REPLIES)
+        self.stats = {
+            "replies": 0,
+            "prepared": 0,
+            "failed": 0,
+            "ready_on_turn": 0,  # 順番が来た時点で準備が終わっていた件数
+            "prepare_total": 0.0,
+            "ttfa_total": 0.0,
+            "ttfa_max": 0.0,
+        }
+        self.logger = logging.getLogger(__name__)
+
+    def apply_config(self, config):
+        """設定ファイルの comments セクションを反映"""
+        self.lookahead = config.get("comments", {}).get("lookahead", self.lookahead)
+
+    async def run(self):
+        """コメントが来るたびに準備・再生を続ける"""
+        while True:
+            if not self.pending:
+                self._start(await self.queue.get())
+            self._fill()
+            entry, task = self.pending.popleft()
+            self._fill()
+            if task.done():
+                self.stats["ready_on_turn"] += 1
+            try:
+                reply = await task
+            except Exception as e:
+                self.stats["failed"] += 1
+                self.logger.error(f"[コメント応答] 準備エラー: {e}")
+                continue
+            await self._play_while_prefetching(entry, reply)
+
+    def metrics(self):
+        """応答数・準備時間・最初の音声までの時間"""
+        replies = self.stats["replies"]
+        samples = sorted(self.ttfa)
+        return {
+            "lookahead": self.lookahead,
+            "preparing": len(self.pending),
+            "prepare_avg": self.stats["prepare_total"] / self.stats["prepared"] if self.stats["prepared"] else 0.0,
+            "ttfa_avg": self.stats["ttfa_total"] / replies if replies else 0.0,
+            "ttfa_p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else 0.0,
+            "recent": list(self.recent),
+            **self.stats,
+        }
+
+    def _fill(self):
+        """準備中が lookahead 件になるまでキューから取り出す"""
+        while len(self.pending) < self.lookahead:
+            entry = self.queue.get_nowait()
+            if entry is None:
+                return
+            self._start(entry)
+
+    def _start(self, entry):
+        self.pending.append((entry, asyncio.create_task(self._prepare(entry))))
+
+    async def _prepare(self, entry):
+        started = self.clock()
+        try:
+            return await self.prepare(entry)
+        finally:
+            self.stats["prepared"] += 1
+            self.stats["prepare_total"] += self.clock() - started
+
+    async def _play_while_prefetching(self, entry, reply):
+        """再生中に届いたコメントも準備を始める"""
+        record = {"username": entry.username, "text": entry.text, "ttfa": None}
+
+        def on_start():
+            if record["ttfa"] is None:
+                record["ttfa"] = self.clock() - entry.enqueued
+                self.ttfa.append(record["ttfa"])
+                self.stats["ttfa_total"] += record["ttfa"]
+                self.stats["ttfa_max"] = max(self.stats["ttfa_max"], record["ttfa"])
+                self.logger.info(f"[コメント応答] 最初の音声まで {record['ttfa']:.2f}秒: {entry.text[:20]}")
+
+        play_task = asyncio.create_task(self.play(entry, reply, on_start))
+        try:
+            while not play_task.done():
+                if len(self.pending) >= self.lookahead:
+                    await asyncio.wait({play_task})
+                    break
+                getter = asyncio.create_task(self.queue.get())
+                try:
+                    await asyncio.wait({play_task, getter}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    # 取り出したコメントは必ず準備に回す（取り出す前なら取り消す）
+                    if getter.done() and not getter.cancelled():
+                        self._start(getter.result())
+                    else:
+                        getter.cancel()
+            play_task.result()
+            self.stats["replies"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            self.logger.error(f"[コメント応答] 再生エラー: {e}")
+        finally:
+            if not play_task.done():
+                play_task.cancel()
+            self.recent.append(record)
@@ -0,0 +1,232 @@
+"""
+コメント受付キュー（優先度・重複除去・上限付き）
+
+コメントが殺到しても応答が際限なく遅れていかないよう、受け付けたコメントを
+優先度クラスごとのヒープに積み、応答側（1件ずつ処理するワーカー）が取り出す。
+
+- 優先度: 特別ユーザー > 質問 > 通常 > あいさつ（同じクラスの中では古い順）。
+  質問・あいさつ・NGワードの判定はキーワード照合（server/keyword_matcher.py）の1回の走査で行い、
+  結果はコメントに持たせて応答テンプレートの選択にも使う
+- NGワードを含むコメントは受け付けない
+- 同じ内容のコメント（NFKC・大文字小文字・空白を無視）は dedup_window 秒以内なら捨てる
+- キューが max_depth に達したら drop_policy に従って捨てる
+    lowest: 最も優先度の低いクラスの一番古いものを捨てる（新着の方が低ければ新着を捨てる）
+    oldest: 一番古いものを捨てる
+    newest: 新着を捨てる
+- max_wait 秒より長く待ったコメントは取り出し時に捨てる（0 で無効）
+- キューの深さ・待ち時間・捨てた件数を metrics() で返す（/api/comments）
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+import unicodedata
+from collections import deque
+
+from server.keyword_matcher import DEFAULT_KEYWORDS, KeywordMatcher
+
+PRIORITY_SPECIAL = 0
+PRIORITY_QUESTION = 1
+PRIORITY_NORMAL = 2
+PRIORITY_GREETING = 3
+PRIORITY_NAMES = {
+    PRIORITY_SPECIAL: "special",
+    PRIORITY_QUESTION: "question",
+    PRIORITY_NORMAL: "normal",
+    PRIORITY_GREETING: "greeting",
+}
+DROP_POLICIES = ("lowest", "oldest", "newest")
+WAIT_SAMPLES = 200  # 待ち時間のパーセンタイルに使う直近の件数
+
+
+def normalize_text(text: str):
+    """重複判定用のキー（全角半角・大文字小文字・空白の違いを無視）"""
+    return "".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+class QueuedComment:
+    """キュー内のコメント1件"""
+
+    __slots__ = ("data", "username", "text", "matches", "priority", "key", "enqueued", "seq")
+
+    def __init__(self, data, matches, priority, key, enqueued, seq):
+        self.data = data
+        self.username = data.get("username", "名無しさん")
+        self.text = data.get("text", "")
+        self.matches = matches  # カテゴリ -> [(開始, 終了, キーワード), ...]
+        self.priority = priority
+        self.key = key
+        self.enqueued = enqueued
+        self.seq = seq
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class CommentQueue:
+    """優先度付きのコメント受付キュー"""
+
+    def __init__(self, max_depth=20, dedup_window=30.0, drop_policy="lowest", max_wait=60.0,
+                 special_users=(), keywords=None, clock=time.monotonic):
+        self.max_depth = max_depth
+        self.dedup_window = dedup_window
+        self.drop_policy = drop_policy
+        self.max_wait = max_wait
+        self.special_users = set(special_users)
+        self.keywords = keywords or KeywordMatcher(DEFAULT_KEYWORDS)  # classify(text) を持つもの
+        self.clock = clock
+        self.heap = []
+        self.recent = {}  # 重複判定キー -> 最後に受け付けた時刻（挿入順 = 時刻順）
+        self.seq = itertools.count()
+        self.available = asyncio.Event()
+        self.waits = deque(maxlen=WAIT_SAMPLES)
+        self.stats = {
+            "received": 0,
+            "accepted": 0,
+            "served": 0,
+            "deduplicated": 0,
+            "blocked": 0,
+            "dropped": 0,
+            "expired": 0,
+            "peak_depth": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+        self.logger = logging.getLogger(__name__)
+
+    def apply_config(self, config):
+        """設定ファイルの comments セクションを反映"""
+        comment_config = config.get("comments", {})
+        self.max_depth = comment_config.get("max_depth", self.max_depth)
+        self.dedup_window = comment_config.get("dedup_window", self.dedup_window)
+        self.max_wait = comment_config.get("max_wait", self.max_wait)
+        self.special_users = set(comment_config.get("special_users", self.special_users))
+        drop_policy = comment_config.get("drop_policy", self.drop_policy)
+        if drop_policy in DROP_POLICIES:
+            self.drop_policy = drop_policy
+        else:
+            self.logger.warning(f"[コメント] 不明な drop_policy: {drop_policy}（{self.drop_policy} を使用）")
+
+    def __len__(self):
+        return len(self.heap)
+
+    def classify(self, data, matches):
+        """優先度クラスを決める（小さいほど先に応答する）"""
+        if data.get("username") in self.special_users:
+            return PRIORITY_SPECIAL
+        if "question" in matches:
+            return PRIORITY_QUESTION
+        if "greeting" in matches:
+            return PRIORITY_GREETING
+        return PRIORITY_NORMAL
+
+    def put(self, data):
+        """コメントを受け付ける（受け付けたら True、重複・満杯で捨てたら False）"""
+        now = self.clock()
+        self.stats["received"] += 1
+        self._forget_before(now - self.dedup_window)
+
+        key = normalize_text(data.get("text", ""))
+        if key and key in self.recent:
+            self.stats["deduplicated"] += 1
+            self.logger.debug(f"[コメント] 重複のため破棄: {data.get('text', '')[:20]}")
+            return False
+
+        matches = self.keywords.classify(data.get("text", ""))
+        if "ng" in matches:
+            self.stats["blocked"] += 1
+            self.logger.info(f"[コメント] NGワードのため破棄: {matches['ng'][0][2]}")
+            return False
+
+        entry = QueuedComment(data, matches, self.classify(data, matches), key, now, next(self.seq))
+        if len(self.heap) >= self.max_depth and not self._make_room(entry):
+            self.stats["dropped"] += 1
+            self.logger.info(f"[コメント] キュー満杯のため破棄: {entry.text[:20]}")
+            return False
+
+        if key:
+            self.recent[key] = now
+        heapq.heappush(self.heap, entry)
+        self.stats["accepted"] += 1
+        self.stats["peak_depth"] = max(self.stats["peak_depth"], len(self.heap))
+        self.available.set()
+        return True
+
+    def get_nowait(self):
+        """次に応答するコメント（なければ None）。待ちすぎたコメントは捨てる"""
+        now = self.clock()
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            waited = now - entry.enqueued
+            if self.max_wait and waited > self.max_wait:
+                self.stats["expired"] += 1
+                self.logger.info(f"[コメント] 待ち時間超過のため破棄（{waited:.1f}秒）: {entry.text[:20]}")
+                continue
+            self._record_wait(waited)
+            if not self.heap:
+                self.available.clear()
+            return entry
+        self.available.clear()
+        return None
+
+    async def get(self):
+        """次に応答するコメントを待って取り出す"""
+        while True:
+            entry = self.get_nowait()
+            if entry is not None:
+                return entry
+            await self.available.wait()
+
+    def metrics(self):
+        """キューの深さ・待ち時間・件数"""
+        now = self.clock()
+        depth_by_class = {name: 0 for name in PRIORITY_NAMES.values()}
+        for entry in self.heap:
+            depth_by_class[PRIORITY_NAMES[entry.priority]] += 1
+        waits = sorted(self.waits)
+        served = self.stats["served"]
+        return {
+            "depth": len(self.heap),
+            "depth_by_class": depth_by_class,
+            "max_depth": self.max_depth,
+            "oldest_wait": max((now - entry.enqueued for entry in self.heap), default=0.0),
+            "wait_avg": self.stats["wait_total"] / served if served else 0.0,
+            "wait_p50": waits[len(waits) // 2] if waits else 0.0,
+            "wait_p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+            **self.stats,
+        }
+
+    def _record_wait(self, waited):
+        self.stats["served"] += 1
+        self.stats["wait_total"] += waited
+        self.stats["wait_max"] = max(self.stats["wait_max"], waited)
+        self.waits.append(waited)
+
+    def _forget_before(self, threshold):
+        """重複判定の記録から dedup_window より古いものを消す"""
+        while self.recent:
+            key, moment = next(iter(self.recent.items()))
+            if moment >= threshold:
+                break
+            del self.recent[key]
+
+    def _make_room(self, entry):
+        """満杯のとき1件捨てて空きを作る（新着を捨てるなら False）
+
+        max_depth は数十件程度なので、捨てる候補は線形に探す。
+        """
+        if self.drop_policy == "newest":
+            return False
+        if self.drop_policy == "oldest":
+            victim = min(self.heap, key=lambda queued: queued.seq)
+        else:
+            lowest = max(queued.priority for queued in self.heap)
+            if entry.priority > lowest:
+                return False
+            victim = min((queued for queued in self.heap if queued.priority == lowest), key=lambda queued: queued.seq)
+        self.heap.remove(victim)
+        heapq.heapify(self.heap)
+        self.stats["dropped"] += 1
+        self.logger.info(f"[コメント] キュー満杯のため古いコメントを破棄: {victim.text[:20]}")
+        return True
@@ -49,7 +49,39 @@ class ConfigManager:
                 "obs_timeline_dir": "./obs_timeline",
                 "assets_dir": "./assets",
                 "audio_temp_dir": "./audio_temp",
-                "logs_dir": "./logs"
+                "logs_dir": "./logs",
+                "atlas_dir": "./assets_atlas",
+                "composite_dir": "./assets_composite"
+            },
+            "atlas": {
+                "enabled": True,
+                "build_on_start": True,
+                "max_size": 2048,
+                "padding": 2
+            },
+            "composite": {
+                "enabled": True,
+                "build_on_start": True
+            },
+            "render": {
+                "width": 1200,
+                "height": 800,
+                "fps": 30,
+                "background": [0, 177, 64],
+                "background_image": None,
+                "blink_seed": 0,
+                "workers": 0,
+                "encoder": "ffmpeg",
+                "encoder_args": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "20", "-pix_fmt", "yuv420p"],
+                "characters": {
+                    "zundamon": {"x": 750, "y": 50, "scale": 0.6}
+                },
+                "audio": {
+                    "sample_rate": 24000,
+                    "chunk_seconds": 10.0,
+                    "limiter_threshold": 0.9,
+                    "gain_db": {"zundamon": 0.0}
+                }
             },
             "servers": {
                 "http_port": 5000,
@@ -61,19 +93,71 @@ class ConfigManager:
                 "obs_websocket_port": 4455,
                 "obs_password": ""
             },
+            "http": {
+                "keepalive_timeout": 75.0,
+                "compress_min_size": 1024,
+                "compress_max_size": 4194304,
+                "immutable_max_age": 31536000
+            },
             "characters": {
                 "zundamon": {
                     "voice_id": 3,
+                    "asset_dir": "zundamon_en",
                     "default_expression": "normal",
                     "default_outfit": "usual",
                     "default_pose": "basic",
-                    "default_position": "center"
+                    "default_position": "center",
+                    "layers": [
+                        {"texture": "body"},
+                        {"texture": "swimsuit"},
+                        {"preset": "outfits", "field": "clothes"},
+                        {"preset": "poses", "field": "rightArm", "suffix": "_right", "default": "basic"},
+                        {"preset": "poses", "field": "leftArm", "suffix": "_left", "default": "basic"},
+                        {"texture": "edamame"},
+                        {"live": "eyeWhite", "default": "normal_white_eye", "blink": "sleepy_eye"},
+                        {"live": "eyeBlack", "default": "normal_eye", "blink": None},
+                        {"live": "eyebrow", "default": "normal_eyebrow"},
+                        {"live": "mouth", "default": "muhu"}
+                    ]
                 }
             },
             "timeline": {
                 "auto_blink_interval": 5.0,
                 "speech_end_wait": 1.0,
-                "comment_response_timeout": 30.0
+                "comment_response_timeout": 30.0,
+                "warm_audio_items": 10
+            },
+            "comments": {
+                "max_depth": 20,
+                "dedup_window": 30.0,
+                "drop_policy": "lowest",
+                "lookahead": 2,
+                "max_wait": 60.0,
+                "special_users": [],
+                "keywords_file": "config/keywords.json"
+            },
+            "response_bank": {
+                "enabled": True,
+                "warm_on_start": True,
+                "sample_rate": 24000,
+                "crossfade_ms": 15,
+                "silence_threshold": 0.01,
+                "max_usernames": 200,
+                "regular_viewers": []
+            },
+            "broadcast": {
+                "client_queue_size": 64,
+                "send_timeout": 5.0,
+                "slow_client_grace": 3.0,
+                "binary_animation": True,
+                "frame_rate": 30,
+                "min_frame_rate": 10,
+                "adaptive_frame_rate": True
+            },
+            "readiness": {
+                "interval": 0.25,
+                "probe_timeout": 2.0,
+                "server_timeout": 30
             },
             "plugins": {
                 "enabled": [],
@@ -0,0 +1,132 @@
+"""
+口パク用音量更新のフレーム化
+
+音量サンプルを1件ずつ送る代わりに、設定したティック（30/60Hz等）ごとに
+全キャラクターの最新音量を1メッセージ（animation_frame）にまとめて送る。
+話者数や音量サンプル数に関係なく送信レートはティックレートで頭打ちになる。
+クライアントから報告される取りこぼしフレーム数に応じてティックレートを自動調整する。
+"""
+import asyncio
+import logging
+
+# 取りこぼし率がこれを超えたらレートを下げ、下回ったら上げる
+DROP_RATIO_HIGH = 0.10
+DROP_RATIO_LOW = 0.02
+RATE_DECREASE_FACTOR = 0.75
+RATE_INCREASE_STEP = 5
+ADAPT_INTERVAL = 1.0  # ティックレートを見直す間隔（秒）。その間の報告をまとめて1回だけ調整する
+
+
+class AnimationFrameBatcher:
+    """音量更新をティック単位の animation_frame にまとめて送信"""
+
+    def __init__(self, hub, frame_rate=30, min_frame_rate=10, adaptive=True):
+        self.hub = hub
+        self.max_frame_rate = frame_rate
+        self.frame_rate = frame_rate
+        self.min_frame_rate = min_frame_rate
+        self.adaptive = adaptive
+        self.levels = {}  # character -> 最新の音量
+        self.pending = False
+        self.dirty_event = asyncio.Event()
+        self.seq = 0
+        self.client_reports = {}  # websocket -> [受信数, 取りこぼし数]（前回の調整以降の合計）
+        self.display_rates = {}  # websocket -> 表示フレームレート
+        self.stats = {"updates": 0, "frames": 0}
+        self.logger = logging.getLogger(__name__)
+
+    def apply_config(self, config):
+        """設定ファイルの broadcast セクションを反映"""
+        broadcast_config = config.get("broadcast", {})
+        self.max_frame_rate = broadcast_config.get("frame_rate", self.max_frame_rate)
+        self.min_frame_rate = broadcast_config.get("min_frame_rate", self.min_frame_rate)
+        self.adaptive = broadcast_config.get("adaptive_frame_rate", self.adaptive)
+        self.frame_rate = self.max_frame_rate
+
+    def update(self, character: str, level):
+        """音量更新を記録（送信は次のティック）"""
+        self.levels[character] = level
+        self.stats["updates"] += 1
+        if not self.pending:
+            self.pending = True
+            self.dirty_event.set()
+
+    def flush(self):
+        """未送信の更新があれば即座にフレームとして送る
+
+        speech_end 等の後続メッセージより前に口パクを届けるため、
+        音量以外のメッセージを送る直前にも呼ぶ。
+        """
+        if not self.pending:
+            return
+        self.pending = False
+        self.dirty_event.clear()
+        self.seq = (self.seq + 1) & 0xFFFF
+        self.hub.broadcast({
+            "action": "animation_frame",
+            "seq": self.seq,
+            "levels": dict(self.levels)
+        })
+        self.stats["frames"] += 1
+
+    async def run(self):
+        """ティックループ（更新がない間は待機のみ）"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        next_adapt = loop.time() + ADAPT_INTERVAL
+        while True:
+            await self.dirty_event.wait()
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.flush()
+            now = loop.time()
+            if self.adaptive and now >= next_adapt:
+                self.adapt_frame_rate()
+                next_adapt = now + ADAPT_INTERVAL
+            next_tick = now + 1.0 / self.frame_rate
+
+    def report_client_stats(self, websocket, data: dict):
+        """クライアントからの frame_stats 報告を記録（反映は run() が ADAPT_INTERVAL ごとにまとめて行う）"""
+        counts = self.client_reports.setdefault(websocket, [0, 0])
+        counts[0] += data.get("received", 0)
+        counts[1] += data.get("dropped", 0)
+        display_rate = data.get("display_rate")
+        if display_rate:
+            self.display_rates[websocket] = display_rate
+
+    def forget_client(self, websocket):
+        """切断クライアントの報告を破棄"""
+        self.client_reports.pop(websocket, None)
+        self.display_rates.pop(websocket, None)
+
+    def adapt_frame_rate(self):
+        """前回以降の報告のうち最も遅いクライアントに合わせてティックレートを1段階調整
+
+        報告は調整のたびに捨てるので、古い取りこぼし率で何度も下げたり、
+        報告してくるクライアントの数だけ上げたりしない。
+        """
+        if not self.client_reports:
+            return
+        ceiling = self.max_frame_rate
+        if self.display_rates:
+            # ブラウザの表示レートより速く送っても表示されない
+            ceiling = min(ceiling, max(self.min_frame_rate, min(self.display_rates.values())))
+
+        worst_drop_ratio = max(
+            (dropped / received if received else 0.0 for received, dropped in self.client_reports.values()),
+            default=0.0
+        )
+        self.client_reports.clear()
+        if worst_drop_ratio > DROP_RATIO_HIGH:
+            new_rate = self.frame_rate * RATE_DECREASE_FACTOR
+        elif worst_drop_ratio < DROP_RATIO_LOW:
+            new_rate = self.frame_rate + RATE_INCREASE_STEP
+        else:
+            new_rate = self.frame_rate
+        new_rate = max(self.min_frame_rate, min(new_rate, ceiling))
+
+        if abs(new_rate - self.frame_rate) >= 1:
+            self.logger.info(f"[フレーム] ティックレート変更: {self.frame_rate:.0f}Hz → {new_rate:.0f}Hz "
+                             f"(取りこぼし率: {worst_drop_ratio:.1%})")
+        self.frame_rate = new_rate
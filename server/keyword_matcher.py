@@ -0,0 +1,195 @@
+"""
+コメント振り分け用のキーワード照合（Aho–Corasick）
+
+カテゴリ（あいさつ・質問・褒め言葉・NGワード等）ごとのキーワードを1つのオートマトンにまとめ、
+コメントを1回走査するだけで一致したすべてのカテゴリと位置を返す。
+キーワード数が増えても1文字あたりの処理量はほぼ変わらない。
+
+- 大文字小文字は区別しない（小文字にしても長さを変えないので、位置は元のテキストの位置のまま）
+- 失敗遷移をたどった結果は照合しながら覚えていき、2回目からは1文字1回の辞書引きで進む
+  （キーワードに出てこない文字は覚えずに初期状態へ戻すので、表の大きさはキーワードの文字種で頭打ち）
+- キーワードは config/keywords.json（{"カテゴリ": ["キーワード", ...]}）。
+  KeywordIndex はファイルの更新を検知して作り直すので、再起動せずに差し替えられる
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+# config/keywords.json がないときのキーワード（CommentHandler の従来の分類と同じ）
+DEFAULT_KEYWORDS = {
+    "greeting": ["こんにちは", "おはよう", "こんばんは", "はじめまして"],
+    "question": ["?", "？", "どう", "なぜ", "教えて"],
+    "compliment": ["かわいい", "すごい", "いいね", "素晴らしい"],
+    "ng": [],
+}
+CHECK_INTERVAL = 1.0  # ファイルの更新を確認する間隔（秒）
+
+
+def fold(text: str):
+    """大文字小文字を区別しないための小文字化（長さを変えない）"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # "İ" のように小文字にすると2文字になる文字はそのまま残す
+    return "".join(lowered if len(lowered := char.lower()) == 1 else char for char in text)
+
+
+def validate_keywords(keywords):
+    """{"カテゴリ": ["キーワード", ...]} の形か確認（違えば ValueError）"""
+    if not isinstance(keywords, dict):
+        raise ValueError(f"カテゴリの辞書ではありません: {type(keywords).__name__}")
+    for category, words in keywords.items():
+        if not isinstance(words, list) or not all(isinstance(word, str) for word in words):
+            raise ValueError(f"カテゴリ {category} のキーワードが文字列のリストではありません")
+    return keywords
+
+
+class KeywordMatcher:
+    """カテゴリ付きキーワードの Aho–Corasick オートマトン"""
+
+    def __init__(self, keywords: dict):
+        self.goto = [{}]  # 状態 -> {文字: 次の状態}（トライの辺）
+        self.fail = [0]
+        self.delta = []  # 状態 -> {文字: 次の状態}（失敗遷移をたどった結果を照合中に覚えていく）
+        self.output = [()]  # 状態 -> ((カテゴリ, キーワード, 長さ), ...)（失敗遷移先の分も含む）
+        self.categories = sorted(keywords)
+        self.pattern_count = 0
+        for category, words in keywords.items():
+            for word in words:
+                if word:
+                    self._add(category, word)
+        self._link()
+
+    def __len__(self):
+        return self.pattern_count
+
+    def _add(self, category, word):
+        state = 0
+        for char in fold(word):
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            state = next_state
+        entry = (category, word, len(word))
+        if entry not in self.output[state]:
+            self.output[state] += (entry,)
+            self.pattern_count += 1
+
+    def _link(self):
+        """失敗遷移を幅優先で張り、一致の出力を失敗遷移先からも引き継ぐ"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                self.output[next_state] += self.output[self.fail[next_state]]
+        self.delta = [dict(edges) for edges in self.goto]
+        self.alphabet = frozenset(self.goto[0]).union(*(edges.keys() for edges in self.goto))
+
+    def find_all(self, text: str):
+        """一致したキーワードを (開始, 終了, カテゴリ, キーワード) の並びで返す（重なりも含む）"""
+        delta, output, alphabet = self.delta, self.output, self.alphabet
+        matches = []
+        state = 0
+        for index, char in enumerate(fold(text)):
+            next_state = delta[state].get(char)
+            if next_state is None:
+                if char not in alphabet:
+                    state = 0
+                    continue
+                next_state = delta[state][char] = self._transition(state, char)
+            state = next_state
+            if output[state]:
+                for category, word, length in output[state]:
+                    matches.append((index + 1 - length, index + 1, category, word))
+        return matches
+
+    def _transition(self, state, char):
+        """トライにない文字の遷移（失敗遷移をたどる）"""
+        while state and char not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(char, 0)
+
+    def classify(self, text: str):
+        """カテゴリ -> [(開始, 終了, キーワード), ...]（一致したカテゴリだけ）"""
+        result = {}
+        for start, end, category, word in self.find_all(text):
+            result.setdefault(category, []).append((start, end, word))
+        return result
+
+
+class KeywordIndex:
+    """キーワードファイルから作ったオートマトン（ファイルが変わったら作り直す）"""
+
+    def __init__(self, path, defaults=None, check_interval=CHECK_INTERVAL, clock=time.monotonic):
+        self.path = Path(path)
+        self.defaults = DEFAULT_KEYWORDS if defaults is None else defaults
+        self.check_interval = check_interval
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.signature = None
+        self.checked = None
+        self.current = None
+        self.stats = {"builds": 0, "errors": 0}
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def matcher(self):
+        """最新のオートマトン（確認は check_interval 秒に1回、読み込みに失敗したら前のものを使い続ける）"""
+        now = self.clock()
+        if self.current is not None and self.checked is not None and now - self.checked < self.check_interval:
+            return self.current
+        with self.lock:
+            self.checked = now
+            signature = self._signature()
+            if self.current is None or signature != self.signature:
+                self._load(signature)
+            return self.current
+
+    def reload(self):
+        """次の参照時にファイルを読み直す"""
+        with self.lock:
+            self.checked = None
+            self.signature = None
+
+    def classify(self, text: str):
+        return self.matcher.classify(text)
+
+    def find_all(self, text: str):
+        return self.matcher.find_all(text)
+
+    def _signature(self):
+        try:
+            stat_result = self.path.stat()
+        except OSError:
+            return None
+        return stat_result.st_size, stat_result.st_mtime_ns
+
+    def _load(self, signature):
+        keywords = self.defaults
+        if signature is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    keywords = validate_keywords(json.load(f))
+            except (OSError, ValueError) as e:
+                self.stats["errors"] += 1
+                self.logger.error(f"[キーワード] 読み込みエラー（前の設定を使用）: {self.path}: {e}")
+                if self.current is not None:
+                    self.signature = signature
+                    return
+        self.current = KeywordMatcher(keywords)
+        self.signature = signature
+        self.stats["builds"] += 1
+        self.logger.info(f"[キーワード] {len(self.current)}件（{len(self.current.categories)}カテゴリ）を読み込み")
@@ -1,13 +1,12 @@
 import asyncio
 import websockets
+from aiohttp import web
 import json
 import threading
-import queue
 import logging
 import sys
 import time
 from pathlib import Path
-from http.server import HTTPServer, SimpleHTTPRequestHandler
 
 # パッケージパスを追加
 project_root = Path(__file__).parent.parent
@@ -16,21 +15,36 @@ sys.path.insert(0, str(project_root))
 from server.config_manager import ConfigManager
 from server.voicevox_client import VoicevoxClient
 from server.audio_analyzer import AudioAnalyzer
-from server.obs_controller import OBSController
+from server.obs_async_controller import AsyncOBSController
 from server.plugin_manager import PluginManager
+from server.client_fanout import BroadcastHub
+from server.frame_batcher import AnimationFrameBatcher
+from server.scene_state import SceneStateStore
+from server.static_server import start_static_server
+from server.asset_index import AssetIndex
+from server.comment_queue import CommentQueue
+from server.comment_pipeline import CommentPipeline
+from server.comment_handler import CommentHandler
+from server.keyword_matcher import KeywordIndex
+from server import anim_protocol
 
 # グローバル変数を最初に初期化
-browser_clients = set()
-obs_control_clients = set()
+browser_hub = BroadcastHub("ブラウザ")
+obs_control_hub = BroadcastHub("OBS制御")
+frame_batcher = AnimationFrameBatcher(browser_hub)
+scene_state = SceneStateStore()  # 表情・話者・タイムライン等の現在状態
 voicevox = None
 audio_analyzer = None
 obs_controller = None
 plugin_manager = None
-volume_queue = queue.Queue()
+# 音声スレッドからは loop.call_soon_threadsafe 経由でのみ投入する
+volume_queue = asyncio.Queue()
 
 # 非同期読み上げシステム用グローバル変数
-comment_queue = []  # コメントキュー（文字列）
-prepared_audio = None  # 準備済み音声ファイルパス
+comment_queue = CommentQueue()  # コメント受付キュー（優先度・重複除去・上限付き）
+comment_pipeline = None  # コメント応答の先読みパイプライン
+comment_handler = None  # 応答テンプレートの選択
+response_bank = None  # 応答テンプレートの合成済み音声（ユーザー名だけ合成して連結）
 current_speech_task = None  # 現在の音声再生タスク
 is_speaking = False  # 音声再生中フラグ
 speech_lock = asyncio.Lock()  # 音声制御ロック
@@ -44,12 +58,15 @@ timeline_executor = None
 timeline_task = None
 timeline_position = 0  # タイムライン停止位置記録
 config = None  # システム設定
+asset_index = None  # 立ち絵アセットのマニフェスト（/api/assets）
+plugins_ready = threading.Event()  # プラグイン読み込み・on_system_start 完了（起動レディネス判定用）
 
 async def browser_handler(websocket):
     """ブラウザ用WebSocketハンドラー（admin.html、index.html、外部制御スクリプト用）"""
-    global browser_clients
-    browser_clients.add(websocket)
-    logging.info(f"[WebSocket] ブラウザ接続: {len(browser_clients)}台")
+    browser_hub.register(websocket)
+    logging.info(f"[WebSocket] ブラウザ接続: {len(browser_hub)}台")
+    # 途中接続でも現在の表示状態から始められるよう最初にスナップショットを送る
+    browser_hub.send_to(websocket, scene_state.snapshot_message(get_timeline_status()))
     
     try:
         async for message in websocket:
@@ -65,6 +82,9 @@ async def browser_handler(websocket):
                     await handle_speech_request(data.get("text", ""), character=data.get("character", "zundamon"))
                 elif data.get("action") in ["change_expression", "change_pose", "change_outfit"]:
                     await broadcast_to_browser(data)
+                # 口パクフレームの取りこぼし報告（ティックレート自動調整用）
+                elif data.get("action") == "frame_stats":
+                    frame_batcher.report_client_stats(websocket, data)
                 # タイムライン制御
                 elif data.get("action") == "get_projects":
                     await handle_get_projects(websocket)
@@ -72,6 +92,8 @@ async def browser_handler(websocket):
                     await handle_start_timeline(data.get("project"))
                 elif data.get("action") == "stop_timeline":
                     await handle_stop_timeline()
+                elif data.get("action") == "comment_interrupt":
+                    await handle_comment_interrupt(data)
                 # 外部制御スクリプトからのコマンド
                 elif data.get("action") == "speak":
                     await handle_speech_request(data.get("text", ""), character=data.get("character", "zundamon"))
@@ -88,13 +110,13 @@ async def browser_handler(websocket):
     except websockets.exceptions.ConnectionClosed:
         logging.info("[WebSocket] ブラウザ切断")
     finally:
-        browser_clients.discard(websocket)
+        browser_hub.unregister(websocket)
+        frame_batcher.forget_client(websocket)
 
 async def obs_control_handler(websocket):
     """OBS制御用WebSocketハンドラー（統合タイムラインシステム用）"""
-    global obs_control_clients
-    obs_control_clients.add(websocket)
-    logging.info(f"[WebSocket] OBS制御システム接続: {len(obs_control_clients)}台")
+    obs_control_hub.register(websocket)
+    logging.info(f"[WebSocket] OBS制御システム接続: {len(obs_control_hub)}台")
     
     try:
         async for message in websocket:
@@ -113,45 +135,37 @@ async def obs_control_handler(websocket):
     except websockets.exceptions.ConnectionClosed:
         logging.info("[WebSocket] OBS制御システム切断")
     finally:
-        obs_control_clients.discard(websocket)
+        obs_control_hub.unregister(websocket)
 
 async def broadcast_to_browser(data: dict):
-    """ブラウザクライアントに一斉送信"""
-    global browser_clients
-    if browser_clients:
-        message = json.dumps(data, ensure_ascii=False)
-        dead_clients = set()
-        
-        for client in browser_clients:
-            try:
-                await client.send(message)
-            except websockets.exceptions.ConnectionClosed:
-                dead_clients.add(client)
-            except Exception as e:
-                logging.error(f"[ブラウザ送信エラー] {e}")
-                dead_clients.add(client)
-        
-        # 切断クライアント削除
-        browser_clients -= dead_clients
+    """ブラウザクライアントに一斉送信（各クライアントの送信キューに積むだけで待たない）"""
+    # 音量はティックごとの animation_frame にまとめる
+    if data.get("action") == "volume_level" and data.get("character"):
+        frame_batcher.update(data["character"], data.get("level"))
+        return
+
+    # 状態が変わらない表情・ポーズ・衣装変更は送らない
+    if scene_state.apply(data) is False:
+        logging.debug(f"[状態] 変化なしのため送信省略: {data.get('action')}")
+        return
+
+    # 口パクより後に出たメッセージが先に届かないよう未送信フレームを先に送る
+    frame_batcher.flush()
+    browser_hub.broadcast(data)
+
+def get_timeline_status():
+    """スナップショット用のタイムライン進行状況"""
+    if not timeline_executor:
+        return None
+    status = timeline_executor.get_status()
+    return {
+        "current_action": status.get("current_action"),
+        "elapsed_time": status.get("elapsed_time"),
+    }
 
 async def broadcast_to_obs_control(data: dict):
     """OBS制御クライアントに一斉送信"""
-    global obs_control_clients
-    if obs_control_clients:
-        message = json.dumps(data, ensure_ascii=False)
-        dead_clients = set()
-        
-        for client in obs_control_clients:
-            try:
-                await client.send(message)
-            except websockets.exceptions.ConnectionClosed:
-                dead_clients.add(client)
-            except Exception as e:
-                logging.error(f"[OBS制御送信エラー] {e}")
-                dead_clients.add(client)
-        
-        # 切断クライアント削除
-        obs_control_clients -= dead_clients
+    obs_control_hub.broadcast(data)
 
 async def process_obs_control_command(data):
     """OBS制御コマンド処理"""
@@ -162,7 +176,8 @@ async def process_obs_control_command(data):
         scene_name = data.get("scene_name")
         logging.info(f"[OBS] シーン切り替え要求: {scene_name}")
         if obs_controller:
-            await obs_controller.change_scene(scene_name)
+            await obs_controller.switch_scene(scene_name)
+        scene_state.set_scene(scene_name)
     elif action == "start_zundamon_session":
         # ずんだもんセッション開始
         logging.info("[OBS] ずんだもんセッション開始")
@@ -175,13 +190,18 @@ async def process_obs_control_command(data):
         # ずんだもん制御コマンドをブラウザに転送
         control_data = data.get("control_data", {})
         await broadcast_to_browser(control_data)
+    elif action == "comment_interrupt":
+        await handle_comment_interrupt(data)
     else:
         logging.warning(f"[OBS制御] 未知のコマンド: {action}")
 
-async def handle_speech_request(text: str, is_comment=False, use_prepared=False, character="zundamon"):
-    """音声合成要求処理（キャラクター対応）"""
+async def handle_speech_request(text: str, is_comment=False, character="zundamon", audio_file=None, on_audio_start=None):
+    """音声合成要求処理（キャラクター対応）
+
+    audio_file を渡すと合成済みの音声をそのまま再生する。on_audio_start は再生開始時に呼ばれる。
+    """
     global voicevox, audio_analyzer, plugin_manager, volume_queue
-    global current_speech_task, is_speaking, speech_lock, prepared_audio
+    global current_speech_task, is_speaking, speech_lock
 
     async with speech_lock:
         logging.info(f"[音声合成] テキスト: {text}, キャラクター: {character}, コメント: {is_comment}")
@@ -196,17 +216,12 @@ async def handle_speech_request(text: str, is_comment=False, use_prepared=False,
             if plugin_manager:
                 await plugin_manager.execute_hook('on_speech_start', text)
 
-            # キャラクター別の音声ID設定
-            if character == "metan":
-                voice_id = 2  # 四国めたん
-            else:
-                voice_id = 3  # ずんだもん（デフォルト）
-
             # 準備済み音声を使用するか、新規生成するか
-            if use_prepared and prepared_audio:
-                audio_file = prepared_audio
+            if audio_file:
                 logging.info(f"[音声合成] 準備済み音声使用: {audio_file}")
             else:
+                # キャラクター別の音声ID設定（設定ファイルの characters.*.voice_id）
+                voice_id = voicevox.speaker_id_for(character)
                 audio_file = await voicevox.synthesize_speech(text, speaker_id=voice_id)
                 logging.info(f"[音声合成] 新規生成: {audio_file} (キャラ: {character})")
 
@@ -217,6 +232,8 @@ async def handle_speech_request(text: str, is_comment=False, use_prepared=False,
                     "text": text,
                     "character": character
                 })
+                if on_audio_start:
+                    on_audio_start()
 
                 if audio_analyzer:
                     current_speech_task = asyncio.create_task(
@@ -246,10 +263,25 @@ async def play_audio_async(audio_file: str, text: str, is_comment: bool, charact
     global audio_analyzer, volume_queue, is_speaking
     global current_audio_player, current_audio_thread
 
+    loop = asyncio.get_running_loop()
+    playback_done = loop.create_future()
+    player = None
+
+    def post_to_loop(callback, *args):
+        """音声スレッドからイベントループへ安全に受け渡す"""
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass  # ループ終了後は破棄
+
+    def mark_done():
+        if not playback_done.done():
+            playback_done.set_result(None)
+
     try:
-        # キャラクター情報を含むvolume_callbackを作成
+        # キャラクター情報を含むvolume_callbackを作成（音声スレッドで呼ばれる）
         def volume_callback(level):
-            volume_queue.put({"character": character, "level": level})
+            post_to_loop(volume_queue.put_nowait, {"character": character, "level": level})
 
         # AudioPlayerを直接作成（キャラクター別コールバック）
         from server.audio_analyzer import AudioPlayer
@@ -258,130 +290,107 @@ async def play_audio_async(audio_file: str, text: str, is_comment: bool, charact
 
         logging.info(f"[音声再生] 開始: {text[:30]}... (キャラ: {character})")
 
-        # play_asyncで非ブロッキング再生開始
-        current_audio_thread = player.play_async(audio_file)
+        # play_asyncで非ブロッキング再生開始、完了はFutureで通知
+        current_audio_thread = player.play_async(
+            audio_file,
+            on_finished=lambda: post_to_loop(mark_done)
+        )
 
         # 再生完了まで待機（割り込み可能）
-        # スレッドが生きている間は待つ
-        while current_audio_thread and current_audio_thread.is_alive():
-            await asyncio.sleep(0.05)
+        await playback_done
 
         # コールバックを無効化
         player.volume_callback = None
 
-        # 音声終了処理
-        await asyncio.sleep(0.1)  # 最後のvolume_levelが処理されるのを待つ
-        volume_queue.put({"character": character, "level": "END"})
+        # 音声終了処理（call_soon_threadsafeはFIFOのため最後のvolume_levelより後ろに並ぶ）
+        volume_queue.put_nowait({"character": character, "level": "END"})
         logging.info(f"[音声再生] 完了: {text[:20]}... (キャラ: {character})")
 
-        # コメント応答完了時に次のキューを処理
-        if is_comment:
-            await process_next_comment_queue()
-
+    except asyncio.CancelledError:
+        # 割り込みでキャンセルされた場合は再生スレッドも止める
+        if player:
+            player.volume_callback = None
+            player.stop()
+        volume_queue.put_nowait({"character": character, "level": "END"})
+        raise
     except Exception as e:
         logging.error(f"[音声再生] エラー: {e}")
-        volume_queue.put({"character": character, "level": "END"})
+        volume_queue.put_nowait({"character": character, "level": "END"})
     finally:
         current_audio_player = None
         current_audio_thread = None
         is_speaking = False
 
 async def handle_comment_interrupt(data):
-    """コメント割り込み処理（新実装）"""
-    global plugin_manager, comment_queue, prepared_audio, is_speaking
-    global current_audio_player, timeline_position
-
-    logging.info(f"[コメント] 割り込み: {data}")
-
-    try:
-        if plugin_manager:
-            await plugin_manager.execute_hook('on_comment_received', data)
-
-        username = data.get("username", "名無しさん")
-        comment_text = data.get("text", "")
-
-        # タイムライン読み上げ中の場合は即座に停止
-        if is_speaking and current_audio_player:
-            logging.info("[コメント] タイムライン読み上げを停止します")
-
-            # タイムライン位置を記録（現在は簡易実装）
-            timeline_position = time.time()
-
-            # 音声を即座に停止
-            current_audio_player.stop()
-            logging.info(f"[コメント] 音声停止完了 - 位置記録: {timeline_position}")
-
-        # 四国めたんに「質問がきたわよ」と言わせる
-        metan_text = "質問がきたわよ"
-        await handle_speech_request(metan_text, is_comment=False, character="metan")
-
-        # 少し間を置いてからずんだもんの応答
-        await asyncio.sleep(0.5)
-
-        # ずんだもんの応答
-        zundamon_response = f"{username}さん、コメントありがとうなのだ！"
-        await handle_speech_request(zundamon_response, is_comment=True, character="zundamon")
-
-        if plugin_manager:
-            await plugin_manager.execute_hook('on_comment_response', zundamon_response)
-
-    except Exception as e:
-        logging.error(f"コメント処理エラー: {e}")
+    """コメント受付（キューに積むだけで、応答は comment_pipeline が1件ずつ行う）"""
+    logging.info(f"[コメント] 受信: {data}")
 
-async def prepare_next_audio():
-    """次の音声を事前準備"""
-    global comment_queue, prepared_audio, voicevox
-
-    if comment_queue and not prepared_audio:
-        next_text = comment_queue[0]
-        logging.info(f"[音声準備] 開始: {next_text[:20]}...")
-
-        try:
-            prepared_audio = await voicevox.synthesize_speech(next_text)
-            logging.info(f"[音声準備] 完了: {prepared_audio}")
-        except Exception as e:
-            logging.error(f"[音声準備] エラー: {e}")
-
-async def process_next_comment_queue():
-    """次のコメントキューを処理"""
-    global comment_queue, prepared_audio, speech_lock
-
-    async with speech_lock:
-        if comment_queue:
-            # 完了したコメントをキューから削除
-            completed_text = comment_queue.pop(0)
-            logging.info(f"[コメントキュー] 完了: {completed_text[:20]}...")
-
-            # 準備済み音声をクリア
-            prepared_audio = None
-
-            # 次のコメントがある場合
-            if comment_queue:
-                next_text = comment_queue[0]
-
-                # 準備済み音声があるかチェック
-                has_prepared = prepared_audio is not None
+    if plugin_manager:
+        await plugin_manager.execute_hook('on_comment_received', data)
+
+    if comment_queue.put(data):
+        logging.info(f"[コメント] キュー: {len(comment_queue)}件待ち")
+
+def compose_comment_reply(entry):
+    """コメント1件への応答（キャラクター, セリフ, コメント応答か, 後の間, テンプレート）の並び"""
+    template = comment_handler.choose_template(entry.text, entry.matches)
+    return [
+        # 四国めたんに「質問がきたわよ」と言わせ、少し間を置いてからずんだもんの応答
+        ("metan", "質問がきたわよ", False, 0.5, None),
+        ("zundamon", template.format(username=entry.username), True, 0.0, template),
+    ]
 
-                if has_prepared:
-                    logging.info(f"[コメントキュー] 準備済み音声で即座再生: {next_text[:20]}...")
-                    await handle_speech_request(next_text, is_comment=True, use_prepared=True)
-                else:
-                    # 準備済み音声がない場合は新規生成
-                    logging.info(f"[コメントキュー] 新規生成で再生: {next_text[:20]}...")
-                    await handle_speech_request(next_text, is_comment=True, use_prepared=False)
+async def synthesize_reply_segment(entry, character, text, template):
+    """テンプレートの応答は合成済みの固定部分にユーザー名をつなぎ、できなければ全文を合成"""
+    if template and response_bank:
+        audio_file = await response_bank.render(template, entry.username, character)
+        if audio_file:
+            return audio_file
+    return await voicevox.synthesize_speech(text, speaker_id=voicevox.speaker_id_for(character))
+
+async def prepare_comment_reply(entry):
+    """応答文を作って音声をまとめて合成しておく（前の応答の再生中に呼ばれる）"""
+    segments = compose_comment_reply(entry)
+    audio_files = await asyncio.gather(*(
+        synthesize_reply_segment(entry, character, text, template)
+        for character, text, _, _, template in segments
+    ))
+    # 合成に失敗したセリフは再生時に合成し直す（audio_file=None）
+    return [segment + (audio_file,) for segment, audio_file in zip(segments, audio_files)]
+
+async def play_comment_reply(entry, reply, on_start):
+    """準備済みの応答を再生"""
+    global timeline_position
+
+    # タイムライン読み上げ中の場合は即座に停止
+    if is_speaking and current_audio_player:
+        logging.info("[コメント] タイムライン読み上げを停止します")
+
+        # タイムライン位置を記録（現在は簡易実装）
+        timeline_position = time.time()
+
+        # 音声を即座に停止
+        current_audio_player.stop()
+        logging.info(f"[コメント] 音声停止完了 - 位置記録: {timeline_position}")
+
+    for character, text, is_comment, pause, _, audio_file in reply:
+        await handle_speech_request(
+            text, is_comment=is_comment, character=character, audio_file=audio_file, on_audio_start=on_start
+        )
+        if pause:
+            await asyncio.sleep(pause)
 
-                # さらに次があれば準備開始
-                if len(comment_queue) > 1:
-                    await prepare_next_audio()
+    if plugin_manager:
+        await plugin_manager.execute_hook('on_comment_response', reply[-1][1])
 
 async def volume_queue_processor():
     """音量キュー処理（キャラクター対応）"""
     global volume_queue, plugin_manager
 
     while True:
+        # アイドル時はここで待機し続ける（ポーリングなし）
+        volume_data = await volume_queue.get()
         try:
-            volume_data = volume_queue.get_nowait()
-
             # 辞書形式のキャラクター付きデータ
             if isinstance(volume_data, dict):
                 character = volume_data.get("character", "zundamon")
@@ -410,8 +419,6 @@ async def volume_queue_processor():
                     "action": "volume_level",
                     "level": volume_data
                 })
-        except queue.Empty:
-            await asyncio.sleep(0.01)
         except Exception as e:
             logging.error(f"音量キュー処理エラー: {e}")
 
@@ -431,10 +438,10 @@ async def handle_get_projects(websocket):
                 projects.append(item.name)
                 logging.info(f"[タイムライン] プロジェクト追加: {item.name}")
 
-    await websocket.send(json.dumps({
+    browser_hub.send_to(websocket, {
         "action": "projects_list",
         "projects": projects
-    }, ensure_ascii=False))
+    })
     logging.info(f"[タイムライン] プロジェクト一覧送信: {projects}")
 
 async def handle_timeline_action(action_data):
@@ -513,19 +520,34 @@ async def idle_animation_loop():
     tasks = [blink_loop(char, i * 2) for i, char in enumerate(characters)]
     await asyncio.gather(*tasks)
 
-class CustomHTTPRequestHandler(SimpleHTTPRequestHandler):
-    def __init__(self, *args, **kwargs):
-        project_root = Path(__file__).parent.parent
-        super().__init__(*args, directory=str(project_root), **kwargs)
-    
-    def log_message(self, format, *args):
-        logging.info(f"[HTTP] {format % args}")
-
-def start_http_server(port):
-    """HTTPサーバー起動"""
-    server = HTTPServer(('localhost', port), CustomHTTPRequestHandler)
+async def handle_asset_manifest(request):
+    """立ち絵アセットのマニフェスト（ファイルに変更がなければキャッシュ済みのものを返す）"""
+    loop = asyncio.get_running_loop()
+    body, etag = await loop.run_in_executor(None, asset_index.get_body)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in {tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")}:
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, content_type="application/json", headers=headers)
+
+async def handle_comment_metrics(request):
+    """コメントキューの深さ・待ち時間と、応答パイプラインの最初の音声までの時間"""
+    metrics = comment_queue.metrics()
+    if comment_pipeline:
+        metrics["pipeline"] = comment_pipeline.metrics()
+    if response_bank:
+        metrics["response_bank"] = response_bank.metrics()
+    return web.json_response(metrics)
+
+async def start_http_server(config):
+    """HTTPサーバー起動（静的ファイル配信、イベントループ上で動作）"""
+    global asset_index
+    port = config["servers"]["http_port"]
+    asset_index = AssetIndex(config, project_root)
+    static_server = await start_static_server(
+        project_root, "localhost", port, config, routes={"/api/assets": handle_asset_manifest, "/api/comments": handle_comment_metrics}
+    )
     logging.info(f"✅ HTTPサーバー起動: http://localhost:{port}")
-    server.serve_forever()
+    return static_server
 
 async def start_websocket_servers(config):
     """WebSocketサーバー起動"""
@@ -533,7 +555,10 @@ async def start_websocket_servers(config):
     browser_server = await websockets.serve(
         browser_handler, 
         "localhost", 
-        browser_port
+        browser_port,
+        # 口パク用バイナリフレームはクライアントが要求した場合のみ使用
+        subprotocols=[anim_protocol.ANIMATION_SUBPROTOCOL],
+        select_subprotocol=anim_protocol.select_subprotocol
     )
     logging.info(f"✅ ブラウザ用WebSocket: ws://localhost:{browser_port}")
     
@@ -560,7 +585,12 @@ async def initialize_system(config):
     audio_analyzer = AudioAnalyzer(config)
     logging.info("✅ 音声分析システム初期化")
     
-    obs_controller = OBSController(config)
+    obs_controller = AsyncOBSController(config)
+    if config.get("automation", {}).get("auto_obs_connect", True):
+        if await obs_controller.connect():
+            logging.info("✅ OBS WebSocket接続確認")
+        else:
+            logging.warning("⚠️ OBS WebSocket接続失敗")
     logging.info("✅ OBSコントローラー初期化")
     
     plugin_manager = PluginManager(config)
@@ -569,27 +599,75 @@ async def initialize_system(config):
     
     if plugin_manager:
         await plugin_manager.execute_hook('on_system_start')
+    plugins_ready.set()
+
+async def build_sprite_atlases(config):
+    """立ち絵アトラスをバックグラウンドで生成（元PNGに変更がなければ既存のものを使う）"""
+    atlas_config = config.get("atlas", {})
+    if not (atlas_config.get("enabled", True) and atlas_config.get("build_on_start", True)):
+        return
+    try:
+        from server.sprite_atlas import build_from_config
+        await asyncio.get_running_loop().run_in_executor(None, build_from_config, config, project_root)
+    except Exception as e:
+        logging.error(f"アトラス生成エラー: {e}")
+
+async def build_preset_composites(config):
+    """プリセット別の立ち絵合成をバックグラウンドで生成（元PNG・プリセットに変更がなければ既存のものを使う）"""
+    composite_config = config.get("composite", {})
+    if not (composite_config.get("enabled", True) and composite_config.get("build_on_start", True)):
+        return
+    try:
+        from server.preset_compositor import build_from_config
+        await asyncio.get_running_loop().run_in_executor(None, build_from_config, config, project_root)
+    except Exception as e:
+        logging.error(f"プリセット合成エラー: {e}")
+
+async def warm_response_bank(config):
+    """応答テンプレートの固定部分と常連のユーザー名をバックグラウンドで合成しておく"""
+    global response_bank
+    bank_config = config.get("response_bank", {})
+    if not bank_config.get("enabled", True):
+        return
+    try:
+        from server.response_bank import ResponseBank
+        response_bank = ResponseBank(voicevox, comment_handler.response_templates)
+        response_bank.apply_config(config)
+        if bank_config.get("warm_on_start", True):
+            await response_bank.warm()
+    except Exception as e:
+        logging.error(f"応答バンク準備エラー: {e}")
 
 async def main_server(config_param):
     """メインサーバー起動"""
-    global config
+    global config, comment_pipeline, comment_handler
     config = config_param
+    browser_hub.apply_config(config)
+    obs_control_hub.apply_config(config)
+    frame_batcher.apply_config(config)
+    scene_state.apply_config(config)
+    # キーワードはファイルの更新を検知して作り直す（再起動不要）
+    keyword_index = KeywordIndex(project_root / config.get("comments", {}).get("keywords_file", "config/keywords.json"))
+    comment_queue.apply_config(config)
+    comment_queue.keywords = keyword_index
+    comment_handler = CommentHandler(config, keywords=keyword_index)
+    comment_pipeline = CommentPipeline(comment_queue, prepare_comment_reply, play_comment_reply)
+    comment_pipeline.apply_config(config)
     await initialize_system(config)
     
-    http_port = config["servers"]["http_port"]
-    http_thread = threading.Thread(
-        target=start_http_server, 
-        args=(http_port,), 
-        daemon=True
-    )
-    http_thread.start()
+    await start_http_server(config)
     
     servers = await start_websocket_servers(config)
     
     logging.info("✅ すべてのサーバーが起動完了")
     
     await asyncio.gather(
+        build_sprite_atlases(config),
+        build_preset_composites(config),
+        warm_response_bank(config),
         volume_queue_processor(),
+        comment_pipeline.run(),
+        frame_batcher.run(),
         idle_animation_loop(),
         servers[0].wait_closed(),
         servers[1].wait_closed()
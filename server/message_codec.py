@@ -0,0 +1,80 @@
+"""
+送信メッセージのエンコード
+
+orjson / msgspec がインストールされていれば使い、なければ標準の json にフォールバックする。
+一斉送信では1メッセージにつき1回だけエンコードし、そのバイト列を全クライアントで共有する。
+"""
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    def _fast_dumps(data):
+        # 音量レベルは numpy.float64 のことがあるため numpy スカラーを許可
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    ENCODER_NAME = "orjson"
+except ImportError:
+    try:
+        import msgspec
+
+        def _enc_hook(obj):
+            # numpy スカラー等、float/int に変換できるものは変換
+            if hasattr(obj, "item"):
+                return obj.item()
+            raise NotImplementedError(f"エンコード不可: {type(obj)}")
+
+        _msgspec_encoder = msgspec.json.Encoder(enc_hook=_enc_hook)
+        _fast_dumps = _msgspec_encoder.encode
+        ENCODER_NAME = "msgspec"
+    except ImportError:
+        _fast_dumps = None
+        ENCODER_NAME = "json"
+
+
+def _std_dumps(data):
+    # orjson / msgspec と同じバイト列になるよう区切りの空白を入れない
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_std_default).encode("utf-8")
+
+
+def _std_default(obj):
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_json(data) -> bytes:
+    """JSONをUTF-8バイト列にエンコード"""
+    if _fast_dumps is not None:
+        try:
+            return _fast_dumps(data)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"[エンコード] {ENCODER_NAME}失敗、標準jsonにフォールバック: {e}")
+    return _std_dumps(data)
+
+
+class OutboundMessage:
+    """エンコード済み送信メッセージ（全クライアントで共有）"""
+
+    __slots__ = ("data", "_text")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self._text = None
+
+    @classmethod
+    def from_dict(cls, message: dict):
+        return cls(encode_json(message))
+
+    @property
+    def text(self) -> str:
+        """bytesのままテキストフレーム送信できない接続向けの文字列（初回のみデコード）"""
+        if self._text is None:
+            self._text = self.data.decode("utf-8")
+        return self._text
+
+    def __len__(self):
+        return len(self.data)
@@ -0,0 +1,228 @@
+"""
+obs-websocket v5 非同期クライアント
+
+asyncio上で1本の接続を保持し、Request / RequestBatch / Event を扱う。
+obs-websocket-py（同期）と違いイベントループをブロックしない。
+
+プロトコル: https://github.com/obsproject/obs-websocket/blob/master/docs/generated/protocol.md
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import uuid
+
+import websockets
+
+OBS_SUBPROTOCOL = "obswebsocket.json"
+RPC_VERSION = 1
+
+# OpCode
+OP_HELLO = 0
+OP_IDENTIFY = 1
+OP_IDENTIFIED = 2
+OP_EVENT = 5
+OP_REQUEST = 6
+OP_REQUEST_RESPONSE = 7
+OP_REQUEST_BATCH = 8
+OP_REQUEST_BATCH_RESPONSE = 9
+
+# EventSubscription（All = General〜Ui の全ビット）
+EVENT_SUBSCRIPTION_ALL = 0x7FF
+
+# RequestBatchExecutionType
+BATCH_SERIAL_REALTIME = 0
+BATCH_SERIAL_FRAME = 1
+BATCH_PARALLEL = 2
+
+
+class OBSWebSocketError(Exception):
+    """OBS WebSocket通信エラー"""
+
+
+class OBSRequestError(OBSWebSocketError):
+    """OBSがリクエストを失敗として返した"""
+
+    def __init__(self, request_type, code, comment=None):
+        self.request_type = request_type
+        self.code = code
+        self.comment = comment
+        super().__init__(f"{request_type} 失敗 (code={code}): {comment or ''}")
+
+
+def build_authentication(password: str, salt: str, challenge: str) -> str:
+    """Hello の authentication 情報から Identify 用の文字列を作る"""
+    secret = base64.b64encode(hashlib.sha256((password + salt).encode("utf-8")).digest()).decode("utf-8")
+    return base64.b64encode(hashlib.sha256((secret + challenge).encode("utf-8")).digest()).decode("utf-8")
+
+
+class AsyncOBSClient:
+    """obs-websocket v5 プロトコルの非同期クライアント"""
+
+    def __init__(self, host="localhost", port=4455, password="", request_timeout=10.0,
+                 event_subscriptions=EVENT_SUBSCRIPTION_ALL):
+        self.host = host
+        self.port = port
+        self.password = password or ""
+        self.request_timeout = request_timeout
+        self.event_subscriptions = event_subscriptions
+        self.ws = None
+        self.negotiated_rpc_version = None
+        self.receiver_task = None
+        self.pending = {}  # requestId -> Future
+        self.event_handlers = {}  # eventType -> [handler, ...]
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def is_connected(self):
+        return self.ws is not None
+
+    async def connect(self, timeout=None):
+        """接続して Hello → Identify → Identified まで完了させる"""
+        timeout = timeout or self.request_timeout
+        ws = await asyncio.wait_for(
+            websockets.connect(self.url, subprotocols=[OBS_SUBPROTOCOL], max_size=None),
+            timeout
+        )
+        try:
+            hello = json.loads(await asyncio.wait_for(ws.recv(), timeout))
+            if hello.get("op") != OP_HELLO:
+                raise OBSWebSocketError(f"Hello以外のメッセージを受信: op={hello.get('op')}")
+
+            identify = {
+                "rpcVersion": RPC_VERSION,
+                "eventSubscriptions": self.event_subscriptions,
+            }
+            auth = hello["d"].get("authentication")
+            if auth:
+                identify["authentication"] = build_authentication(self.password, auth["salt"], auth["challenge"])
+            await ws.send(json.dumps({"op": OP_IDENTIFY, "d": identify}))
+
+            identified = json.loads(await asyncio.wait_for(ws.recv(), timeout))
+            if identified.get("op") != OP_IDENTIFIED:
+                raise OBSWebSocketError(f"認証失敗: op={identified.get('op')}")
+            self.negotiated_rpc_version = identified["d"].get("negotiatedRpcVersion")
+        except BaseException:
+            await ws.close()
+            raise
+
+        self.ws = ws
+        self.receiver_task = asyncio.create_task(self._receive_loop(ws))
+        self.logger.info(f"OBS WebSocket(v5)接続完了: {self.host}:{self.port}")
+
+    async def disconnect(self):
+        """切断（応答待ちのリクエストは失敗させる）"""
+        ws, self.ws = self.ws, None
+        if ws:
+            await ws.close()
+        if self.receiver_task:
+            self.receiver_task.cancel()
+            try:
+                await self.receiver_task
+            except asyncio.CancelledError:
+                pass
+            self.receiver_task = None
+        self._fail_pending(OBSWebSocketError("OBS WebSocket切断"))
+
+    def on_event(self, event_type: str, handler):
+        """イベントハンドラー登録（handlerは event_data を受け取る。コルーチン関数も可）"""
+        self.event_handlers.setdefault(event_type, []).append(handler)
+
+    def remove_event_handler(self, event_type: str, handler):
+        handlers = self.event_handlers.get(event_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    async def call(self, request_type: str, request_data: dict = None):
+        """単一リクエストを送り responseData を返す（失敗時は OBSRequestError）"""
+        payload = {"requestType": request_type, "requestId": uuid.uuid4().hex}
+        if request_data:
+            payload["requestData"] = request_data
+        response = await self._send_and_wait(OP_REQUEST, payload)
+
+        status = response.get("requestStatus", {})
+        if not status.get("result"):
+            raise OBSRequestError(request_type, status.get("code"), status.get("comment"))
+        return response.get("responseData") or {}
+
+    async def call_batch(self, requests, halt_on_failure=False, execution_type=BATCH_SERIAL_REALTIME):
+        """複数リクエストを1往復で送る
+
+        Args:
+            requests: (requestType, requestData) のタプル、または requestType/requestData を持つdictのリスト
+
+        Returns:
+            各リクエストの結果dict（requestType, requestStatus, responseData）のリスト
+        """
+        batch = []
+        for request in requests:
+            if isinstance(request, dict):
+                request_type, request_data = request["requestType"], request.get("requestData")
+            else:
+                request_type, request_data = request
+            item = {"requestType": request_type}
+            if request_data:
+                item["requestData"] = request_data
+            batch.append(item)
+
+        payload = {
+            "requestId": uuid.uuid4().hex,
+            "haltOnFailure": halt_on_failure,
+            "executionType": execution_type,
+            "requests": batch,
+        }
+        response = await self._send_and_wait(OP_REQUEST_BATCH, payload)
+        return response.get("results", [])
+
+    async def _send_and_wait(self, op, payload):
+        if not self.ws:
+            raise OBSWebSocketError("OBS未接続")
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[payload["requestId"]] = future
+        try:
+            await self.ws.send(json.dumps({"op": op, "d": payload}, ensure_ascii=False))
+            return await asyncio.wait_for(future, self.request_timeout)
+        except asyncio.TimeoutError:
+            raise OBSWebSocketError(f"OBS応答タイムアウト: {payload.get('requestType', 'RequestBatch')}")
+        finally:
+            self.pending.pop(payload["requestId"], None)
+
+    async def _receive_loop(self, ws):
+        """応答とイベントの受信"""
+        try:
+            async for raw in ws:
+                message = json.loads(raw)
+                op = message.get("op")
+                data = message.get("d", {})
+                if op in (OP_REQUEST_RESPONSE, OP_REQUEST_BATCH_RESPONSE):
+                    future = self.pending.get(data.get("requestId"))
+                    if future and not future.done():
+                        future.set_result(data)
+                elif op == OP_EVENT:
+                    self._dispatch_event(data.get("eventType"), data.get("eventData") or {})
+        except websockets.exceptions.ConnectionClosed:
+            self.logger.warning("OBS WebSocket接続が閉じられました")
+        finally:
+            if self.ws is ws:
+                self.ws = None
+            self._fail_pending(OBSWebSocketError("OBS WebSocket切断"))
+
+    def _dispatch_event(self, event_type, event_data):
+        for handler in list(self.event_handlers.get(event_type, [])):
+            try:
+                result = handler(event_data)
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                self.logger.error(f"OBSイベント処理エラー[{event_type}]: {e}")
+
+    def _fail_pending(self, error):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self.pending.clear()
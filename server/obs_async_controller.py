@@ -0,0 +1,464 @@
+"""
+非同期OBSコントローラー
+
+OBSController と同じ操作をコルーチンで提供する（obs-websocket v5 を直接話す）。
+接続は1本を保持し、シーン作成＋メディア追加＋切り替え＋再生のような
+複数手順の操作は RequestBatch で1往復にまとめる。
+メディアの再生終了は MediaInputPlaybackEnded イベントで検知する。
+シーン一覧・現在シーン・シーンアイテムIDは OBSStateCache からメモリ参照する。
+
+テキスト・シーン・表示状態は最後に反映した値を覚えておき、変化のない要求は送らない。
+同じティック内に出た要求は1つの RequestBatch にまとめ、同じ入力への
+SetInputSettings や複数のシーン切り替えは1リクエストに統合する。
+"""
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from server.obs_async_client import AsyncOBSClient, OBSRequestError, OBSWebSocketError
+from server.obs_state_cache import OBSStateCache
+
+
+class AsyncOBSController:
+    def __init__(self, config):
+        self.config = config
+        self.logger = logging.getLogger(__name__)
+        self.host = config["servers"]["obs_websocket_host"]
+        self.port = config["servers"]["obs_websocket_port"]
+        self.password = config["servers"]["obs_password"]
+        self.obs_config = config.get("obs", {})
+        self.client = AsyncOBSClient(
+            self.host, self.port, self.password,
+            request_timeout=self.obs_config.get("request_timeout", 10.0)
+        )
+        # 再生終了イベントを取りこぼさないよう、再生要求の前に Future を用意しておく
+        self.media_end_futures = {}  # inputName -> Future
+        self.client.on_event("MediaInputPlaybackEnded", self._on_media_ended)
+        self.state = OBSStateCache(self.client)
+        self.applied_text = {}  # inputName -> 最後に反映したテキスト
+        self.media_files = {}  # inputName -> 最後に設定したメディアファイル
+        self.client.on_event("InputSettingsChanged", self._on_input_settings_changed)
+        # 同じティック内の要求をまとめて送るための待ち行列
+        self.pending_requests = {}  # key -> {"type", "data", "futures"}
+        self.flush_task = None
+        self.stats = {"sent": 0, "suppressed": 0, "merged": 0, "batches": 0}
+
+    async def connect(self):
+        """OBSに接続"""
+        try:
+            await self.client.connect()
+        except Exception as e:
+            self.logger.error(f"OBS WebSocket接続失敗: {e}")
+            return False
+        await self.state.load()
+        return True
+
+    async def disconnect(self):
+        """OBS接続切断"""
+        for future in self.media_end_futures.values():
+            future.cancel()
+        self.media_end_futures.clear()
+        self.state.clear()
+        self.applied_text.clear()
+        self.media_files.clear()
+        self.logger.info(f"OBSリクエスト統計: {self.get_stats()}")
+        if self.client.is_connected():
+            try:
+                await self.client.disconnect()
+                self.logger.info("OBS WebSocket切断")
+            except Exception as e:
+                self.logger.error(f"OBS WebSocket切断エラー: {e}")
+
+    def is_connected(self):
+        """接続状態確認"""
+        return self.client.is_connected()
+
+    def get_stats(self):
+        """送信・省略したリクエスト数"""
+        return dict(self.stats)
+
+    def _suppress(self, log_message):
+        self.stats["suppressed"] += 1
+        self.logger.debug(f"変化なしのため省略: {log_message}")
+        return True
+
+    def _submit(self, request_type, request_data, merge_key=None):
+        """要求を待ち行列に積み、同じティックの他の要求とまとめて送る
+
+        merge_key が同じ要求は1つに統合する（SetInputSettings は設定をマージ、それ以外は後勝ち）。
+        responseData で完了する Future を返す。
+        """
+        key = merge_key or object()
+        entry = self.pending_requests.get(key)
+        if entry:
+            self.stats["merged"] += 1
+            if request_type == "SetInputSettings":
+                entry["data"]["inputSettings"].update(request_data["inputSettings"])
+            else:
+                entry["data"] = request_data
+        else:
+            if request_type == "SetInputSettings":
+                request_data = {**request_data, "inputSettings": dict(request_data["inputSettings"])}
+            entry = {"type": request_type, "data": request_data, "futures": []}
+            self.pending_requests[key] = entry
+
+        future = asyncio.get_running_loop().create_future()
+        entry["futures"].append(future)
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush_requests())
+        return future
+
+    async def _flush_requests(self):
+        """待ち行列の要求を送る（1件なら Request、複数なら RequestBatch）"""
+        # 同じティックで発行された残りの要求が積まれるのを待つ
+        await asyncio.sleep(0)
+        entries = list(self.pending_requests.values())
+        self.pending_requests = {}
+        self.flush_task = None
+
+        try:
+            if len(entries) == 1:
+                entry = entries[0]
+                try:
+                    results = [{"requestStatus": {"result": True},
+                                "responseData": await self.client.call(entry["type"], entry["data"])}]
+                except OBSRequestError as e:
+                    results = [{"requestStatus": {"result": False, "code": e.code, "comment": e.comment}}]
+            else:
+                results = await self.client.call_batch([(entry["type"], entry["data"]) for entry in entries])
+                self.stats["batches"] += 1
+            self.stats["sent"] += len(entries)
+        except OBSWebSocketError as e:
+            for entry in entries:
+                for future in entry["futures"]:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for index, entry in enumerate(entries):
+            result = results[index] if index < len(results) else {
+                "requestStatus": {"result": False, "comment": "バッチ中断により未実行"}
+            }
+            status = result.get("requestStatus", {})
+            for future in entry["futures"]:
+                if future.done():
+                    continue
+                if status.get("result"):
+                    future.set_result(result.get("responseData") or {})
+                else:
+                    future.set_exception(OBSRequestError(entry["type"], status.get("code"), status.get("comment")))
+
+    async def _request(self, request_type, request_data, log_message, error_message, on_success=None, merge_key=None):
+        """単一リクエスト実行（成功でTrue。on_success には responseData を渡す）"""
+        if not self.client.is_connected():
+            self.logger.warning(f"OBS未接続 - {log_message}")
+            return False
+
+        try:
+            response = await self._submit(request_type, request_data, merge_key)
+            if on_success:
+                on_success(response)
+            self.logger.info(log_message)
+            return True
+        except OBSWebSocketError as e:
+            self.logger.error(f"{error_message}: {e}")
+            return False
+
+    async def create_scene(self, scene_name: str):
+        """新しいシーンを作成"""
+        return await self._request("CreateScene", {"sceneName": scene_name},
+                                   f"シーン作成: {scene_name}", "シーン作成エラー",
+                                   on_success=lambda _: self.state.add_scene(scene_name))
+
+    async def switch_scene(self, scene_name: str):
+        """シーンを切り替え（既に表示中なら送らない）"""
+        merge_key = ("SetCurrentProgramScene",)
+        if (self.state.loaded and self.state.current_scene == scene_name
+                and merge_key not in self.pending_requests):
+            return self._suppress(f"シーン切り替え: {scene_name}")
+        return await self._request("SetCurrentProgramScene", {"sceneName": scene_name},
+                                   f"シーン切り替え: {scene_name}", "シーン切り替えエラー",
+                                   on_success=lambda _: self.state.set_current_scene(scene_name),
+                                   merge_key=merge_key)
+
+    async def add_browser_source(self, scene_name: str, source_name: str, url: str, width: int = 1200, height: int = 800):
+        """ブラウザソースを追加"""
+        return await self._request("CreateInput", {
+            "sceneName": scene_name,
+            "inputName": source_name,
+            "inputKind": "browser_source",
+            "inputSettings": {"url": url, "width": width, "height": height}
+        }, f"ブラウザソース追加: {source_name} ({url})", "ブラウザソース追加エラー",
+           on_success=lambda response: self._record_scene_item(scene_name, source_name, response))
+
+    async def add_image_source(self, scene_name: str, source_name: str, file_path: str):
+        """画像ソースを追加"""
+        return await self._request("CreateInput", {
+            "sceneName": scene_name,
+            "inputName": source_name,
+            "inputKind": "image_source",
+            "inputSettings": {"file": file_path}
+        }, f"画像ソース追加: {source_name} ({file_path})", "画像ソース追加エラー",
+           on_success=lambda response: self._record_scene_item(scene_name, source_name, response))
+
+    async def update_text_source(self, source_name: str, text: str):
+        """テキストソースの内容更新（同じテキストなら送らない）"""
+        if self.client.is_connected() and self.applied_text.get(source_name) == text:
+            return self._suppress(f"テキスト更新: {source_name}")
+
+        # 同じティックの後続要求が重複判定できるよう先に記録する
+        self.applied_text[source_name] = text
+        ok = await self._request("SetInputSettings", {
+            "inputName": source_name,
+            "inputSettings": {"text": text}
+        }, f"テキスト更新: {source_name} = {text}", "テキスト更新エラー",
+            merge_key=("SetInputSettings", source_name))
+        if not ok and self.applied_text.get(source_name) == text:
+            del self.applied_text[source_name]
+        return ok
+
+    def _on_input_settings_changed(self, data):
+        settings = data.get("inputSettings") or {}
+        if "text" in settings:
+            self.applied_text[data.get("inputName")] = settings["text"]
+
+    def _record_scene_item(self, scene_name, source_name, response):
+        """CreateInput の結果をキャッシュに反映（イベント到着を待たない）"""
+        if response.get("sceneItemId") is not None:
+            self.state.add_scene_item(scene_name, source_name, response["sceneItemId"])
+
+    async def get_scene_item_id(self, scene_name: str, source_name: str):
+        """シーンアイテムID取得（キャッシュになければ問い合わせて記録）"""
+        item_id = self.state.scene_item_id(scene_name, source_name)
+        if item_id is None:
+            response = await self.client.call("GetSceneItemId", {"sceneName": scene_name, "sourceName": source_name})
+            item_id = response["sceneItemId"]
+            self.state.add_scene_item(scene_name, source_name, item_id)
+        return item_id
+
+    async def set_source_visibility(self, source_name: str, visible: bool, scene_name: str = None):
+        """ソースの表示/非表示切り替え（省略時は現在のシーン内のシーンアイテム）"""
+        if not self.client.is_connected():
+            self.logger.warning(f"OBS未接続 - 表示切替模擬: {source_name} = {visible}")
+            return False
+
+        try:
+            scene_name = scene_name or await self.get_current_scene()
+            if self.state.is_scene_item_enabled(scene_name, source_name) == visible:
+                return self._suppress(f"表示切替: {source_name} = {visible}")
+            item_id = await self.get_scene_item_id(scene_name, source_name)
+            await self._submit("SetSceneItemEnabled", {
+                "sceneName": scene_name,
+                "sceneItemId": item_id,
+                "sceneItemEnabled": visible
+            }, merge_key=("SetSceneItemEnabled", scene_name, item_id))
+            self.state.set_scene_item_enabled(scene_name, source_name, visible)
+            self.logger.info(f"表示切替: {source_name} = {visible}")
+            return True
+        except OBSWebSocketError as e:
+            self.logger.error(f"表示切替エラー: {e}")
+            return False
+
+    @staticmethod
+    def media_source_settings(file_path: str):
+        """メディアソース（ffmpeg_source）の設定"""
+        # 絶対パスに変換し、Windowsパスの場合はスラッシュに統一（OBS互換性）
+        normalized_path = os.path.abspath(file_path).replace('\\', '/')
+        return {
+            "local_file": normalized_path,
+            "looping": False,
+            "restart_on_activate": True,
+            "hw_decode": True,
+            "clear_on_media_end": False
+        }
+
+    async def add_media_source(self, scene_name: str, source_name: str, file_path: str):
+        """メディアソース（動画）を追加"""
+        settings = self.media_source_settings(file_path)
+        return await self._request("CreateInput", {
+            "sceneName": scene_name,
+            "inputName": source_name,
+            "inputKind": "ffmpeg_source",
+            "inputSettings": settings
+        }, f"メディアソース追加: {source_name} ({settings['local_file']})", "メディアソース追加エラー",
+           on_success=lambda response: self._record_scene_item(scene_name, source_name, response))
+
+    async def play_media_source(self, source_name: str):
+        """メディアソースを再生"""
+        self.expect_media_end(source_name)
+        return await self._request("TriggerMediaInputAction", {
+            "inputName": source_name,
+            "mediaAction": "OBS_WEBSOCKET_MEDIA_INPUT_ACTION_RESTART"
+        }, f"メディア再生: {source_name}", "メディア再生エラー")
+
+    async def prepare_media_scene(self, scene_name: str, source_name: str, file_path: str, switch=True, play=True):
+        """シーン作成・メディア追加・切り替え・再生を1回の RequestBatch で実行
+
+        既にシーンやソースがある場合の作成失敗は無視して後続を続ける。
+        キャッシュ上で作成済みのシーン・ソースは作成要求を省くので、switch=False, play=False で
+        先に読み込んでおけば、切り替え時は SetCurrentProgramScene と再生要求だけになる。
+        切り替え・再生が成功すればTrue。
+        """
+        if not self.client.is_connected():
+            self.logger.warning(f"OBS未接続 - メディアシーン準備模擬: {scene_name}/{source_name}")
+            return False
+
+        settings = self.media_source_settings(file_path)
+        requests = []
+        if not self.state.loaded or scene_name not in self.state.scenes:
+            requests.append(("CreateScene", {"sceneName": scene_name}))
+        if not self.state.loaded or self.state.scene_item_id(scene_name, source_name) is None:
+            requests.append(("CreateInput", {
+                "sceneName": scene_name,
+                "inputName": source_name,
+                "inputKind": "ffmpeg_source",
+                "inputSettings": settings
+            }))
+        elif self.media_files.get(source_name) != settings["local_file"]:
+            # 前回の配信から残っているソースはファイルだけ差し替える
+            requests.append(("SetInputSettings", {"inputName": source_name, "inputSettings": settings}))
+        if switch:
+            requests.append(("SetCurrentProgramScene", {"sceneName": scene_name}))
+        if play:
+            self.expect_media_end(source_name)
+            requests.append(("TriggerMediaInputAction", {
+                "inputName": source_name,
+                "mediaAction": "OBS_WEBSOCKET_MEDIA_INPUT_ACTION_RESTART"
+            }))
+        if not requests:
+            return True
+
+        try:
+            results = await self.client.call_batch(requests)
+            self.stats["sent"] += len(requests)
+            self.stats["batches"] += 1
+        except OBSWebSocketError as e:
+            self.logger.error(f"メディアシーン準備エラー: {e}")
+            return False
+
+        ok = True
+        for result in results:
+            status = result.get("requestStatus", {})
+            if status.get("result"):
+                request_type = result.get("requestType")
+                if request_type == "CreateScene":
+                    self.state.add_scene(scene_name)
+                elif request_type == "CreateInput":
+                    self._record_scene_item(scene_name, source_name, result.get("responseData") or {})
+                    self.media_files[source_name] = settings["local_file"]
+                elif request_type == "SetInputSettings":
+                    self.media_files[source_name] = settings["local_file"]
+                elif request_type == "SetCurrentProgramScene":
+                    self.state.set_current_scene(scene_name)
+                continue
+            if result.get("requestType") in ("CreateScene", "CreateInput"):
+                self.logger.debug(f"作成スキップ({result.get('requestType')}): {status.get('comment')}")
+            else:
+                ok = False
+                self.logger.error(f"{result.get('requestType')} 失敗: {status.get('comment')}")
+        self.logger.info(f"メディアシーン準備: {scene_name}/{source_name} ({settings['local_file']})")
+        return ok
+
+    async def get_media_duration(self, source_name: str) -> Optional[float]:
+        """メディアソースの再生時間を取得（秒）"""
+        if not self.client.is_connected():
+            return None
+
+        try:
+            response = await self.client.call("GetMediaInputStatus", {"inputName": source_name})
+            duration = response.get("mediaDuration")
+            self.logger.debug(f"メディア再生時間: {source_name} = {duration}ms")
+            return duration / 1000.0 if duration else None
+        except OBSWebSocketError as e:
+            self.logger.error(f"メディア時間取得エラー: {e}")
+            return None
+
+    def expect_media_end(self, source_name: str):
+        """source_name の次の再生終了で完了する Future を用意して返す（再生要求の前に呼ぶ）
+
+        前回の再生の終了で完了済みの Future は新しいものに置き換える。
+        """
+        future = self.media_end_futures.get(source_name)
+        if future is None or future.done():
+            future = asyncio.get_running_loop().create_future()
+            self.media_end_futures[source_name] = future
+        return future
+
+    def _on_media_ended(self, event_data):
+        # 待機が始まる前に終わった短いメディアでも取りこぼさないよう、完了した Future は
+        # wait_for_media_end が取り出すまで残す
+        future = self.media_end_futures.get(event_data.get("inputName"))
+        if future and not future.done():
+            future.set_result(True)
+
+    async def wait_for_media_end(self, source_name: str, timeout: float = None):
+        """メディアソースの再生終了（MediaInputPlaybackEnded）を待機
+
+        イベントを受け取った時点で戻る。イベントが来ない場合に備え、
+        再生時間が分かれば「再生時間＋猶予」、分からなければ timeout で打ち切る。
+        終了イベントを受け取ればTrue。
+        """
+        if not self.client.is_connected():
+            self.logger.warning(f"OBS未接続 - 待機模擬: {source_name}")
+            return False
+
+        if timeout is None:
+            timeout = self.obs_config.get("media_end_timeout", 600.0)
+        # 再生要求時に用意した Future（待機前に終了済みならそのまま返る）
+        future = self.media_end_futures.get(source_name) or self.expect_media_end(source_name)
+        if future.done() and not future.cancelled():
+            del self.media_end_futures[source_name]
+            self.logger.info(f"メディア再生終了済み: {source_name}")
+            return True
+        duration = await self.get_media_duration(source_name)
+        if duration:
+            timeout = min(timeout, duration + self.obs_config.get("media_end_grace", 2.0))
+            self.logger.info(f"メディア再生終了待機: {source_name} ({duration:.1f}秒)")
+        else:
+            self.logger.info(f"メディア再生終了待機: {source_name} (再生時間不明、最大{timeout:.0f}秒)")
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.logger.warning(f"メディア終了イベント未受信のため待機打ち切り: {source_name} ({timeout:.1f}秒)")
+            return False
+        except asyncio.CancelledError:
+            if future.cancelled():
+                # 切断で待機が取り消された
+                return False
+            raise
+        finally:
+            if self.media_end_futures.get(source_name) is future:
+                if not future.done():
+                    future.cancel()
+                del self.media_end_futures[source_name]
+
+    async def get_scene_list(self):
+        """シーン一覧取得（キャッシュ済みなら問い合わせなし）"""
+        if not self.client.is_connected():
+            return []
+        if self.state.loaded:
+            return list(self.state.scenes)
+
+        try:
+            response = await self.client.call("GetSceneList")
+            return [scene["sceneName"] for scene in response.get("scenes", [])]
+        except OBSWebSocketError as e:
+            self.logger.error(f"シーン一覧取得エラー: {e}")
+            return []
+
+    async def get_current_scene(self):
+        """現在のシーン取得（キャッシュ済みなら問い合わせなし）"""
+        if not self.client.is_connected():
+            return None
+        if self.state.loaded and self.state.current_scene:
+            return self.state.current_scene
+
+        try:
+            response = await self.client.call("GetCurrentProgramScene")
+            return response.get("currentProgramSceneName")
+        except OBSWebSocketError as e:
+            self.logger.error(f"現在シーン取得エラー: {e}")
+            return None
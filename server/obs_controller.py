@@ -1,13 +1,15 @@
 import logging
 import subprocess
+import threading
 import time
 import os
-import psutil
 from typing import Optional
 
+from server.process_discovery import shared_discovery
+
 try:
     import obswebsocket
-    from obswebsocket import obsws, requests
+    from obswebsocket import obsws, requests, events
     OBS_AVAILABLE = True
 except ImportError:
     OBS_AVAILABLE = False
@@ -21,44 +23,19 @@ class OBSController:
         self.port = config["servers"]["obs_websocket_port"]
         self.password = config["servers"]["obs_password"]
         self.obs_config = config.get("obs", {})
+        self.scene_item_ids = {}  # (sceneName, sourceName) -> sceneItemId
+        shared_discovery.apply_config(config)
         
         if not OBS_AVAILABLE:
             self.logger.warning("obs-websocket-py が見つかりません。OBS制御は無効です。")
     
     def is_obs_running(self):
-        """OBSプロセスが起動しているかチェック"""
-        try:
-            for proc in psutil.process_iter(['pid', 'name']):
-                if 'obs' in proc.info['name'].lower():
-                    self.logger.info(f"OBSプロセス発見: {proc.info['name']} (PID: {proc.info['pid']})")
-                    return True
-            return False
-        except Exception as e:
-            self.logger.error(f"OBSプロセス確認エラー: {e}")
-            return False
+        """OBSプロセスが起動しているかチェック（PIDキャッシュ利用）"""
+        pid = shared_discovery.find("obs")
+        if pid is not None:
+            self.logger.debug(f"OBSプロセス稼働中 (PID: {pid})")
+        return pid is not None
      
-    def start_obs(self):
-        """OBSを起動"""
-        obs_path = self.obs_config.get("executable_path", "")
-        
-        if not obs_path or not os.path.exists(obs_path):
-            self.logger.error(f"OBS実行ファイルが見つかりません: {obs_path}")
-            return False
-        
-        try:
-            self.logger.info(f"OBS起動中: {obs_path}")
-            subprocess.Popen([obs_path], shell=True)
-            
-            # 起動待機
-            startup_wait = self.obs_config.get("startup_wait", 10)
-            self.logger.info(f"OBS起動待機: {startup_wait}秒")
-            time.sleep(startup_wait)
-            
-            return True
-        except Exception as e:
-            self.logger.error(f"OBS起動エラー: {e}")
-            return False
-    
     def ensure_obs_ready(self):
         """OBSが準備完了状態になるまで確認"""
         retry_attempts = self.obs_config.get("retry_attempts", 3)
@@ -116,6 +93,7 @@ class OBSController:
                 self.logger.error(f"OBS WebSocket切断エラー: {e}")
             finally:
                 self.ws = None
+                self.scene_item_ids.clear()
 
     # 他の既存メソッドはそのまま...
     def is_connected(self):
@@ -222,7 +200,16 @@ class OBSController:
             return False
 
         try:
-            # TODO: 実装 - ソースID取得が必要
+            scene_name = self.ws.call(requests.GetCurrentProgramScene()).getCurrentProgramSceneName()
+            key = (scene_name, source_name)
+            if key not in self.scene_item_ids:
+                response = self.ws.call(requests.GetSceneItemId(sceneName=scene_name, sourceName=source_name))
+                self.scene_item_ids[key] = response.getSceneItemId()
+            self.ws.call(requests.SetSceneItemEnabled(
+                sceneName=scene_name,
+                sceneItemId=self.scene_item_ids[key],
+                sceneItemEnabled=visible
+            ))
             self.logger.info(f"表示切替: {source_name} = {visible}")
             return True
         except Exception as e:
@@ -294,24 +281,40 @@ class OBSController:
             return None
 
     def wait_for_media_end(self, source_name: str, timeout: float = 600.0):
-        """メディアソースの再生終了を待機"""
+        """メディアソースの再生終了（MediaInputPlaybackEnded）を待機
+
+        イベントを受け取った時点で戻る。再生時間が分かれば「再生時間＋猶予」で打ち切る。
+        """
         if not self.ws:
             self.logger.warning(f"OBS未接続 - 待機模擬: {source_name}")
             return False
 
+        ended = threading.Event()
+
+        def on_media_ended(event):
+            if event.datain.get("inputName") == source_name:
+                ended.set()
+
         try:
+            self.ws.register(on_media_ended, events.MediaInputPlaybackEnded)
             duration = self.get_media_duration(source_name)
             if duration:
-                self.logger.info(f"メディア再生待機: {source_name} ({duration:.1f}秒)")
-                time.sleep(min(duration, timeout))
-                return True
+                timeout = min(timeout, duration + self.obs_config.get("media_end_grace", 2.0))
+                self.logger.info(f"メディア再生終了待機: {source_name} ({duration:.1f}秒)")
             else:
-                self.logger.warning(f"メディア時間取得失敗。タイムアウト待機: {timeout}秒")
-                time.sleep(timeout)
-                return False
+                self.logger.warning(f"メディア時間取得失敗。終了イベントを最大{timeout}秒待機")
+            if ended.wait(timeout):
+                return True
+            self.logger.warning(f"メディア終了イベント未受信のため待機打ち切り: {source_name}")
+            return False
         except Exception as e:
             self.logger.error(f"メディア待機エラー: {e}")
             return False
+        finally:
+            try:
+                self.ws.unregister(on_media_ended, events.MediaInputPlaybackEnded)
+            except Exception:
+                pass
     
     def get_scene_list(self):
         """シーン一覧取得"""
@@ -349,22 +352,11 @@ class OBSController:
             "obs.exe"     # PATH環境変数から
         ]
         
-        for path in possible_paths:
-            if path.endswith('.exe'):
-                if os.path.exists(path):
-                    self.logger.info(f"OBS実行ファイル発見: {path}")
-                    return path
-            else:
-                # PATH環境変数から検索
-                try:
-                    result = subprocess.run(['where', path], 
-                                        capture_output=True, text=True, shell=True)
-                    if result.returncode == 0:
-                        found_path = result.stdout.strip().split('\n')[0]
-                        self.logger.info(f"OBS実行ファイル発見(PATH): {found_path}")
-                        return found_path
-                except:
-                    continue
+        # フルパスは存在確認、ファイル名だけのものはPATHから検索（結果はキャッシュ）
+        found_path = shared_discovery.find_executable(possible_paths)
+        if found_path:
+            self.logger.info(f"OBS実行ファイル発見: {found_path}")
+            return found_path
         
         self.logger.error("OBS実行ファイルが見つかりません")
         return None
@@ -389,14 +381,21 @@ class OBSController:
             obs_dir = os.path.dirname(obs_path)
             
             # プロセス起動（作業ディレクトリ指定）
-            subprocess.Popen([obs_path], 
+            process = subprocess.Popen([obs_path], 
                             cwd=obs_dir,  # 作業ディレクトリ指定
                             shell=False)  # shell=Falseに変更
+            shared_discovery.remember("obs", process.pid)
             
-            # 起動待機
+            # OBS WebSocket が応答した時点で起動完了（startup_wait は最大待機時間）
+            from server.readiness import obs_websocket_probe, readiness_options, wait_until_ready
             startup_wait = self.obs_config.get("startup_wait", 15)
-            self.logger.info(f"OBS起動待機: {startup_wait}秒")
-            time.sleep(startup_wait)
+            self.logger.info(f"OBS起動待機（最大{startup_wait}秒）")
+            result, = wait_until_ready([obs_websocket_probe(self.config)], startup_wait,
+                                       **readiness_options(self.config))
+            if result.ready:
+                self.logger.info(f"OBS起動完了: {result.elapsed:.1f}秒")
+            else:
+                self.logger.warning(f"OBS WebSocket未応答のまま待機終了: {startup_wait}秒")
             
             return True
         except Exception as e:
@@ -0,0 +1,154 @@
+"""
+OBS状態キャッシュ
+
+接続時にシーン・入力・シーンアイテムIDを1度だけ読み込み、以降はOBSのイベントで更新する。
+シーン一覧・現在シーン・シーンアイテムIDの参照はOBSへの問い合わせなしでメモリから返す。
+"""
+import logging
+
+from server.obs_async_client import OBSWebSocketError
+
+
+class OBSStateCache:
+    def __init__(self, client):
+        self.client = client
+        self.loaded = False
+        self.scenes = []  # シーン名（GetSceneList の順）
+        self.current_scene = None
+        self.inputs = {}  # inputName -> inputKind
+        self.scene_items = {}  # sceneName -> {sourceName: {"id": sceneItemId, "enabled": bool}}
+        self.logger = logging.getLogger(__name__)
+
+        for event_type, handler in {
+            "CurrentProgramSceneChanged": self._on_current_scene_changed,
+            "SceneCreated": self._on_scene_created,
+            "SceneRemoved": self._on_scene_removed,
+            "SceneNameChanged": self._on_scene_name_changed,
+            "InputCreated": self._on_input_created,
+            "InputRemoved": self._on_input_removed,
+            "InputNameChanged": self._on_input_name_changed,
+            "SceneItemCreated": self._on_scene_item_created,
+            "SceneItemRemoved": self._on_scene_item_removed,
+            "SceneItemEnableStateChanged": self._on_scene_item_enable_state_changed,
+        }.items():
+            client.on_event(event_type, handler)
+
+    async def load(self):
+        """シーン・入力・シーンアイテムを読み込む（2往復）"""
+        try:
+            scene_list, input_list = await self.client.call_batch([
+                ("GetSceneList", None),
+                ("GetInputList", None),
+            ])
+            scene_data = scene_list.get("responseData") or {}
+            self.scenes = [scene["sceneName"] for scene in scene_data.get("scenes", [])]
+            self.current_scene = scene_data.get("currentProgramSceneName")
+            self.inputs = {
+                item["inputName"]: item.get("inputKind")
+                for item in (input_list.get("responseData") or {}).get("inputs", [])
+            }
+
+            self.scene_items = {}
+            if self.scenes:
+                results = await self.client.call_batch([
+                    ("GetSceneItemList", {"sceneName": scene_name}) for scene_name in self.scenes
+                ])
+                for scene_name, result in zip(self.scenes, results):
+                    items = (result.get("responseData") or {}).get("sceneItems", [])
+                    self.scene_items[scene_name] = {
+                        item["sourceName"]: {"id": item["sceneItemId"], "enabled": item.get("sceneItemEnabled", True)}
+                        for item in items
+                    }
+            self.loaded = True
+            self.logger.info(f"OBS状態読み込み: シーン{len(self.scenes)}件, 入力{len(self.inputs)}件")
+        except OBSWebSocketError as e:
+            self.loaded = False
+            self.logger.error(f"OBS状態読み込みエラー: {e}")
+        return self.loaded
+
+    def clear(self):
+        self.loaded = False
+        self.scenes = []
+        self.current_scene = None
+        self.inputs = {}
+        self.scene_items = {}
+
+    # --- 参照 ---
+
+    def scene_item_id(self, scene_name, source_name):
+        item = self.scene_items.get(scene_name, {}).get(source_name)
+        return item["id"] if item else None
+
+    def is_scene_item_enabled(self, scene_name, source_name):
+        item = self.scene_items.get(scene_name, {}).get(source_name)
+        return item["enabled"] if item else None
+
+    # --- 自分のリクエスト結果の反映（イベント到着前に参照されても正しいように） ---
+
+    def add_scene(self, scene_name):
+        if scene_name not in self.scenes:
+            self.scenes.append(scene_name)
+        self.scene_items.setdefault(scene_name, {})
+
+    def set_current_scene(self, scene_name):
+        self.current_scene = scene_name
+
+    def add_scene_item(self, scene_name, source_name, scene_item_id, enabled=True):
+        self.scene_items.setdefault(scene_name, {})[source_name] = {"id": scene_item_id, "enabled": enabled}
+
+    def set_scene_item_enabled(self, scene_name, source_name, enabled):
+        item = self.scene_items.get(scene_name, {}).get(source_name)
+        if item:
+            item["enabled"] = enabled
+
+    # --- イベント ---
+
+    def _on_current_scene_changed(self, data):
+        self.current_scene = data.get("sceneName")
+
+    def _on_scene_created(self, data):
+        if not data.get("isGroup"):
+            self.add_scene(data.get("sceneName"))
+
+    def _on_scene_removed(self, data):
+        scene_name = data.get("sceneName")
+        if scene_name in self.scenes:
+            self.scenes.remove(scene_name)
+        self.scene_items.pop(scene_name, None)
+
+    def _on_scene_name_changed(self, data):
+        old_name, new_name = data.get("oldSceneName"), data.get("sceneName")
+        self.scenes = [new_name if name == old_name else name for name in self.scenes]
+        if old_name in self.scene_items:
+            self.scene_items[new_name] = self.scene_items.pop(old_name)
+        if self.current_scene == old_name:
+            self.current_scene = new_name
+
+    def _on_input_created(self, data):
+        self.inputs[data.get("inputName")] = data.get("inputKind")
+
+    def _on_input_removed(self, data):
+        input_name = data.get("inputName")
+        self.inputs.pop(input_name, None)
+        for items in self.scene_items.values():
+            items.pop(input_name, None)
+
+    def _on_input_name_changed(self, data):
+        old_name, new_name = data.get("oldInputName"), data.get("inputName")
+        if old_name in self.inputs:
+            self.inputs[new_name] = self.inputs.pop(old_name)
+        for items in self.scene_items.values():
+            if old_name in items:
+                items[new_name] = items.pop(old_name)
+
+    def _on_scene_item_created(self, data):
+        self.add_scene_item(data.get("sceneName"), data.get("sourceName"), data.get("sceneItemId"))
+
+    def _on_scene_item_removed(self, data):
+        items = self.scene_items.get(data.get("sceneName"), {})
+        items.pop(data.get("sourceName"), None)
+
+    def _on_scene_item_enable_state_changed(self, data):
+        for item in self.scene_items.get(data.get("sceneName"), {}).values():
+            if item["id"] == data.get("sceneItemId"):
+                item["enabled"] = data.get("sceneItemEnabled")
@@ -0,0 +1,610 @@
+"""
+オフライン描画（OBSを使わずにタイムラインから収録用の映像を作る）
+
+タイムラインの各セリフを合成済み音声（VOICEVOX のキャッシュ）の音量エンベロープで口パクさせ、
+立ち絵レイヤーを NumPy のアルファブレンドで重ねて1フレームずつ出力する。
+
+- 体・衣装・腕は衣装×ポーズごとに合成した1枚（server/preset_compositor.py と同じレイヤー構成）
+- 目・眉・口は *_position.json の外接矩形で切り出したパーツ
+- 前のフレームから変わったレイヤーの範囲（ダーティ矩形）だけを背景から描き直す。
+  変化のないフレームは前のフレームをそのまま出す
+- 出力は ffmpeg への生フレームのパイプ、または連番PNG（変化のないフレームはハードリンク）
+
+セリフの開始時刻はタイムラインの time と、前のセリフの終了＋timeline.speech_end_wait の遅い方。
+音声がないセリフは「1文字0.15秒」で長さを見積もり、口は閉じたままにする。
+
+使い方:
+  python -m server.offline_renderer timeline.json -o show.mp4
+  python -m server.offline_renderer timeline.json --frames-dir ./frames
+  python -m server.offline_renderer timeline.json            # 出力せず描画速度だけ測る
+  python -m server.offline_renderer timeline.json -o show.mp4 --workers 8   # 並列描画（server/parallel_renderer.py）
+  python -m server.offline_renderer timeline.json -o show.mp4 --audio show.wav   # 音声も（server/audio_mixdown.py）
+"""
+import argparse
+import asyncio
+import logging
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from server.preset_compositor import build_stack, compose, load_presets, resolve_texture
+from server.wav_io import read_wav
+
+BLINK_DURATION = 0.15  # まばたきの長さ（オーバーレイと同じ 150ms）
+DIM_BRIGHTNESS = 0.5  # 話していないキャラクターの明るさ（オーバーレイのハイライトと同じ）
+SECONDS_PER_CHAR = 0.15  # 音声がないセリフの長さの見積もり
+
+
+class Sprite:
+    """出力画面上に配置済みのレイヤー（乗算済みRGBと 1-α を保持）"""
+
+    __slots__ = ("x", "y", "width", "height", "color", "transparency")
+
+    def __init__(self, image, x, y, brightness=1.0):
+        rgba = np.asarray(image.convert("RGBA"), dtype=np.float32) / 255.0
+        alpha = rgba[:, :, 3:4]
+        self.color = np.ascontiguousarray(rgba[:, :, :3] * alpha * brightness)
+        self.transparency = np.ascontiguousarray(1.0 - alpha)
+        self.x = x
+        self.y = y
+        self.height, self.width = rgba.shape[:2]
+
+    @classmethod
+    def from_arrays(cls, color, transparency, x, y):
+        """配列から作る（共有メモリ上の配列をコピーせずに使う）"""
+        sprite = cls.__new__(cls)
+        sprite.color = color
+        sprite.transparency = transparency
+        sprite.x = x
+        sprite.y = y
+        sprite.height, sprite.width = color.shape[:2]
+        return sprite
+
+    @property
+    def rect(self):
+        return (self.x, self.y, self.x + self.width, self.y + self.height)
+
+
+def place(image, offset, placement, brightness=1.0):
+    """キャンバス座標の画像を配置（拡大縮小・左右反転）して Sprite にする"""
+    scale = placement.get("scale", 1.0)
+    source_width = image.width
+    width = max(1, round(image.width * scale))
+    height = max(1, round(image.height * scale))
+    if (width, height) != image.size:
+        image = image.resize((width, height), Image.LANCZOS)
+    if placement.get("mirror"):
+        image = ImageOps.mirror(image)
+        left = placement.get("x", 0) - (offset[0] + source_width) * scale
+    else:
+        left = placement.get("x", 0) + offset[0] * scale
+    top = placement.get("y", 0) + offset[1] * scale
+    return Sprite(image, round(left), round(top), brightness)
+
+
+class CharacterRig:
+    """1キャラクター分のレイヤー（静的パーツの合成画像と、目・眉・口のパーツ）"""
+
+    def __init__(self, character_id, character_config, presets, entry, character_dir, placement):
+        self.character_id = character_id
+        self.presets = presets
+        self.assets = entry["assets"]
+        self.character_dir = Path(character_dir)
+        self.placement = placement
+        self.mouth = character_config.get("mouth", {})
+        self.stack, self.group_layers = build_stack(character_config.get("layers", []))
+        self.cache = {}  # (種類, キー, 明るさ) -> Sprite（None も保持）
+        self.logger = logging.getLogger(__name__)
+
+    def sprites(self, state, level=None, blinking=False, brightness=1.0):
+        """現在の状態で描くレイヤーを後ろから順に返す"""
+        expression = self.presets.get("expressions", {}).get(state.get("expression"), {})
+        result = []
+        for layer in self.stack:
+            if "group" in layer:
+                sprite = self.group_sprite(state.get("outfit"), state.get("pose"), layer["group"], brightness)
+            else:
+                name = self.live_texture(layer, expression, level, blinking)
+                sprite = self.part_sprite(name, brightness) if name else None
+            if sprite is not None:
+                result.append(sprite)
+        return result
+
+    def live_texture(self, layer, expression, level, blinking):
+        slot = layer["live"]
+        if blinking and "blink" in layer:
+            return layer["blink"]
+        if slot == "mouth" and level is not None:
+            # オーバーレイの口パクと同じしきい値
+            if level > self.mouth.get("threshold_open", 0.22) and self.mouth.get("open") in self.assets:
+                return self.mouth["open"]
+            if level > self.mouth.get("threshold_half_open", 0.15) and self.mouth.get("half_open") in self.assets:
+                return self.mouth["half_open"]
+            if self.mouth.get("closed") in self.assets:
+                return self.mouth["closed"]
+        value = expression.get(slot, layer.get("default"))
+        if value is None:
+            return None
+        return value if value in self.assets else layer.get("default")
+
+    def group_sprite(self, outfit, pose, group, brightness):
+        names = [resolve_texture(layer, self.presets, outfit, pose, self.assets) for layer in self.group_layers[group]]
+        files = tuple(self.assets[name]["file"] for name in names if name)
+        key = ("group", files, brightness)
+        if key not in self.cache:
+            image, offset = compose([self.character_dir / file for file in files])
+            self.cache[key] = place(image, offset, self.placement, brightness) if image else None
+        return self.cache[key]
+
+    def part_sprite(self, name, brightness):
+        key = ("part", name, brightness)
+        if key not in self.cache:
+            asset = self.assets.get(name)
+            if asset is None:
+                self.logger.warning(f"テクスチャなし[{self.character_id}]: {name}")
+                self.cache[key] = None
+                return None
+            with Image.open(self.character_dir / asset["file"]) as source:
+                image = source.convert("RGBA")
+            bbox = asset.get("bbox") or image.getchannel("A").getbbox()
+            self.cache[key] = place(image.crop(tuple(bbox)), bbox[:2], self.placement, brightness) if bbox else None
+        return self.cache[key]
+
+
+def intersect(a, b):
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[2], b[2]), min(a[3], b[3])
+    return (x0, y0, x1, y1) if x0 < x1 and y0 < y1 else None
+
+
+def merge_rects(rects):
+    """重なる矩形をまとめる（同じ画素を2回描き直さないように）"""
+    merged = []
+    for rect in rects:
+        while True:
+            for index, other in enumerate(merged):
+                if intersect(rect, other):
+                    rect = (min(rect[0], other[0]), min(rect[1], other[1]),
+                            max(rect[2], other[2]), max(rect[3], other[3]))
+                    del merged[index]
+                    break
+            else:
+                break
+        merged.append(rect)
+    return merged
+
+
+class FrameRenderer:
+    """背景の上にレイヤーを重ね、前のフレームから変わった範囲だけを描き直す"""
+
+    def __init__(self, width, height, background=(0, 0, 0)):
+        self.width = width
+        self.height = height
+        self.bounds = (0, 0, width, height)
+        if isinstance(background, (str, Path)):
+            with Image.open(background) as source:
+                image = source.convert("RGB").resize((width, height))
+            self.background = np.asarray(image, dtype=np.float32) / 255.0
+        else:
+            self.background = np.empty((height, width, 3), dtype=np.float32)
+            self.background[:] = np.array(background[:3], dtype=np.float32) / 255.0
+        self.canvas = self.background.copy()  # 描き直す範囲の作業領域
+        self.output = np.empty((height, width, 3), dtype=np.uint8)
+        self.previous = None
+        self.stats = {"frames": 0, "reused": 0, "dirty_pixels": 0}
+
+    def render(self, sprites, full=False):
+        """1フレーム描画して (RGB配列, 変化があったか) を返す（配列は次の呼び出しで上書きされる）"""
+        self.stats["frames"] += 1
+        if full or self.previous is None:
+            rects = [self.bounds]
+        else:
+            rects = self.dirty_rects(self.previous, sprites)
+        self.previous = list(sprites)
+        if not rects:
+            self.stats["reused"] += 1
+            return self.output, False
+
+        for rect in rects:
+            rect = intersect(rect, self.bounds)
+            if rect is None:
+                continue
+            x0, y0, x1, y1 = rect
+            region = self.canvas[y0:y1, x0:x1]
+            region[:] = self.background[y0:y1, x0:x1]
+            for sprite in sprites:
+                clip = intersect(rect, sprite.rect)
+                if clip is None:
+                    continue
+                sx0, sy0 = clip[0] - sprite.x, clip[1] - sprite.y
+                sx1, sy1 = clip[2] - sprite.x, clip[3] - sprite.y
+                target = self.canvas[clip[1]:clip[3], clip[0]:clip[2]]
+                target *= sprite.transparency[sy0:sy1, sx0:sx1]
+                target += sprite.color[sy0:sy1, sx0:sx1]
+            self.output[y0:y1, x0:x1] = region * 255.0 + 0.5
+            self.stats["dirty_pixels"] += (x1 - x0) * (y1 - y0)
+        return self.output, True
+
+    @staticmethod
+    def dirty_rects(previous, sprites):
+        if len(previous) == len(sprites):
+            changed = [(old, new) for old, new in zip(previous, sprites) if old is not new]
+            rects = [sprite.rect for pair in changed for sprite in pair]
+        else:
+            # レイヤー数が変わった（表示・非表示の切り替え）: 差分のレイヤーの範囲
+            old_ids = {id(sprite) for sprite in previous}
+            new_ids = {id(sprite) for sprite in sprites}
+            rects = [sprite.rect for sprite in previous if id(sprite) not in new_ids]
+            rects += [sprite.rect for sprite in sprites if id(sprite) not in old_ids]
+            if not rects:
+                rects = [sprite.rect for sprite in sprites]
+        return merge_rects(rects)
+
+
+def read_envelope(path, fps):
+    """WAVの音量エンベロープ（1フレームごとのRMS、オーバーレイと同じく ×3 して 0〜1）と長さ（秒）"""
+    samples, rate = read_wav(path)
+    duration = len(samples) / rate
+    if len(samples) == 0:
+        return np.zeros(0, dtype=np.float32), duration
+
+    samples_per_frame = rate / fps
+    starts = (np.arange(math.ceil(len(samples) / samples_per_frame)) * samples_per_frame).astype(np.int64)
+    sums = np.add.reduceat(samples * samples, starts)
+    lengths = np.diff(np.append(starts, len(samples)))
+    return np.minimum(np.sqrt(sums / lengths) * 3.0, 1.0), duration
+
+
+class Line:
+    """描画用に時刻を確定したセリフ"""
+
+    __slots__ = ("start", "end", "character", "action", "envelope", "audio_path")
+
+    def __init__(self, start, end, character, action, envelope, audio_path=None):
+        self.start = start
+        self.end = end
+        self.character = character
+        self.action = action
+        self.envelope = envelope
+        self.audio_path = audio_path
+
+
+def schedule_lines(timeline, audio_for, fps, speech_end_wait=1.0, serialize=True):
+    """タイムラインのセリフに開始・終了時刻を付ける（audio_for: action -> WAVのパス or None）
+
+    serialize: 前のセリフの終了＋speech_end_wait まで次のセリフを待たせる（ライブ配信と同じ）。
+    False ならタイムラインの time どおりに置く（重なりはそのまま）。
+    """
+    lines = []
+    available = 0.0
+    for action in sorted(timeline.get("timeline", []), key=lambda action: action.get("time", 0)):
+        if action.get("type", "zundamon") != "zundamon":
+            continue
+        start = float(action.get("time", 0))
+        if serialize:
+            start = max(start, available)
+        text = action.get("text", "")
+        envelope = None
+        duration = len(text) * SECONDS_PER_CHAR if text else 0.0
+        audio_path = audio_for(action) if text else None
+        if audio_path:
+            envelope, duration = read_envelope(audio_path, fps)
+        lines.append(Line(start, start + duration, action.get("character", "zundamon"), action, envelope, audio_path))
+        available = start + duration + (speech_end_wait if text else 0.0)
+    return lines
+
+
+def show_duration(lines, speech_end_wait=1.0):
+    """最後のセリフの終了＋speech_end_wait（映像・音声の長さ）"""
+    return max((line.end for line in lines), default=0.0) + speech_end_wait
+
+
+def blink_times(duration, index, seed=0):
+    """まばたきの開始時刻（サーバーの idle ループと同じく 2秒ずつずらして 4〜6秒おき）"""
+    rng = random.Random(seed * 1000 + index)
+    times = []
+    current = index * 2.0
+    while current < duration:
+        current += rng.uniform(4, 6)
+        times.append(current)
+    return times
+
+
+class OfflineRenderer:
+    """タイムライン → フレーム列"""
+
+    STATE_FIELDS = ("expression", "pose", "outfit", "blink")
+
+    def __init__(self, config, rigs, lines, fps=30, width=1200, height=800, background=(0, 0, 0), seed=0):
+        self.config = config
+        self.rigs = rigs
+        self.lines = lines
+        self.fps = fps
+        self.background = background
+        self.frame_renderer = FrameRenderer(width, height, background)
+        self.duration = show_duration(lines, config.get("timeline", {}).get("speech_end_wait", 1.0))
+        self.blinks = {
+            character_id: blink_times(self.duration, index, seed) for index, character_id in enumerate(rigs)
+        }
+
+    @property
+    def frame_count(self):
+        return math.ceil(self.duration * self.fps)
+
+    def initial_states(self):
+        states = {}
+        for character_id in self.rigs:
+            character = self.config.get("characters", {}).get(character_id, {})
+            states[character_id] = {
+                "expression": character.get("default_expression", "normal"),
+                "pose": character.get("default_pose", "basic"),
+                "outfit": character.get("default_outfit", "usual"),
+                "blink": True,
+            }
+        return states
+
+    def frames(self, limit=None):
+        """(フレーム番号, RGB配列, 変化があったか) を順に返す"""
+        frame_count = self.frame_count if limit is None else min(self.frame_count, limit)
+        for number, sprites in self.display_lists(0, frame_count):
+            output, changed = self.frame_renderer.render(sprites)
+            yield number, output, changed
+
+    def display_lists(self, start=0, end=None):
+        """(フレーム番号, 描くレイヤーの並び) を順に返す（途中のフレームからでも同じ結果になる）"""
+        states = self.initial_states()
+        blink_index = {character_id: 0 for character_id in self.rigs}
+        line_index = 0
+        end = self.frame_count if end is None else end
+        for number in range(start, end):
+            now = number / self.fps
+
+            # 開始時刻を過ぎたセリフの表情・ポーズ・衣装を反映
+            while line_index < len(self.lines) and self.lines[line_index].start <= now:
+                line = self.lines[line_index]
+                if line.character in states:
+                    for field in self.STATE_FIELDS:
+                        if field in line.action:
+                            states[line.character][field] = line.action[field]
+                line_index += 1
+            current = self.lines[line_index - 1] if line_index else None
+            speaking = current if current and now < current.end else None
+
+            sprites = []
+            for character_id, rig in self.rigs.items():
+                level = None
+                if speaking and speaking.character == character_id:
+                    level = 0.0
+                    if speaking.envelope is not None:
+                        frame_offset = int((now - speaking.start) * self.fps)
+                        if frame_offset < len(speaking.envelope):
+                            level = float(speaking.envelope[frame_offset])
+                brightness = DIM_BRIGHTNESS if speaking and speaking.character != character_id else 1.0
+                sprites.extend(rig.sprites(
+                    states[character_id], level, self.is_blinking(character_id, now, blink_index, states), brightness
+                ))
+            yield number, sprites
+
+    def line_start_frames(self):
+        """セリフの開始フレーム（前のセリフとの間は無音なので、ここで区切っても描画結果は変わらない）"""
+        return sorted({math.ceil(line.start * self.fps) for line in self.lines} - {0})
+
+    def is_blinking(self, character_id, now, blink_index, states):
+        times = self.blinks[character_id]
+        index = blink_index[character_id]
+        while index < len(times) and times[index] + BLINK_DURATION <= now:
+            index += 1
+        blink_index[character_id] = index
+        return bool(states[character_id].get("blink", True) and index < len(times) and times[index] <= now)
+
+
+class NullSink:
+    """描画速度の計測用（何も書き出さない）"""
+
+    def write(self, number, frame, changed):
+        pass
+
+    def close(self):
+        pass
+
+
+class ImageSequenceSink:
+    """連番PNG（変化のないフレームは前のファイルへのハードリンク）"""
+
+    def __init__(self, directory, compress_level=1):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.compress_level = compress_level
+        self.previous = None
+
+    def write(self, number, frame, changed):
+        path = self.directory / f"frame_{number:06d}.png"
+        if path.exists():
+            path.unlink()
+        if not changed and self.previous is not None:
+            try:
+                os.link(self.previous, path)
+            except OSError:
+                shutil.copyfile(self.previous, path)
+        else:
+            Image.fromarray(frame).save(path, compress_level=self.compress_level)
+        self.previous = path
+
+    def close(self):
+        pass
+
+
+class EncoderSink:
+    """ffmpeg 等のエンコーダーに生フレーム（rgb24）をパイプで渡す"""
+
+    def __init__(self, output, width, height, fps, encoder="ffmpeg", encoder_args=()):
+        if shutil.which(encoder) is None:
+            raise FileNotFoundError(f"エンコーダーが見つかりません: {encoder}")
+        command = [
+            encoder, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+            *encoder_args, str(output),
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, number, frame, changed):
+        self.process.stdin.write(frame.data)
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise RuntimeError(f"エンコーダーが異常終了しました (code {self.process.returncode})")
+
+
+def render(renderer, sink, limit=None, progress_interval=10.0):
+    """全フレームを描画して sink に書き出し、速度の統計を返す"""
+    logger = logging.getLogger(__name__)
+    started = time.perf_counter()
+    last_report = started
+    frames = 0
+    try:
+        for number, frame, changed in renderer.frames(limit):
+            sink.write(number, frame, changed)
+            frames += 1
+            now = time.perf_counter()
+            if now - last_report >= progress_interval:
+                logger.info(f"描画中: {frames}/{renderer.frame_count}フレーム ({frames / (now - started):.1f} fps)")
+                last_report = now
+    finally:
+        sink.close()
+    elapsed = time.perf_counter() - started
+    frame_renderer = renderer.frame_renderer
+    total_pixels = frames * frame_renderer.width * frame_renderer.height
+    return {
+        "frames": frames,
+        "video_seconds": frames / renderer.fps,
+        "elapsed": elapsed,
+        "fps": frames / elapsed if elapsed else 0.0,
+        "realtime": (frames / renderer.fps) / elapsed if elapsed else 0.0,
+        "reused_frames": frame_renderer.stats["reused"],
+        "dirty_ratio": frame_renderer.stats["dirty_pixels"] / total_pixels if total_pixels else 0.0,
+    }
+
+
+def print_report(stats):
+    print(f"[オフライン描画] {stats['frames']}フレーム（映像 {stats['video_seconds']:.1f}秒）を {stats['elapsed']:.1f}秒で描画")
+    print(f"   {stats['fps']:.1f} fps（実時間の {stats['realtime']:.1f}倍）")
+    print(f"   描き直した画素: {stats['dirty_ratio'] * 100:.2f}%  前フレーム再利用: {stats['reused_frames']}フレーム")
+
+
+def build_rigs(config, root):
+    """設定の characters.*.layers と AssetIndex のマニフェストから描画用のリグを作る"""
+    from server.asset_index import AssetIndex
+
+    root = Path(root)
+    render_config = config.get("render", {})
+    placements = render_config.get("characters", {})
+    presets = load_presets(root / "config" / "presets.json")
+    index = AssetIndex(config, root).get()
+    assets_dir = root / config.get("directories", {}).get("assets_dir", "./assets")
+
+    rigs = {}
+    for character_id, character in config.get("characters", {}).items():
+        entry = index["characters"].get(character_id)
+        if not character.get("layers") or not entry or character_id not in placements:
+            continue
+        rigs[character_id] = CharacterRig(
+            character_id, character, presets, entry, assets_dir / entry["dir"], placements[character_id]
+        )
+    return rigs
+
+
+def cached_audio_lookup(voicevox, synthesize=False):
+    """action -> 合成済みWAVのパス（synthesize なら未合成のものを VOICEVOX で合成）"""
+    def audio_for(action):
+        character = action.get("character", "zundamon")
+        speaker_id = voicevox.speaker_id_for(character)
+        path = voicevox.audio_path_for(action["text"], speaker_id)
+        if not path.exists() and synthesize:
+            result = asyncio.run(voicevox.synthesize_speech(action["text"], speaker_id=speaker_id))
+            return Path(result) if result else None
+        return path if path.exists() else None
+    return audio_for
+
+
+def main(argv=None):
+    import json
+
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+    from server.config_manager import ConfigManager
+    from server.voicevox_client import VoicevoxClient
+
+    config = ConfigManager().load_config()
+    render_config = config.get("render", {})
+
+    parser = argparse.ArgumentParser(description="タイムラインのオフライン描画")
+    parser.add_argument("timeline", help="タイムラインJSON")
+    parser.add_argument("-o", "--output", help="動画ファイル（エンコーダーにパイプで渡す）")
+    parser.add_argument("--frames-dir", help="連番PNGの出力先")
+    parser.add_argument("--fps", type=int, default=render_config.get("fps", 30))
+    parser.add_argument("--size", default=f"{render_config.get('width', 1200)}x{render_config.get('height', 800)}")
+    parser.add_argument("--limit", type=int, help="先頭から指定フレーム数だけ描画")
+    parser.add_argument("--synthesize", action="store_true", help="未合成のセリフを VOICEVOX で合成する")
+    parser.add_argument("--workers", type=int, default=render_config.get("workers", 0),
+                        help="並列描画のプロセス数（0: CPUコア数、1: 並列化しない）")
+    parser.add_argument("--audio", help="映像と同じタイミングの音声ミックスダウン（WAV）も書き出す")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    width, height = (int(value) for value in args.size.lower().split("x"))
+    with open(args.timeline, "r", encoding="utf-8") as f:
+        timeline = json.load(f)
+
+    rigs = build_rigs(config, project_root)
+    lines = schedule_lines(
+        timeline,
+        cached_audio_lookup(VoicevoxClient(config), args.synthesize),
+        args.fps,
+        config.get("timeline", {}).get("speech_end_wait", 1.0),
+    )
+    missing = sum(1 for line in lines if line.envelope is None and line.action.get("text"))
+    if missing:
+        logging.warning(f"音声がないセリフ: {missing}/{len(lines)}件（口パクなし・長さは文字数から見積もり）")
+
+    if args.audio:
+        from server.audio_mixdown import mix_from_config
+        from server.audio_mixdown import print_report as print_mix_report
+        speech_end_wait = config.get("timeline", {}).get("speech_end_wait", 1.0)
+        print_mix_report(mix_from_config(lines, args.audio, config, show_duration(lines, speech_end_wait)))
+
+    background = render_config.get("background_image") or render_config.get("background", [0, 0, 0])
+    renderer = OfflineRenderer(config, rigs, lines, args.fps, width, height, background, render_config.get("blink_seed", 0))
+    workers = args.workers or os.cpu_count() or 1
+    if workers > 1:
+        from server.parallel_renderer import print_worker_report, render_parallel
+        stats = render_parallel(
+            renderer, args.output, args.frames_dir, workers, args.limit,
+            render_config.get("encoder", "ffmpeg"), render_config.get("encoder_args", []),
+        )
+        print_report(stats)
+        print_worker_report(stats)
+        return
+
+    if args.output:
+        sink = EncoderSink(
+            args.output, width, height, args.fps,
+            render_config.get("encoder", "ffmpeg"), render_config.get("encoder_args", []),
+        )
+    elif args.frames_dir:
+        sink = ImageSequenceSink(args.frames_dir)
+    else:
+        sink = NullSink()
+    print_report(render(renderer, sink, args.limit))
+
+
+if __name__ == "__main__":
+    main()
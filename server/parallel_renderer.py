@@ -0,0 +1,252 @@
+"""
+オフライン描画の並列化（タイムラインをセグメントに分けて複数プロセスで描画）
+
+1. メインプロセスでタイムラインを最後まで進め、フレームごとに描くレイヤーの並びを決める（軽い）
+2. 使われるレイヤー（乗算済みRGB・1-α）を1つの共有メモリにまとめ、各ワーカーは読み取り専用の
+   ビューとして参照する（ワーカーごとに立ち絵を読み込み直したりコピーしたりしない）
+3. セリフの開始位置（直前は無音）でタイムラインを区切り、ProcessPoolExecutor で並列に描画する
+4. 連番PNGはそのまま通し番号で書き出し、動画はセグメントごとにエンコードして ffmpeg の concat で連結する
+
+各セグメントは最初のフレームを全面描画するので、区切り位置によらず1プロセスで描いた結果と同じになる。
+
+使い方:
+  python -m server.offline_renderer timeline.json -o show.mp4 --workers 8
+"""
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+
+from server.offline_renderer import EncoderSink, FrameRenderer, ImageSequenceSink, NullSink, Sprite
+
+SEGMENTS_PER_WORKER = 2  # 長さのばらつきを均すため、ワーカー数より多めに区切る
+
+
+class SharedLayers:
+    """全レイヤーの配列を1つの共有メモリに詰める（メインプロセス側）"""
+
+    def __init__(self, sprites):
+        self.table = []  # (x, y, 高さ, 幅, 共有メモリ上の位置)
+        size = sum(sprite.color.nbytes + sprite.transparency.nbytes for sprite in sprites)
+        self.memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        offset = 0
+        for sprite in sprites:
+            self.table.append((sprite.x, sprite.y, sprite.height, sprite.width, offset))
+            for array in (sprite.color, sprite.transparency):
+                view = np.ndarray(array.shape, dtype=np.float32, buffer=self.memory.buf, offset=offset)
+                view[:] = array
+                offset += array.nbytes
+        self.name = self.memory.name
+
+    def close(self):
+        self.memory.close()
+        self.memory.unlink()
+
+
+def attach_layers(memory, table):
+    """共有メモリ上の配列を読み取り専用の Sprite として参照（ワーカー側）"""
+    sprites = []
+    for x, y, height, width, offset in table:
+        color = np.ndarray((height, width, 3), dtype=np.float32, buffer=memory.buf, offset=offset)
+        transparency = np.ndarray(
+            (height, width, 1), dtype=np.float32, buffer=memory.buf, offset=offset + color.nbytes
+        )
+        color.flags.writeable = False
+        transparency.flags.writeable = False
+        sprites.append(Sprite.from_arrays(color, transparency, x, y))
+    return sprites
+
+
+def plan_frames(renderer, end):
+    """フレームごとのレイヤー番号の並びと、使われるレイヤーの一覧"""
+    sprites = []
+    indices = {}  # id(Sprite) -> 番号
+    plan = []
+    for _, frame_sprites in renderer.display_lists(0, end):
+        ids = []
+        for sprite in frame_sprites:
+            key = id(sprite)
+            if key not in indices:
+                indices[key] = len(sprites)
+                sprites.append(sprite)
+            ids.append(indices[key])
+        plan.append(tuple(ids))
+    return plan, sprites
+
+
+def run_length(plan):
+    """同じ並びが続くフレームをまとめる（ワーカーへ渡すデータを小さくする）"""
+    runs = []
+    for ids in plan:
+        if runs and runs[-1][0] == ids:
+            runs[-1][1] += 1
+        else:
+            runs.append([ids, 1])
+    return runs
+
+
+def split_segments(frame_count, boundaries, count):
+    """[開始, 終了) の区間に分ける（区切りは boundaries のうち均等割りの位置に最も近いもの）"""
+    if count <= 1 or not boundaries:
+        return [(0, frame_count)]
+    cuts = set()
+    for index in range(1, count):
+        target = frame_count * index / count
+        cuts.add(min(boundaries, key=lambda frame: abs(frame - target)))
+    edges = [0] + sorted(cut for cut in cuts if 0 < cut < frame_count) + [frame_count]
+    return list(zip(edges, edges[1:]))
+
+
+# --- ワーカー ---
+
+_worker = {}
+
+
+def _init_worker(memory_name, table, width, height, background):
+    memory = shared_memory.SharedMemory(name=memory_name)
+    _worker["memory"] = memory  # ワーカー終了まで保持
+    _worker["sprites"] = attach_layers(memory, table)
+    _worker["frame"] = (width, height, background)
+
+
+def _render_segment(index, start, runs, target):
+    width, height, background = _worker["frame"]
+    sprites = _worker["sprites"]
+    frame_renderer = FrameRenderer(width, height, background)
+    kind = target[0]
+    if kind == "frames":
+        sink = ImageSequenceSink(target[1])
+    elif kind == "encoder":
+        _, path, fps, encoder, encoder_args = target
+        sink = EncoderSink(path, width, height, fps, encoder, encoder_args)
+    else:
+        sink = NullSink()
+
+    started = time.perf_counter()
+    number = start
+    try:
+        for ids, repeat in runs:
+            frame_sprites = [sprites[i] for i in ids]
+            for _ in range(repeat):
+                frame, changed = frame_renderer.render(frame_sprites)
+                sink.write(number, frame, changed)
+                number += 1
+    finally:
+        sink.close()
+    return {
+        "segment": index,
+        "pid": os.getpid(),
+        "start": start,
+        "frames": number - start,
+        "elapsed": time.perf_counter() - started,
+        "reused": frame_renderer.stats["reused"],
+        "dirty_pixels": frame_renderer.stats["dirty_pixels"],
+    }
+
+
+def concat_segments(paths, output, encoder="ffmpeg"):
+    """セグメントの動画を再エンコードせずに連結"""
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8") as f:
+        for path in paths:
+            f.write(f"file '{Path(path).resolve().as_posix()}'\n")
+        list_path = f.name
+    try:
+        subprocess.run(
+            [encoder, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", str(output)],
+            check=True,
+        )
+    finally:
+        os.unlink(list_path)
+
+
+def render_parallel(renderer, output=None, frames_dir=None, workers=None, limit=None,
+                    encoder="ffmpeg", encoder_args=()):
+    """セグメントごとに並列描画して、全体とワーカーごとの統計を返す"""
+    logger = logging.getLogger(__name__)
+    workers = workers or os.cpu_count() or 1
+    frame_count = renderer.frame_count if limit is None else min(renderer.frame_count, limit)
+    started = time.perf_counter()
+
+    plan, sprites = plan_frames(renderer, frame_count)
+    boundaries = [frame for frame in renderer.line_start_frames() if frame < frame_count]
+    segments = split_segments(frame_count, boundaries, workers * SEGMENTS_PER_WORKER)
+    planned = time.perf_counter()
+    logger.info(f"並列描画: {frame_count}フレーム, レイヤー{len(sprites)}枚, {len(segments)}セグメント, {workers}プロセス")
+
+    segment_dir = None
+    if output:
+        if shutil.which(encoder) is None:
+            raise FileNotFoundError(f"エンコーダーが見つかりません: {encoder}")
+        segment_dir = Path(tempfile.mkdtemp(prefix="render_segments_"))
+
+    def target_for(index):
+        if output:
+            path = segment_dir / f"segment_{index:04d}{Path(output).suffix}"
+            return ("encoder", str(path), renderer.fps, encoder, list(encoder_args))
+        if frames_dir:
+            return ("frames", str(frames_dir))
+        return ("null",)
+
+    layers = SharedLayers(sprites)
+    frame_renderer = renderer.frame_renderer
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(layers.name, layers.table, frame_renderer.width, frame_renderer.height, renderer.background),
+        ) as executor:
+            futures = [
+                executor.submit(_render_segment, index, start, run_length(plan[start:end]), target_for(index))
+                for index, (start, end) in enumerate(segments)
+            ]
+            results = [future.result() for future in futures]
+        if output:
+            concat_segments([target_for(index)[1] for index in range(len(segments))], output, encoder)
+    finally:
+        layers.close()
+        if segment_dir:
+            shutil.rmtree(segment_dir, ignore_errors=True)
+
+    elapsed = time.perf_counter() - started
+    total_pixels = frame_count * frame_renderer.width * frame_renderer.height
+    busy = sum(result["elapsed"] for result in results)
+    return {
+        "frames": frame_count,
+        "video_seconds": frame_count / renderer.fps,
+        "elapsed": elapsed,
+        "plan_elapsed": planned - started,
+        "fps": frame_count / elapsed if elapsed else 0.0,
+        "realtime": (frame_count / renderer.fps) / elapsed if elapsed else 0.0,
+        "reused_frames": sum(result["reused"] for result in results),
+        "dirty_ratio": sum(result["dirty_pixels"] for result in results) / total_pixels if total_pixels else 0.0,
+        "workers": workers,
+        "segments": results,
+        "per_worker": per_worker_stats(results),
+        # ワーカーの稼働時間の合計 / (経過時間 × プロセス数)。1.0 に近いほど線形にスケールしている
+        "efficiency": busy / (elapsed * workers) if elapsed else 0.0,
+    }
+
+
+def per_worker_stats(results):
+    workers = {}
+    for result in results:
+        stats = workers.setdefault(result["pid"], {"segments": 0, "frames": 0, "elapsed": 0.0})
+        stats["segments"] += 1
+        stats["frames"] += result["frames"]
+        stats["elapsed"] += result["elapsed"]
+    for stats in workers.values():
+        stats["fps"] = stats["frames"] / stats["elapsed"] if stats["elapsed"] else 0.0
+    return workers
+
+
+def print_worker_report(stats):
+    print(f"   準備: {stats['plan_elapsed']:.2f}秒  並列効率: {stats['efficiency'] * 100:.0f}%（{stats['workers']}プロセス）")
+    for pid, worker in sorted(stats["per_worker"].items()):
+        print(f"   ワーカー{pid}: {worker['segments']}セグメント {worker['frames']}フレーム {worker['fps']:.1f} fps")
@@ -0,0 +1,277 @@
+"""
+プリセット別の立ち絵合成（静的パーツの事前合成）
+
+立ち絵は「体・衣装・腕」のように表情で変わらないパーツと、
+「目・眉・口」のようにまばたき・口パク・表情変更で差し替えるパーツに分かれる。
+presets.json の衣装×ポーズの組み合わせごとに、静的パーツを1枚に合成しておき、
+オーバーレイは合成済み画像と目・眉・口だけをスプライトとして持つ。
+
+レイヤー構成は settings.json の characters.<キャラクター>.layers（描画順：後ろから前へ）:
+  {"texture": "body"}                                   常に描く静的パーツ
+  {"preset": "outfits", "field": "clothes"}             衣装プリセットで決まる静的パーツ
+  {"preset": "poses", "field": "rightArm", "suffix": "_right", "default": "basic"}
+  {"live": "mouth", "default": "muhu"}                  ブラウザで差し替えるパーツ（表情プリセットの同名フィールド）
+live の間にある静的パーツは連続するものごとに1枚（グループ）にまとめる。
+
+出力（キャラクターごと）:
+  <composite_dir>/<キャラクター>/c_<ハッシュ>.png  合成済み画像（アルファの外接矩形で切り出し）
+  <composite_dir>/<キャラクター>/manifest.json    レイヤー構成・組み合わせ→画像・元ファイルの状態
+
+再生成中に配信しても書きかけのファイルを返さないよう、sprite_atlas と同じく一時ファイル経由で置き換え、
+使われなくなった合成済み画像はマニフェストを書き終えてから削除する。
+
+使い方:
+  python -m server.preset_compositor [--force]
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+from server.sprite_atlas import write_atomic
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def combo_key(outfit, pose):
+    return f"{outfit}/{pose}"
+
+
+def config_digest(data):
+    return hashlib.sha1(json.dumps(data, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def build_stack(layers):
+    """レイヤー構成 → ブラウザ用の並び（静的パーツはグループ番号、live はそのまま）"""
+    stack = []
+    group_layers = []
+    for layer in layers:
+        if "live" in layer:
+            stack.append(dict(layer))
+            continue
+        if not stack or "group" not in stack[-1]:
+            stack.append({"group": len(group_layers)})
+            group_layers.append([])
+        group_layers[-1].append(layer)
+    return stack, group_layers
+
+
+def resolve_texture(layer, presets, outfit, pose, available):
+    """静的レイヤーのテクスチャ名（使わない・見つからない場合は None）"""
+    if "texture" in layer:
+        name = layer["texture"]
+        return name if name in available else None
+
+    preset_name = {"outfits": outfit, "poses": pose}.get(layer.get("preset"))
+    preset = presets.get(layer.get("preset"), {}).get(preset_name, {})
+    suffix = layer.get("suffix", "")
+    value = preset.get(layer.get("field"), layer.get("default"))
+    if value is None:
+        return None  # プリセットで明示的に「なし」（例: 水着の上に服を着ない）
+    for candidate in (value, layer.get("default")):
+        if candidate is not None and candidate + suffix in available:
+            return candidate + suffix
+    return None
+
+
+def source_state(paths, root):
+    state = {}
+    for path in sorted(set(paths)):
+        stat_result = path.stat()
+        state[path.relative_to(root).as_posix()] = [stat_result.st_size, stat_result.st_mtime_ns]
+    return state
+
+
+def compose(paths):
+    """レイヤーを順に重ね、アルファの外接矩形で切り出す（全レイヤーが透明なら None）"""
+    canvas = None
+    for path in paths:
+        with Image.open(path) as source:
+            layer = source.convert("RGBA")
+        if canvas is None:
+            canvas = layer
+        else:
+            if layer.size != canvas.size:
+                padded = Image.new("RGBA", canvas.size, (0, 0, 0, 0))
+                padded.paste(layer, (0, 0))
+                layer = padded
+            canvas = Image.alpha_composite(canvas, layer)
+    if canvas is None:
+        return None, None
+    bbox = canvas.getchannel("A").getbbox()
+    if bbox is None:
+        return None, None
+    return canvas.crop(bbox), (bbox[0], bbox[1])
+
+
+def compose_character(character_id, layers, presets, character_dir, assets, output_dir, force=False):
+    """1キャラクター分の合成画像を生成してマニフェストを返す（変更がなければ既存のものを返す）
+
+    assets: テクスチャ名 → {"file": キャラクターディレクトリからの相対パス, ...}（AssetIndex のマニフェスト）
+    """
+    character_dir = Path(character_dir)
+    output_dir = Path(output_dir)
+    stack, group_layers = build_stack(layers)
+
+    # 衣装×ポーズごとに、グループ単位で使うファイルを決める
+    combos = {}
+    for outfit in presets.get("outfits", {}) or {"default": {}}:
+        for pose in presets.get("poses", {}) or {"default": {}}:
+            groups = []
+            for group in group_layers:
+                names = [resolve_texture(layer, presets, outfit, pose, assets) for layer in group]
+                groups.append(tuple(assets[name]["file"] for name in names if name))
+            combos[combo_key(outfit, pose)] = groups
+
+    used = sorted({file for groups in combos.values() for group in groups for file in group})
+    sources = source_state([character_dir / file for file in used], character_dir)
+    options = {"presets": config_digest(presets), "layers": config_digest(layers)}
+
+    manifest_path = output_dir / MANIFEST_NAME
+    if not force and manifest_path.exists():
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if (manifest.get("version") == MANIFEST_VERSION and manifest.get("sources") == sources
+                and manifest.get("options") == options
+                and all((output_dir / entry["file"]).exists() for entry in manifest.get("images", {}).values())):
+            return manifest
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    images = {}  # 合成するファイルの並び → 画像ID（同じ組み合わせは1回だけ合成）
+    entries = {}
+    combo_images = {}
+    for key, groups in combos.items():
+        ids = []
+        for files in groups:
+            if files not in images:
+                image, offset = compose([character_dir / file for file in files])
+                if image is None:
+                    images[files] = None
+                else:
+                    digest = hashlib.sha1(image.tobytes()).hexdigest()[:12]
+                    if digest not in entries:
+                        file_name = f"c_{digest}.png"
+                        buffer = io.BytesIO()
+                        image.save(buffer, format="PNG", optimize=True)
+                        write_atomic(output_dir / file_name, buffer.getvalue())
+                        entries[digest] = {
+                            "file": file_name,
+                            "hash": hashlib.sha1(buffer.getvalue()).hexdigest()[:12],
+                            "offset": list(offset),
+                            "size": [image.width, image.height],
+                            "layers": list(files),
+                        }
+                    images[files] = digest
+            ids.append(images[files])
+        combo_images[key] = ids
+
+    static_layers = sum(len(group) for group in group_layers)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "character": character_id,
+        "stack": stack,
+        "combos": combo_images,
+        "images": entries,
+        "options": options,
+        "sources": sources,
+        "stats": {
+            "combos": len(combos),
+            "images": len(entries),
+            "static_layers": static_layers,
+            "sprites_before": static_layers + len(stack) - len(group_layers),
+            "sprites_after": len(stack),
+        },
+    }
+    write_atomic(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8"))
+
+    # 新しいマニフェストから参照されなくなった合成済み画像を消す
+    current = {entry["file"] for entry in entries.values()}
+    for stale in output_dir.glob("c_*.png"):
+        if stale.name not in current:
+            stale.unlink()
+    return manifest
+
+
+def is_current(manifest, character_dir, presets, layers):
+    """マニフェストが現在の元ファイル・プリセット・レイヤー構成と一致するか"""
+    if manifest.get("version") != MANIFEST_VERSION:
+        return False
+    if manifest.get("options") != {"presets": config_digest(presets), "layers": config_digest(layers)}:
+        return False
+    character_dir = Path(character_dir)
+    for relative_path, state in manifest.get("sources", {}).items():
+        try:
+            stat_result = (character_dir / relative_path).stat()
+        except OSError:
+            return False
+        if [stat_result.st_size, stat_result.st_mtime_ns] != state:
+            return False
+    return True
+
+
+def load_presets(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_from_config(config, root, force=False):
+    """設定ファイルの characters.*.layers と config/presets.json に従って全キャラクター分を生成"""
+    from server.asset_index import AssetIndex
+
+    root = Path(root)
+    directories = config.get("directories", {})
+    composite_dir = root / directories.get("composite_dir", "./assets_composite")
+    presets = load_presets(root / "config" / "presets.json")
+    index = AssetIndex(config, root).get()
+    logger = logging.getLogger(__name__)
+
+    manifests = {}
+    for character_id, character in config.get("characters", {}).items():
+        entry = index["characters"].get(character_id)
+        if not character.get("layers") or not entry:
+            continue
+        manifest = compose_character(
+            character_id,
+            character["layers"],
+            presets,
+            root / directories.get("assets_dir", "./assets") / entry["dir"],
+            entry["assets"],
+            composite_dir / entry["dir"],
+            force,
+        )
+        stats = manifest["stats"]
+        logger.info(f"プリセット合成準備完了[{character_id}]: {stats['combos']}通り, {stats['images']}枚")
+        manifests[character_id] = manifest
+    return manifests
+
+
+def print_summary(manifests):
+    for character_id, manifest in manifests.items():
+        stats = manifest["stats"]
+        print(f"[合成] {character_id}: {stats['combos']}通り → 画像{stats['images']}枚")
+        print(f"   スプライト数: {stats['sprites_before']} → {stats['sprites_after']}")
+
+
+def main(argv=None):
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+    from server.config_manager import ConfigManager
+
+    parser = argparse.ArgumentParser(description="プリセット別の立ち絵合成")
+    parser.add_argument("--force", action="store_true", help="変更がなくても再生成")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    config = ConfigManager().load_config()
+    print_summary(build_from_config(config, project_root, args.force))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+外部プロセス（OBS・VOICEVOX）の検出
+
+一度見つけたPIDをキャッシュし、次回以降はそのPIDの生存確認だけで済ませる。
+キャッシュが外れたときだけ全プロセスを走査し、その1回の走査で登録済みの
+全対象（OBS・VOICEVOX）をまとめて記録するので、起動確認同士で結果を共有できる。
+"""
+import logging
+import os
+import shutil
+import threading
+from typing import Optional
+
+# psutil はプロセス確認を初めて行うときに読み込む（サーバー単体起動では使わない）
+psutil = None
+PSUTIL_AVAILABLE = None  # None: 未確認
+
+
+def load_psutil():
+    global psutil, PSUTIL_AVAILABLE
+    if PSUTIL_AVAILABLE is None:
+        try:
+            import psutil as psutil_module
+            psutil = psutil_module
+            PSUTIL_AVAILABLE = True
+        except ImportError:
+            PSUTIL_AVAILABLE = False
+    return PSUTIL_AVAILABLE
+
+# 対象ごとのプロセス名（小文字で完全一致）
+DEFAULT_PROCESS_NAMES = {
+    "obs": ("obs64.exe", "obs32.exe", "obs.exe", "obs"),
+    "voicevox": ("voicevox.exe", "voicevox"),
+}
+
+
+class ProcessDiscovery:
+    def __init__(self, process_names=None):
+        self.process_names = {
+            key: tuple(name.lower() for name in names)
+            for key, names in (process_names or DEFAULT_PROCESS_NAMES).items()
+        }
+        self.pids = {}  # key -> (pid, create_time)
+        self.executables = {}  # 候補リスト -> 見つかったパス（見つかったものだけ）
+        self.lock = threading.Lock()  # 起動確認はスレッドプールから並行して呼ばれる
+        self.stats = {"hits": 0, "scans": 0}
+        self.logger = logging.getLogger(__name__)
+
+    def apply_config(self, config):
+        """設定ファイルの obs/voicevox.process_names を反映"""
+        for key in ("obs", "voicevox"):
+            names = config.get(key, {}).get("process_names")
+            if names:
+                self.process_names[key] = tuple(name.lower() for name in names)
+
+    def find(self, key: str) -> Optional[int]:
+        """対象プロセスのPID（見つからなければNone）"""
+        if not load_psutil():
+            return None
+
+        with self.lock:
+            cached = self.pids.get(key)
+            if cached and self._is_alive(*cached):
+                self.stats["hits"] += 1
+                return cached[0]
+            self.pids.pop(key, None)
+            self._scan()
+            cached = self.pids.get(key)
+            return cached[0] if cached else None
+
+    def is_running(self, key: str) -> bool:
+        return self.find(key) is not None
+
+    def remember(self, key: str, pid: int):
+        """自分で起動したプロセスのPIDを登録（走査不要にする）"""
+        if not load_psutil():
+            return
+        try:
+            create_time = psutil.Process(pid).create_time()
+        except psutil.Error:
+            return
+        with self.lock:
+            self.pids[key] = (pid, create_time)
+
+    @staticmethod
+    def _is_alive(pid, create_time):
+        """PIDの生存確認（PID再利用は起動時刻の一致で見分ける）"""
+        try:
+            process = psutil.Process(pid)
+            return process.create_time() == create_time and process.is_running()
+        except psutil.Error:
+            return False
+
+    def _scan(self):
+        """全プロセスを1回走査し、未検出の全対象を記録"""
+        self.stats["scans"] += 1
+        wanted = {key: names for key, names in self.process_names.items() if key not in self.pids}
+        if not wanted:
+            return
+        try:
+            for proc in psutil.process_iter(["pid", "name", "create_time"]):
+                name = (proc.info.get("name") or "").lower()
+                for key, names in list(wanted.items()):
+                    if name in names:
+                        self.pids[key] = (proc.info["pid"], proc.info["create_time"])
+                        self.logger.info(f"プロセス発見[{key}]: {proc.info['name']} (PID: {proc.info['pid']})")
+                        del wanted[key]
+                if not wanted:
+                    break
+        except Exception as e:
+            self.logger.error(f"プロセス走査エラー: {e}")
+
+    def find_executable(self, candidates) -> Optional[str]:
+        """実行ファイル候補から存在するものを探す（パス指定は存在確認、名前だけならPATH検索）"""
+        cache_key = tuple(candidates)
+        if cache_key in self.executables:
+            return self.executables[cache_key]
+
+        found = None
+        for candidate in candidates:
+            candidate = os.path.expandvars(candidate)
+            if os.path.dirname(candidate):
+                if os.path.exists(candidate):
+                    found = candidate
+                    break
+            else:
+                found = shutil.which(candidate)
+                if found:
+                    break
+        # 見つからなかった結果は覚えない（起動中にインストールされたら次の呼び出しで見つける）
+        if found:
+            self.executables[cache_key] = found
+        return found
+
+
+# OBS・VOICEVOXの起動確認で共有するインスタンス
+shared_discovery = ProcessDiscovery()
@@ -4,11 +4,13 @@ os.environ['GRPC_VERBOSITY'] = 'ERROR'
 os.environ['GLOG_minloglevel'] = '2'
 
 import sqlite3
-import numpy as np
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, TYPE_CHECKING
 import json
 from datetime import datetime
 
+if TYPE_CHECKING:
+    import numpy as np  # 実行時は埋め込み・類似度計算を行うときに読み込む
+
 TARGET_USER_ID = "21639740"
 
 class AIClient:
@@ -187,8 +189,9 @@ class RAGSearchSystem:
         print(f"🧭 質問整形: {question} → {refined}")
         return refined
 
-    def _get_embedding(self, text: str) -> np.ndarray:
+    def _get_embedding(self, text: str) -> "np.ndarray":
         """設定に基づく埋め込み生成"""
+        import numpy as np
         try:
             if self.embedding_client_type == 'openai':
                 resp = self.openai_client.embeddings.create(
@@ -212,7 +215,8 @@ class RAGSearchSystem:
             else:
                 return np.zeros(768, dtype=np.float32)
 
-    def _search_similar_comments(self, query_vector: np.ndarray, top_k: int) -> List[Dict]:
+    def _search_similar_comments(self, query_vector: "np.ndarray", top_k: int) -> List[Dict]:
+        import numpy as np
         results: List[Dict] = []
         try:
             with sqlite3.connect(self.vector_db_path) as vconn:
@@ -281,7 +285,8 @@ class RAGSearchSystem:
             print(f"⚠️ コメント付随情報の取得に失敗: {e}")
             return items
 
-    def _cosine_similarity(self, v1: np.ndarray, v2: np.ndarray) -> float:
+    def _cosine_similarity(self, v1: "np.ndarray", v2: "np.ndarray") -> float:
+        import numpy as np
         dot = float(np.dot(v1, v2))
         n1 = float(np.linalg.norm(v1))
         n2 = float(np.linalg.norm(v2))
@@ -0,0 +1,157 @@
+"""
+起動準備完了（レディネス）判定
+
+各コンポーネント（HTTP・WebSocket 2ポート・VOICEVOX・OBS WebSocket・プラグイン）の
+準備完了を非同期プローブで確認する。固定秒数の待機の代わりに、必要なプローブが
+すべて成功した時点で次へ進み、コンポーネントごとの起動時間を表示する。
+"""
+import asyncio
+import concurrent.futures
+import time
+
+
+class ReadinessProbe:
+    """準備完了を確認する非同期チェック（check() が True を返せば準備完了）"""
+
+    def __init__(self, name, check, required=True):
+        self.name = name
+        self.check = check
+        self.required = required
+
+
+class ProbeResult:
+    def __init__(self, name, ready, elapsed, attempts, required=True, error=None):
+        self.name = name
+        self.ready = ready
+        self.elapsed = elapsed
+        self.attempts = attempts
+        self.required = required
+        self.error = error
+
+    def __repr__(self):
+        return f"ProbeResult({self.name}, ready={self.ready}, elapsed={self.elapsed:.2f}s)"
+
+
+async def wait_for_probe(probe, timeout, interval=0.25, probe_timeout=2.0, started_at=None):
+    """プローブが成功するまで繰り返す（timeout 秒で打ち切り）
+
+    started_at（time.monotonic() の値）を渡すと、そこからの経過時間を起動時間とする。
+    """
+    started_at = started_at if started_at is not None else time.monotonic()
+    deadline = time.monotonic() + timeout
+    attempts = 0
+    error = None
+    while True:
+        attempts += 1
+        try:
+            if await asyncio.wait_for(probe.check(), probe_timeout):
+                return ProbeResult(probe.name, True, time.monotonic() - started_at, attempts, probe.required)
+            error = None
+        except Exception as e:
+            error = e
+        if time.monotonic() + interval > deadline:
+            return ProbeResult(probe.name, False, time.monotonic() - started_at, attempts, probe.required, error)
+        await asyncio.sleep(interval)
+
+
+async def wait_for_all(probes, timeout, interval=0.25, probe_timeout=2.0, started_at=None):
+    """全プローブを並行して待つ（結果は probes と同じ順）"""
+    started_at = started_at if started_at is not None else time.monotonic()
+    return list(await asyncio.gather(*(
+        wait_for_probe(probe, timeout, interval, probe_timeout, started_at) for probe in probes
+    )))
+
+
+def wait_until_ready(probes, timeout, interval=0.25, probe_timeout=2.0, started_at=None):
+    """同期コード（起動用スレッド等）から wait_for_all を実行"""
+    coroutine = wait_for_all(probes, timeout, interval, probe_timeout, started_at)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    # イベントループ上から呼ばれた場合は別スレッドで実行
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def all_required_ready(results):
+    return all(result.ready for result in results if result.required)
+
+
+def print_report(results, indent="   "):
+    """コンポーネントごとの起動時間を表示"""
+    for result in sorted(results, key=lambda r: r.elapsed):
+        mark = "[OK]" if result.ready else ("[NG]" if result.required else "[--]")
+        detail = f"{result.elapsed:6.2f}秒" if result.ready else f"未応答 ({result.elapsed:.1f}秒, {result.attempts}回)"
+        print(f"{indent}{mark} {result.name:<16} {detail}")
+
+
+def readiness_options(config):
+    """設定ファイルの readiness セクション"""
+    readiness_config = config.get("readiness", {})
+    return {
+        "interval": readiness_config.get("interval", 0.25),
+        "probe_timeout": readiness_config.get("probe_timeout", 2.0),
+    }
+
+
+# --- プローブ ---
+
+def tcp_probe(name, host, port, required=True):
+    """TCP接続を受け付けるか"""
+    async def check():
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.close()
+        await writer.wait_closed()
+        return True
+    return ReadinessProbe(name, check, required)
+
+
+def http_probe(name, url, required=True):
+    """HTTP GET が 200 を返すか"""
+    async def check():
+        import aiohttp
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url) as response:
+                return response.status == 200
+    return ReadinessProbe(name, check, required)
+
+
+def voicevox_probe(config, required=True):
+    servers = config["servers"]
+    return http_probe("VOICEVOX", f"http://{servers['voicevox_host']}:{servers['voicevox_port']}/version", required)
+
+
+def obs_websocket_probe(config, required=True):
+    """OBS WebSocket の Identify まで完了するか"""
+    async def check():
+        from server.obs_async_client import AsyncOBSClient
+        servers = config["servers"]
+        client = AsyncOBSClient(servers["obs_websocket_host"], servers["obs_websocket_port"], servers["obs_password"])
+        await client.connect()
+        await client.disconnect()
+        return True
+    return ReadinessProbe("OBS WebSocket", check, required)
+
+
+def plugins_probe(required=True):
+    """ずんだもんサーバーの初期化（プラグイン読み込み・on_system_start）が完了したか"""
+    async def check():
+        from server import main
+        return main.plugins_ready.is_set()
+    return ReadinessProbe("プラグイン", check, required)
+
+
+def server_probes(config):
+    """ずんだもんサーバー（HTTP・WebSocket 2ポート・プラグイン）のプローブ
+
+    WebSocket は接続を受け付けるかだけを見る（ハンドシェイクまで進めると、ポーリングのたびに
+    ブラウザクライアントとして登録され、スナップショット送信や配信先に加わってしまう）。
+    """
+    servers = config["servers"]
+    return [
+        http_probe("HTTP", f"http://localhost:{servers['http_port']}/config/settings.json"),
+        tcp_probe("WebSocket(ブラウザ)", "localhost", servers["websocket_browser_port"]),
+        tcp_probe("WebSocket(OBS制御)", "localhost", servers["websocket_control_port"]),
+        plugins_probe(),
+    ]
@@ -0,0 +1,204 @@
+"""
+コメント応答テンプレートの合成済み音声バンク
+
+CommentHandler の応答テンプレート（"{username}さん、こんにちはなのだ！" など）を
+固定部分とユーザー名に分け、固定部分は起動時に合成してメモリに持っておく。
+応答時に合成するのはユーザー名だけで、各部分の前後の無音を詰めてクロスフェードで連結する。
+
+- ユーザー名の音声は直近 max_usernames 人分をメモリに残す（常連は2回目以降合成なし）。
+  regular_viewers に書いたユーザー名は起動時に合成しておく
+- 連結した応答は VOICEVOX の音声キャッシュと同じディレクトリに reply_*.wav として保存し、
+  同じテンプレート×ユーザー名なら再利用する（古いファイルの削除も音声キャッシュと同じ）。
+  先読みで同じ応答の連結が重なったら1回だけ連結して結果を共有し、ファイルは一時ファイル経由で置き換える
+- テンプレートにユーザー名以外の差し込みがある、合成に失敗した等で連結できないときは None を返す
+  （呼び出し側は応答文全体をそのまま合成する）
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import string
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from server.wav_io import read_samples, write_wav
+
+USERNAME_FIELD = "username"
+
+
+def split_template(template: str):
+    """テンプレートを固定部分（文字列）とユーザー名（None）の並びに分ける（分けられなければ None）"""
+    parts = []
+    try:
+        for literal, field, _, _ in string.Formatter().parse(template):
+            if literal:
+                parts.append(literal)
+            if field is None:
+                continue
+            if field != USERNAME_FIELD:
+                return None
+            parts.append(None)
+    except ValueError:
+        return None
+    return parts
+
+
+def write_reply(path, samples, rate):
+    """連結した応答を一時ファイルに書いてから置き換える（再生側に書きかけのWAVを渡さない）"""
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    write_wav(temp_path, samples, rate)
+    os.replace(temp_path, path)
+
+
+def voiced_range(samples, threshold, margin):
+    """前後の無音を除いた範囲 [開始, 終了)（連結部分のクロスフェード用に margin サンプル残す）"""
+    loud = np.flatnonzero(np.abs(samples) > threshold)
+    if not len(loud):
+        return 0, 0
+    return max(0, int(loud[0]) - margin), min(len(samples), int(loud[-1]) + 1 + margin)
+
+
+def join_with_crossfade(segments, fade, threshold=0.01):
+    """つなぎ目の無音を詰めて、fade サンプルの線形クロスフェードで連結する"""
+    trimmed = []
+    last = len(segments) - 1
+    for index, samples in enumerate(segments):
+        start, end = voiced_range(samples, threshold, fade)
+        # 最初の頭と最後のお尻は元の無音を残す
+        trimmed.append(samples[0 if index == 0 else start:len(samples) if index == last else end])
+
+    output = trimmed[0] if trimmed else np.zeros(0, dtype=np.float32)
+    for samples in trimmed[1:]:
+        overlap = min(fade, len(output), len(samples))
+        if overlap:
+            ramp = np.linspace(0.0, 1.0, overlap, dtype=np.float32)
+            blended = output[-overlap:] * (1.0 - ramp) + samples[:overlap] * ramp
+            output = np.concatenate([output[:-overlap], blended, samples[overlap:]])
+        else:
+            output = np.concatenate([output, samples])
+    return output
+
+
+class ResponseBank:
+    """応答テンプレートの固定部分を合成済みで持ち、ユーザー名だけ合成して連結する"""
+
+    def __init__(self, voicevox, templates, cache_dir=None, rate=24000, crossfade=0.015,
+                 silence_threshold=0.01, max_usernames=200, regular_viewers=()):
+        self.voicevox = voicevox
+        self.templates = [template for group in templates.values() for template in group]
+        self.cache_dir = Path(cache_dir or voicevox.audio_dir)
+        self.rate = rate
+        self.crossfade = crossfade
+        self.silence_threshold = silence_threshold
+        self.max_usernames = max_usernames
+        self.regular_viewers = list(regular_viewers)
+        self.pieces = {}  # (話者ID, 固定部分) -> サンプル列
+        self.usernames = OrderedDict()  # (話者ID, ユーザー名) -> サンプル列（古い順）
+        self.rendering = {}  # 出力ファイル -> 連結中のタスク
+        self.stats = {
+            "pieces": 0,
+            "rendered": 0,
+            "reused": 0,
+            "unavailable": 0,
+            "username_hits": 0,
+            "username_misses": 0,
+        }
+        self.logger = logging.getLogger(__name__)
+
+    def apply_config(self, config):
+        """設定ファイルの response_bank セクションを反映"""
+        bank_config = config.get("response_bank", {})
+        self.rate = bank_config.get("sample_rate", self.rate)
+        self.crossfade = bank_config.get("crossfade_ms", self.crossfade * 1000) / 1000
+        self.silence_threshold = bank_config.get("silence_threshold", self.silence_threshold)
+        self.max_usernames = bank_config.get("max_usernames", self.max_usernames)
+        self.regular_viewers = bank_config.get("regular_viewers", self.regular_viewers)
+
+    async def warm(self, characters=("zundamon",)):
+        """全テンプレートの固定部分と常連のユーザー名を合成しておく（1件ずつ、準備できた数を返す）"""
+        for character in characters:
+            speaker_id = self.voicevox.speaker_id_for(character)
+            for template in self.templates:
+                for part in split_template(template) or []:
+                    if part is not None:
+                        await self._piece(speaker_id, part)
+            for username in self.regular_viewers:
+                await self._username(speaker_id, username)
+        self.logger.info(f"[応答バンク] {len(self.pieces)}件の固定部分と{len(self.usernames)}人分のユーザー名を準備")
+        return len(self.pieces) + len(self.usernames)
+
+    async def render(self, template: str, username: str, character="zundamon"):
+        """テンプレートにユーザー名を入れた応答の音声ファイル（連結できなければ None）"""
+        speaker_id = self.voicevox.speaker_id_for(character)
+        key = f"{speaker_id}|{self.rate}|{self.crossfade}|{template}|{username}"
+        output_path = self.cache_dir / f"reply_{speaker_id}_{hashlib.md5(key.encode()).hexdigest()[:16]}.wav"
+        if output_path.exists():
+            # 古いファイル削除の対象から外す
+            os.utime(output_path)
+            self.stats["reused"] += 1
+            return str(output_path)
+
+        # 同じ応答を連結中なら、その結果を待つ
+        task = self.rendering.get(output_path)
+        if task is None:
+            task = asyncio.ensure_future(self._render(output_path, speaker_id, template, username))
+            self.rendering[output_path] = task
+            task.add_done_callback(lambda _: self.rendering.pop(output_path, None))
+        else:
+            self.stats["reused"] += 1
+        return await asyncio.shield(task)
+
+    async def _render(self, output_path, speaker_id, template, username):
+        parts = split_template(template)
+        if not parts:
+            self.stats["unavailable"] += 1
+            return None
+        segments = []
+        for part in parts:
+            samples = await (self._username(speaker_id, username) if part is None else self._piece(speaker_id, part))
+            if samples is None:
+                self.stats["unavailable"] += 1
+                return None
+            segments.append(samples)
+
+        joined = join_with_crossfade(segments, round(self.crossfade * self.rate), self.silence_threshold)
+        await asyncio.get_running_loop().run_in_executor(None, write_reply, output_path, joined, self.rate)
+        self.stats["rendered"] += 1
+        return str(output_path)
+
+    def metrics(self):
+        return {"templates": len(self.templates), "usernames": len(self.usernames), **self.stats}
+
+    async def _piece(self, speaker_id, text):
+        key = (speaker_id, text)
+        if key not in self.pieces:
+            samples = await self._synthesize(text, speaker_id)
+            if samples is None:
+                return None
+            self.pieces[key] = samples
+            self.stats["pieces"] = len(self.pieces)
+        return self.pieces[key]
+
+    async def _username(self, speaker_id, username):
+        key = (speaker_id, username)
+        if key in self.usernames:
+            self.usernames.move_to_end(key)
+            self.stats["username_hits"] += 1
+            return self.usernames[key]
+        self.stats["username_misses"] += 1
+        samples = await self._synthesize(username, speaker_id)
+        if samples is None:
+            return None
+        self.usernames[key] = samples
+        while len(self.usernames) > self.max_usernames:
+            self.usernames.popitem(last=False)
+        return samples
+
+    async def _synthesize(self, text, speaker_id):
+        audio_file = await self.voicevox.synthesize_speech(text, speaker_id=speaker_id)
+        if not audio_file:
+            self.logger.warning(f"[応答バンク] 合成できませんでした: {text}")
+            return None
+        return await asyncio.get_running_loop().run_in_executor(None, read_samples, audio_file, self.rate)
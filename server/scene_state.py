@@ -0,0 +1,107 @@
+"""
+キャラクター・シーン状態ストア
+
+ブラウザへ送った状態変更メッセージから現在の状態（表情・ポーズ・衣装・話者・
+タイムライン・シーン）を保持する。新規接続クライアントには state_snapshot を1回送り、
+以降は従来の変更メッセージ（差分）だけを送る。値が変わらない変更メッセージは送らない。
+"""
+import copy
+import logging
+
+# キャラクター状態を変えるメッセージと対応するフィールド
+CHARACTER_FIELDS = {
+    "change_expression": "expression",
+    "change_pose": "pose",
+    "change_outfit": "outfit",
+}
+
+DEFAULT_CHARACTER_STATE = {
+    "expression": "normal",
+    "pose": "basic",
+    "outfit": "usual",
+}
+
+
+class SceneStateStore:
+    """ブラウザ表示状態の正本"""
+
+    def __init__(self):
+        self.version = 0
+        self.characters = {
+            "zundamon": dict(DEFAULT_CHARACTER_STATE),
+            "metan": dict(DEFAULT_CHARACTER_STATE),
+        }
+        self.active_speaker = None
+        self.speaking = False
+        self.timeline = {"project": None, "running": False}
+        self.scene = None
+        self.logger = logging.getLogger(__name__)
+
+    def apply_config(self, config):
+        """設定ファイルのキャラクター初期状態を反映"""
+        for character, character_config in config.get("characters", {}).items():
+            self.characters[character] = {
+                "expression": character_config.get("default_expression", DEFAULT_CHARACTER_STATE["expression"]),
+                "pose": character_config.get("default_pose", DEFAULT_CHARACTER_STATE["pose"]),
+                "outfit": character_config.get("default_outfit", DEFAULT_CHARACTER_STATE["outfit"]),
+            }
+        self.version += 1
+
+    def apply(self, message: dict):
+        """送信メッセージを状態に反映
+
+        Returns:
+            状態メッセージで変化があればTrue、変化がなければFalse、
+            状態に関係しないメッセージならNone
+        """
+        action = message.get("action")
+
+        if action in CHARACTER_FIELDS:
+            # app.js と同じく character 省略時は現在の話者
+            character = message.get("character") or self.active_speaker or "zundamon"
+            field = CHARACTER_FIELDS[action]
+            state = self.characters.setdefault(character, dict(DEFAULT_CHARACTER_STATE))
+            if state.get(field) == message.get("preset"):
+                return False
+            state[field] = message.get("preset")
+        elif action == "speech_start":
+            self.active_speaker = message.get("character", "zundamon")
+            self.speaking = True
+        elif action in ("speech_end", "speech_error", "speech_interrupted"):
+            self.speaking = False
+        elif action == "timeline_started":
+            self.timeline = {"project": message.get("project"), "running": True}
+        elif action == "timeline_stopped":
+            self.timeline = {**self.timeline, "running": False}
+        else:
+            return None
+
+        self.version += 1
+        return True
+
+    def set_scene(self, scene_name):
+        """OBSの現在シーンを記録"""
+        if self.scene != scene_name:
+            self.scene = scene_name
+            self.version += 1
+
+    def snapshot(self, timeline_status=None):
+        """現在状態のスナップショット"""
+        timeline = dict(self.timeline)
+        if timeline_status:
+            timeline.update(timeline_status)
+        return {
+            "characters": copy.deepcopy(self.characters),
+            "active_speaker": self.active_speaker,
+            "speaking": self.speaking,
+            "timeline": timeline,
+            "scene": self.scene,
+        }
+
+    def snapshot_message(self, timeline_status=None):
+        """新規接続クライアント向けの state_snapshot メッセージ"""
+        return {
+            "action": "state_snapshot",
+            "version": self.version,
+            "state": self.snapshot(timeline_status),
+        }
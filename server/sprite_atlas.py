@@ -0,0 +1,289 @@
+"""
+立ち絵パーツのテクスチャアトラス生成
+
+各パーツPNGは全身キャンバス（1082x1650）サイズで、実際に描かれている範囲は一部だけ。
+アルファの外接矩形で切り出し、キャラクターごとに数枚のアトラスへシェルフ方式で詰める。
+出力は TexturePacker の JSON Hash 形式（PIXI の Spritesheet がそのまま読める）で、
+spriteSourceSize / sourceSize に元キャンバス上の位置を持つので、表示位置は元のPNGと同じになる。
+
+出力（キャラクターごと）:
+  <atlas_dir>/<キャラクター>/atlas_<n>.png   アトラス画像
+  <atlas_dir>/<キャラクター>/atlas_<n>.json  フレーム定義（TexturePacker JSON Hash）
+  <atlas_dir>/<キャラクター>/manifest.json  シート一覧・フレーム名→シート・元ファイルの状態
+
+フレーム名は「キャラクター/相対パス（拡張子なし）」（例: "zundamon_en/eye/smile_eye"）。
+PIXI のテクスチャキャッシュはフレーム名で共有されるため、キャラクター名を含めて重複を避ける。
+切り出し結果が同じパーツ（別ディレクトリの同一画像など）はアトラス上の同じ領域を共有する。
+再生成中に配信しても書きかけのファイルを返さないよう、各ファイルは一時ファイル経由で置き換え、
+使われなくなったシートはマニフェストを書き終えてから削除する。
+
+使い方:
+  python -m server.sprite_atlas [--assets-dir ./assets] [--atlas-dir ./assets_atlas] [--force]
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+class Layer:
+    """切り出し済みパーツ"""
+
+    def __init__(self, name, image, offset, source_size):
+        self.name = name
+        self.image = image  # 切り出した RGBA 画像
+        self.offset = offset  # 元キャンバス上の左上 (x, y)
+        self.source_size = source_size  # 元キャンバスの (幅, 高さ)
+        self.page = None
+        self.position = None  # アトラス上の左上 (x, y)
+        self.digest = hashlib.sha1(image.tobytes()).hexdigest()
+
+    @property
+    def width(self):
+        return self.image.width
+
+    @property
+    def height(self):
+        return self.image.height
+
+
+def trim_layer(name, path):
+    """アルファが0でない範囲で切り出す（完全に透明なら1x1）"""
+    with Image.open(path) as source:
+        image = source.convert("RGBA")
+    bbox = image.getchannel("A").getbbox() or (0, 0, 1, 1)
+    return Layer(name, image.crop(bbox), (bbox[0], bbox[1]), image.size)
+
+
+class ShelfPacker:
+    """シェルフ方式の矩形詰め込み（高さの大きい順に入れ、入らなければ次のページ）"""
+
+    def __init__(self, max_width=2048, max_height=2048, padding=2):
+        self.max_width = max_width
+        self.max_height = max_height
+        self.padding = padding
+        self.pages = []  # [{"shelves": [[y, 高さ, 使用済み幅]], "height": 使用済み高さ, "width": 使用済み最大幅}]
+
+    def pack(self, layers):
+        placed = {}  # 画像ダイジェスト -> (ページ, 位置)
+        for layer in sorted(layers, key=lambda layer: (layer.height, layer.width), reverse=True):
+            if layer.digest in placed:
+                layer.page, layer.position = placed[layer.digest]
+                continue
+            width = layer.width + self.padding
+            height = layer.height + self.padding
+            if width > self.max_width or height > self.max_height:
+                raise ValueError(f"アトラスに収まらないパーツです: {layer.name} ({layer.width}x{layer.height})")
+            layer.page, layer.position = placed[layer.digest] = self._place(width, height)
+        return self.pages
+
+    def _place(self, width, height):
+        for index, page in enumerate(self.pages):
+            # 既存の棚に空きがあれば入れる
+            for shelf in page["shelves"]:
+                y, shelf_height, used = shelf
+                if height <= shelf_height and used + width <= self.max_width:
+                    shelf[2] += width
+                    page["width"] = max(page["width"], shelf[2])
+                    return index, (used, y)
+            # 新しい棚を作る
+            if page["height"] + height <= self.max_height:
+                y = page["height"]
+                page["shelves"].append([y, height, width])
+                page["height"] += height
+                page["width"] = max(page["width"], width)
+                return index, (0, y)
+        self.pages.append({"shelves": [[0, height, width]], "height": height, "width": width})
+        return len(self.pages) - 1, (0, 0)
+
+
+def source_state(paths, root):
+    """元ファイルの状態（相対パス→[サイズ, 更新時刻]）。再生成が必要かの判定に使う"""
+    state = {}
+    for path in paths:
+        stat_result = path.stat()
+        state[path.relative_to(root).as_posix()] = [stat_result.st_size, stat_result.st_mtime_ns]
+    return state
+
+
+def write_atomic(path, data: bytes):
+    """一時ファイルに書いてから置き換える（読み手に書きかけのファイルを見せない）"""
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
+
+
+def sheets_exist(manifest, output_dir):
+    """マニフェストに載っているシート（JSON と画像）がすべて残っているか"""
+    return all(
+        (output_dir / sheet["file"]).exists() and (output_dir / sheet["file"]).with_suffix(".png").exists()
+        for sheet in manifest.get("sheets", [])
+    )
+
+
+def build_character_atlas(character_dir, output_dir, max_size=2048, padding=2, force=False):
+    """1キャラクター分のアトラスを生成してマニフェストを返す（元ファイルに変更がなければ既存のものを返す）"""
+    character_dir = Path(character_dir)
+    output_dir = Path(output_dir)
+    paths = sorted(character_dir.rglob("*.png"))
+    sources = source_state(paths, character_dir)
+    options = {"max_size": max_size, "padding": padding}
+
+    manifest_path = output_dir / MANIFEST_NAME
+    if not force and manifest_path.exists():
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if (manifest.get("version") == MANIFEST_VERSION and manifest.get("sources") == sources
+                and manifest.get("options") == options and sheets_exist(manifest, output_dir)):
+            return manifest
+
+    layers = [
+        trim_layer(f"{character_dir.name}/{path.relative_to(character_dir).with_suffix('').as_posix()}", path)
+        for path in paths
+    ]
+    pages = ShelfPacker(max_size, max_size, padding).pack(layers)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sheets = []
+    frame_pages = {}
+    for index, page in enumerate(pages):
+        page_layers = [layer for layer in layers if layer.page == index]
+        atlas = Image.new("RGBA", (page["width"], page["height"]), (0, 0, 0, 0))
+        for layer in page_layers:
+            atlas.paste(layer.image, layer.position)
+            frame_pages[layer.name] = index
+
+        image_name = f"atlas_{index}.png"
+        buffer = io.BytesIO()
+        atlas.save(buffer, format="PNG", optimize=True)
+        image_bytes = buffer.getvalue()
+        write_atomic(output_dir / image_name, image_bytes)
+        image_hash = hashlib.sha1(image_bytes).hexdigest()[:12]
+
+        sheet = {
+            "frames": {layer.name: frame_entry(layer) for layer in sorted(page_layers, key=lambda layer: layer.name)},
+            "meta": {
+                "app": "zundamon sprite_atlas",
+                "image": f"{image_name}?v={image_hash}",
+                "format": "RGBA8888",
+                "size": {"w": atlas.width, "h": atlas.height},
+                "scale": "1",
+            },
+        }
+        sheet_name = f"atlas_{index}.json"
+        sheet_text = json.dumps(sheet, ensure_ascii=False, indent=1)
+        write_atomic(output_dir / sheet_name, sheet_text.encode("utf-8"))
+        sheet_hash = hashlib.sha1(sheet_text.encode("utf-8")).hexdigest()[:12]
+        sheets.append({"file": sheet_name, "hash": sheet_hash, "size": [atlas.width, atlas.height]})
+
+    source_pixels = sum(layer.source_size[0] * layer.source_size[1] for layer in layers)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "character": character_dir.name,
+        "sheets": sheets,
+        "frames": frame_pages,
+        "options": options,
+        "sources": sources,
+        "stats": {
+            "layers": len(layers),
+            "source_bytes": sum(path.stat().st_size for path in paths),
+            "atlas_bytes": sum((output_dir / f"atlas_{i}.png").stat().st_size for i in range(len(pages))),
+            "source_texture_bytes": source_pixels * 4,
+            "atlas_texture_bytes": sum(page["width"] * page["height"] * 4 for page in pages),
+        },
+    }
+    write_atomic(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=1).encode("utf-8"))
+
+    # 新しいマニフェストから参照されなくなったシートを消す
+    current = {sheet["file"] for sheet in sheets} | {f"atlas_{i}.png" for i in range(len(pages))}
+    for stale in output_dir.glob("atlas_*"):
+        if stale.name not in current:
+            stale.unlink()
+    return manifest
+
+
+def frame_entry(layer):
+    x, y = layer.position
+    offset_x, offset_y = layer.offset
+    return {
+        "frame": {"x": x, "y": y, "w": layer.width, "h": layer.height},
+        "rotated": False,
+        "trimmed": True,
+        "spriteSourceSize": {"x": offset_x, "y": offset_y, "w": layer.width, "h": layer.height},
+        "sourceSize": {"w": layer.source_size[0], "h": layer.source_size[1]},
+    }
+
+
+def build_all(assets_dir, atlas_dir, max_size=2048, padding=2, force=False):
+    """assets_dir 直下のキャラクターディレクトリごとにアトラスを生成"""
+    assets_dir = Path(assets_dir)
+    manifests = {}
+    for character_dir in sorted(p for p in assets_dir.iterdir() if p.is_dir()):
+        if not any(character_dir.rglob("*.png")):
+            continue
+        manifests[character_dir.name] = build_character_atlas(
+            character_dir, Path(atlas_dir) / character_dir.name, max_size, padding, force
+        )
+    return manifests
+
+
+def build_from_config(config, root, force=False):
+    """設定ファイルの directories.assets_dir / directories.atlas_dir / atlas セクションに従って生成（root からの相対パス）"""
+    root = Path(root)
+    directories = config.get("directories", {})
+    atlas_config = config.get("atlas", {})
+    manifests = build_all(
+        root / directories.get("assets_dir", "./assets"),
+        root / directories.get("atlas_dir", "./assets_atlas"),
+        atlas_config.get("max_size", 2048),
+        atlas_config.get("padding", 2),
+        force,
+    )
+    logger = logging.getLogger(__name__)
+    for character, manifest in manifests.items():
+        stats = manifest["stats"]
+        logger.info(f"アトラス準備完了[{character}]: {stats['layers']}パーツ, {len(manifest['sheets'])}枚")
+    return manifests
+
+
+def print_summary(manifests):
+    for character, manifest in manifests.items():
+        stats = manifest["stats"]
+        print(f"[アトラス] {character}: {stats['layers']}パーツ → {len(manifest['sheets'])}枚")
+        print(f"   ファイルサイズ: {stats['source_bytes'] / 1024:.0f}KB → {stats['atlas_bytes'] / 1024:.0f}KB")
+        print(f"   テクスチャメモリ: {stats['source_texture_bytes'] / 1048576:.1f}MB → {stats['atlas_texture_bytes'] / 1048576:.1f}MB")
+
+
+def main(argv=None):
+    project_root = Path(__file__).parent.parent
+    sys.path.insert(0, str(project_root))
+    from server.config_manager import ConfigManager
+
+    config = ConfigManager().load_config()
+    directories = config.get("directories", {})
+    atlas_config = config.get("atlas", {})
+
+    parser = argparse.ArgumentParser(description="立ち絵パーツのテクスチャアトラス生成")
+    parser.add_argument("--assets-dir", default=directories.get("assets_dir", "./assets"))
+    parser.add_argument("--atlas-dir", default=directories.get("atlas_dir", "./assets_atlas"))
+    parser.add_argument("--max-size", type=int, default=atlas_config.get("max_size", 2048), help="アトラス1枚の最大幅・高さ")
+    parser.add_argument("--padding", type=int, default=atlas_config.get("padding", 2), help="パーツ間の余白（px）")
+    parser.add_argument("--force", action="store_true", help="変更がなくても再生成")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    manifests = build_all(args.assets_dir, args.atlas_dir, args.max_size, args.padding, args.force)
+    print_summary(manifests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+起動時間プロファイル（モジュールごとの import 時間）
+
+`python -X importtime` と同じく、各モジュールの読み込みにかかった時間を
+累積（子モジュール込み）と自身のみに分けて記録する。sys.meta_path の先頭に
+計測用のファインダーを入れ、見つかったモジュールのローダーを計測用に包む。
+
+使い方:
+  python run.py --profile-startup server
+  ZUNDAMON_PROFILE_STARTUP=1 python run.py server
+"""
+import importlib.abc
+import sys
+import threading
+import time
+
+ENV_VAR = "ZUNDAMON_PROFILE_STARTUP"
+
+
+class _TimingLoader(importlib.abc.Loader):
+    """元のローダーに処理を任せ、create_module・exec_module の時間を記録"""
+
+    def __init__(self, loader, profiler, name):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def create_module(self, spec):
+        # 拡張モジュールはここで初期化まで済むので計測対象に含める
+        self._profiler.begin(self._name)
+        try:
+            module = self._loader.create_module(spec)
+        except BaseException:
+            self._profiler.end(self._name)
+            raise
+        self._profiler.pause(self._name)
+        return module
+
+    def exec_module(self, module):
+        self._profiler.resume(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.end(self._name)
+
+    def __getattr__(self, name):
+        # get_data・get_resource_reader 等は元のローダーへ
+        return getattr(self._loader, name)
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.records = {}  # モジュール名 -> (累積秒, 自身秒)
+        self.lock = threading.Lock()
+        self.local = threading.local()  # スレッドごとの読み込み中スタック
+        self.installed = False
+
+    # --- インストール ---
+
+    def install(self):
+        if not self.installed:
+            sys.meta_path.insert(0, self)
+            self.installed = True
+        return self
+
+    def uninstall(self):
+        if self.installed:
+            sys.meta_path.remove(self)
+            self.installed = False
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self.local, "finding", False):
+            return None
+        self.local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self.local.finding = False
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimingLoader(spec.loader, self, fullname)
+        return spec
+
+    # --- 計測 ---
+
+    def _stack(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def begin(self, name):
+        # [モジュール名, 計測済み秒, 再開時刻, 子モジュール秒]
+        self._stack().append([name, 0.0, time.perf_counter(), 0.0])
+
+    def pause(self, name):
+        frame = self._stack()[-1]
+        frame[1] += time.perf_counter() - frame[2]
+
+    def resume(self, name):
+        stack = self._stack()
+        if not stack or stack[-1][0] != name:
+            # create_module を経由しない読み込み
+            self.begin(name)
+            return
+        stack[-1][2] = time.perf_counter()
+
+    def end(self, name):
+        stack = self._stack()
+        frame_name, measured, resumed_at, children = stack.pop()
+        cumulative = measured + time.perf_counter() - resumed_at
+        if stack:
+            stack[-1][3] += cumulative
+        with self.lock:
+            self.records[frame_name] = (cumulative, cumulative - children)
+
+    # --- 集計 ---
+
+    def top_modules(self, limit=20):
+        """累積時間の長い順（親パッケージの累積に子が含まれる点は -X importtime と同じ）"""
+        with self.lock:
+            items = sorted(self.records.items(), key=lambda item: item[1][0], reverse=True)
+        return items[:limit]
+
+    def by_package(self):
+        """トップレベルパッケージごとの自身時間の合計"""
+        totals = {}
+        with self.lock:
+            for name, (_, self_time) in self.records.items():
+                package = name.split(".")[0]
+                totals[package] = totals.get(package, 0.0) + self_time
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+    def total_import_time(self):
+        with self.lock:
+            return sum(self_time for _, self_time in self.records.values())
+
+    def print_report(self, title="起動時間", limit=15):
+        elapsed = time.perf_counter() - self.started_at
+        print(f"\n[計測] {title}: {elapsed * 1000:.0f}ms（うち import {self.total_import_time() * 1000:.0f}ms, {len(self.records)}モジュール）")
+        print("   パッケージ別（自身時間の合計）:")
+        for package, self_time in self.by_package()[:limit]:
+            print(f"   {self_time * 1000:8.1f}ms  {package}")
+        print("   モジュール別（累積 / 自身）:")
+        for name, (cumulative, self_time) in self.top_modules(limit):
+            print(f"   {cumulative * 1000:8.1f}ms / {self_time * 1000:6.1f}ms  {name}")
+
+
+_profiler = None
+
+
+def enable():
+    """計測開始（以降の import を記録）"""
+    global _profiler
+    if _profiler is None:
+        _profiler = ImportProfiler().install()
+    return _profiler
+
+
+def get_profiler():
+    return _profiler
@@ -0,0 +1,192 @@
+"""
+静的ファイル配信（aiohttp）
+
+オーバーレイ・管理画面・立ち絵PNG・設定JSONをイベントループ上で配信する。
+- ETag / Last-Modified による再検証（一致すれば 304）
+- ?v=<ハッシュ> 付きURLは内容が変わらないので `Cache-Control: immutable`
+- JS/CSS/JSON/HTML は gzip / brotli（brotli モジュールがあれば）で圧縮し、結果をメモリに保持
+- PNG/WAV 等は FileResponse（sendfile）でそのまま送る
+- リクエストごとのアクセスログは出さない
+"""
+import asyncio
+import gzip
+import logging
+import mimetypes
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+
+from aiohttp import web
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# 圧縮対象（テキスト系）
+COMPRESSIBLE_TYPES = {
+    "text/html", "text/css", "text/plain", "text/javascript",
+    "application/javascript", "application/json", "image/svg+xml",
+}
+
+mimetypes.add_type("text/javascript", ".js")
+mimetypes.add_type("application/json", ".json")
+
+
+def file_etag(stat_result):
+    """ファイルのETag（aiohttp の FileResponse と同じ形式）"""
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+class StaticFileServer:
+    def __init__(self, root, config=None):
+        self.root = Path(root).resolve()
+        http_config = (config or {}).get("http", {})
+        self.compress_min_size = http_config.get("compress_min_size", 1024)
+        self.compress_max_size = http_config.get("compress_max_size", 4 * 1024 * 1024)
+        self.immutable_max_age = http_config.get("immutable_max_age", 31536000)
+        self.compressed = {}  # (path, encoding) -> (etag, bytes)
+        self.keepalive_timeout = http_config.get("keepalive_timeout", 75.0)
+        self.stats = {"requests": 0, "not_modified": 0, "compressed_hits": 0, "compressed_builds": 0}
+        self.routes = []  # 静的ファイルより先に照合する (パス, ハンドラー)
+        self.runner = None
+        self.logger = logging.getLogger(__name__)
+
+    def add_get(self, path, handler):
+        """API 等の動的ルートを追加（start() より前に呼ぶ）"""
+        self.routes.append((path, handler))
+
+    def create_app(self):
+        app = web.Application()
+        for path, handler in self.routes:
+            app.router.add_get(path, handler)
+        app.router.add_get("/{path:.*}", self.handle)
+        return app
+
+    async def start(self, host, port):
+        """現在のイベントループ上で待ち受け開始（アクセスログなし）"""
+        self.runner = web.AppRunner(self.create_app(), access_log=None, keepalive_timeout=self.keepalive_timeout)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+
+    @property
+    def port(self):
+        return self.runner.addresses[0][1]
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    # --- リクエスト処理 ---
+
+    async def handle(self, request):
+        self.stats["requests"] += 1
+        request_path = request.match_info["path"]
+        path = (self.root / request_path).resolve()
+        try:
+            path.relative_to(self.root)
+        except ValueError:
+            raise web.HTTPNotFound()
+        if path.is_dir():
+            if request_path and not request_path.endswith("/"):
+                location = f"/{request_path}/"
+                if request.query_string:
+                    location += f"?{request.query_string}"
+                raise web.HTTPMovedPermanently(location)
+            path = path / "index.html"
+        if not path.is_file():
+            raise web.HTTPNotFound()
+
+        stat_result = path.stat()
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        headers = {
+            "Cache-Control": self.cache_control(request),
+            "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        }
+
+        encoding = self.choose_encoding(request, content_type, stat_result.st_size)
+        etag = file_etag(stat_result)
+        if encoding:
+            etag = f'{etag[:-1]}-{encoding}"'
+            headers["Vary"] = "Accept-Encoding"
+        headers["ETag"] = etag
+
+        if self.not_modified(request, etag, stat_result.st_mtime):
+            self.stats["not_modified"] += 1
+            return web.Response(status=304, headers=headers)
+
+        if not encoding:
+            # そのまま送る（sendfile）
+            response = web.FileResponse(path, headers=headers)
+            response.content_type = content_type
+            return response
+
+        body = await self.compressed_body(path, encoding, etag)
+        headers["Content-Encoding"] = encoding
+        return web.Response(body=body, content_type=content_type, headers=headers)
+
+    def cache_control(self, request):
+        """?v= 付き（内容ハッシュ付き）URLは不変、それ以外は毎回ETagで再検証"""
+        if request.query.get("v"):
+            return f"public, max-age={self.immutable_max_age}, immutable"
+        return "no-cache"
+
+    def choose_encoding(self, request, content_type, size):
+        if content_type not in COMPRESSIBLE_TYPES:
+            return None
+        if not (self.compress_min_size <= size <= self.compress_max_size):
+            return None
+        accepted = {
+            part.split(";")[0].strip().lower()
+            for part in request.headers.get("Accept-Encoding", "").split(",")
+        }
+        if BROTLI_AVAILABLE and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    @staticmethod
+    def not_modified(request, etag, mtime):
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            candidates = {tag.strip() for tag in if_none_match.split(",")}
+            return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+        if_modified_since = request.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def compressed_body(self, path, encoding, etag):
+        """圧縮済みの内容（ファイルが変わるまで再利用）"""
+        key = (str(path), encoding)
+        cached = self.compressed.get(key)
+        if cached and cached[0] == etag:
+            self.stats["compressed_hits"] += 1
+            return cached[1]
+
+        loop = asyncio.get_running_loop()
+        body = await loop.run_in_executor(None, self._compress_file, path, encoding)
+        self.compressed[key] = (etag, body)
+        self.stats["compressed_builds"] += 1
+        return body
+
+    @staticmethod
+    def _compress_file(path, encoding):
+        data = path.read_bytes()
+        if encoding == "br":
+            return brotli.compress(data, mode=brotli.MODE_TEXT)
+        return gzip.compress(data, compresslevel=6)
+
+
+async def start_static_server(root, host, port, config=None, routes=None):
+    """静的ファイルサーバーを現在のイベントループ上で起動（routes: {パス: ハンドラー}）"""
+    static_server = StaticFileServer(root, config)
+    for path, handler in (routes or {}).items():
+        static_server.add_get(path, handler)
+    await static_server.start(host, port)
+    return static_server
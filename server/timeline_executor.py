@@ -1,4 +1,5 @@
 import asyncio
+import inspect
 import json
 from pathlib import Path
 from datetime import datetime
@@ -188,20 +189,26 @@ class TimelineExecutor:
         
         if obs_action == "switch_scene":
             scene_name = action.get("scene_name")
-            if self.obs_controller:
-                self.obs_controller.switch_scene(scene_name)
+            await self.call_obs("switch_scene", scene_name)
         
         elif obs_action == "update_text":
             source_name = action.get("source_name")
             text = action.get("text")
-            if self.obs_controller:
-                self.obs_controller.update_text_source(source_name, text)
+            await self.call_obs("update_text_source", source_name, text)
         
         elif obs_action == "set_source_visibility":
             source_name = action.get("source_name")
             visible = action.get("visible", True)
-            if self.obs_controller:
-                self.obs_controller.set_source_visibility(source_name, visible)
+            await self.call_obs("set_source_visibility", source_name, visible)
+    
+    async def call_obs(self, method_name, *args):
+        """OBS操作呼び出し（OBSController・AsyncOBSController の両方に対応）"""
+        if not self.obs_controller:
+            return None
+        result = getattr(self.obs_controller, method_name)(*args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
     
     async def send_text_to_obs(self):
         """OBSにテキスト情報送信"""
@@ -209,15 +216,18 @@ class TimelineExecutor:
             return
         
         timeline_data = self.zundamon_timeline
+        text_sources = {
+            "title": "title_text",
+            "listener_name": "listener_text",
+            "nickname": "nickname_text",
+            "other_text": "other_text",
+        }
         
-        if "title" in timeline_data:
-            self.obs_controller.update_text_source("title_text", timeline_data["title"])
-        if "listener_name" in timeline_data:
-            self.obs_controller.update_text_source("listener_text", timeline_data["listener_name"])
-        if "nickname" in timeline_data:
-            self.obs_controller.update_text_source("nickname_text", timeline_data["nickname"])
-        if "other_text" in timeline_data:
-            self.obs_controller.update_text_source("other_text", timeline_data["other_text"])
+        # 同時に発行して非同期コントローラー側で1バッチにまとめる（変化のないものは送られない）
+        await asyncio.gather(*(
+            self.call_obs("update_text_source", source_name, timeline_data[key])
+            for key, source_name in text_sources.items() if key in timeline_data
+        ))
     
     def pause(self):
         """タイムライン一時停止"""
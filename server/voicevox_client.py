@@ -1,9 +1,12 @@
 import aiohttp
 import asyncio
 import hashlib
+import os
 from pathlib import Path
 import logging
 
+from server.process_discovery import shared_discovery
+
 class VoicevoxClient:
     def __init__(self, config):
         self.config = config
@@ -13,6 +16,7 @@ class VoicevoxClient:
         self.audio_dir = Path(config["directories"]["audio_temp_dir"])
         self.audio_dir.mkdir(exist_ok=True)
         self.logger = logging.getLogger(__name__)
+        shared_discovery.apply_config(config)
     
     async def check_connection(self):
         """VOICEVOX接続確認"""
@@ -45,11 +49,29 @@ class VoicevoxClient:
             self.logger.error(f"話者一覧取得エラー: {e}")
             return []
     
+    def speaker_id_for(self, character: str) -> int:
+        """キャラクター名から話者IDを取得（未知のキャラクターはずんだもん）"""
+        characters = self.config["characters"]
+        return characters.get(character, characters["zundamon"])["voice_id"]
+
+    def audio_path_for(self, text: str, speaker_id: int, speed: float = 1.0, pitch: float = 0.0, intonation: float = 1.0) -> Path:
+        """合成結果の保存先（テキストと合成パラメータが同じなら同じファイル）"""
+        key = f"{speaker_id}|{speed}|{pitch}|{intonation}|{text}"
+        text_hash = hashlib.md5(key.encode()).hexdigest()[:16]
+        return self.audio_dir / f"speech_{speaker_id}_{text_hash}.wav"
+
     async def synthesize_speech(self, text: str, speaker_id: int = None, speed: float = 1.0, pitch: float = 0.0, intonation: float = 1.0):
-        """音声合成"""
+        """音声合成（合成済みのファイルがあればそれを返す）"""
         if speaker_id is None:
             speaker_id = self.config["characters"]["zundamon"]["voice_id"]
-        
+
+        audio_path = self.audio_path_for(text, speaker_id, speed, pitch, intonation)
+        if audio_path.exists():
+            # 古いファイル削除の対象から外す
+            os.utime(audio_path)
+            self.logger.info(f"音声キャッシュ使用: {audio_path}")
+            return str(audio_path)
+
         try:
             # 音声クエリ生成
             query_params = {
@@ -84,14 +106,11 @@ class VoicevoxClient:
                         self.logger.error(f"VOICEVOX 合成エラー: {response.status}")
                         return None
                     
-                    # ファイル名生成（テキストのハッシュ値を使用）
-                    text_hash = hashlib.md5(text.encode()).hexdigest()[:8]
-                    audio_filename = f"speech_{speaker_id}_{text_hash}.wav"
-                    audio_path = self.audio_dir / audio_filename
-                    
-                    # 音声ファイル保存
-                    with open(audio_path, "wb") as f:
+                    # 音声ファイル保存（書きかけを別スレッドのキャッシュ参照に見せないよう一時ファイル経由）
+                    temp_path = audio_path.with_suffix(f".{os.getpid()}.{id(query_data)}.tmp")
+                    with open(temp_path, "wb") as f:
                         f.write(await response.read())
+                    os.replace(temp_path, audio_path)
                     
                     self.logger.info(f"音声ファイル生成: {audio_path}")
                     return str(audio_path)
@@ -99,6 +118,19 @@ class VoicevoxClient:
         except Exception as e:
             self.logger.error(f"VOICEVOX エラー: {e}")
             return None
+
+    async def warm_speech(self, items, limit: int = None):
+        """(テキスト, キャラクター) の列を先に合成しておく（先頭から順に、合成済みは省略）
+
+        VOICEVOXの負荷を抑えるため1件ずつ合成する。合成できた件数を返す。
+        """
+        warmed = 0
+        for text, character in list(items)[:limit]:
+            if not text:
+                continue
+            if await self.synthesize_speech(text, speaker_id=self.speaker_id_for(character)):
+                warmed += 1
+        return warmed
     
     async def synthesize_speech_stream(self, text: str, speaker_id: int = None):
         """ストリーミング音声合成（未実装）"""
@@ -125,26 +157,29 @@ class VoicevoxClient:
         try:
             import subprocess
             import platform
-            import os
+            
+            # 起動済み（エンジン準備中）なら二重起動しない
+            pid = shared_discovery.find("voicevox")
+            if pid is not None:
+                self.logger.info(f"VOICEVOXは起動済みです (PID: {pid})")
+                return True
             
             if platform.system() == "Windows":
                 # Windows版VOICEVOX起動パス
                 voicevox_paths = [
+                    self.config.get("voicevox", {}).get("executable_path", ""),
                     "C:/utility/VOICEVOX/VOICEVOX.exe",  # ← あなたの環境
                     "C:/Program Files/VOICEVOX/VOICEVOX.exe",
                     "C:/Users/%USERNAME%/AppData/Local/Programs/VOICEVOX/VOICEVOX.exe",
                     "voicevox.exe"  # PATH環境変数から
                 ]
                 
-                for path in voicevox_paths:
-                    try:
-                        if path.endswith('.exe') and os.path.exists(path):
-                            self.logger.info(f"VOICEVOX起動中: {path}")
-                            subprocess.Popen([path], shell=False)
-                            return True
-                    except Exception as e:
-                        self.logger.debug(f"VOICEVOX起動試行失敗 {path}: {e}")
-                        continue
+                path = shared_discovery.find_executable([path for path in voicevox_paths if path])
+                if path:
+                    self.logger.info(f"VOICEVOX起動中: {path}")
+                    process = subprocess.Popen([path], shell=False)
+                    shared_discovery.remember("voicevox", process.pid)
+                    return True
             
             self.logger.warning("VOICEVOX実行ファイルが見つかりません")
             return False
@@ -162,8 +197,14 @@ class VoicevoxClient:
             if attempt == 0:
                 self.logger.info("VOICEVOX接続失敗。自動起動を試行...")
                 if self.start_voicevox():
-                    self.logger.info("VOICEVOX起動中...10秒待機")
-                    await asyncio.sleep(10)  # 起動待機
+                    # /version が応答した時点で準備完了（startup_wait は最大待機時間）
+                    from server.readiness import voicevox_probe, wait_for_probe
+                    startup_wait = self.config.get("voicevox", {}).get("startup_wait", 10)
+                    self.logger.info(f"VOICEVOX起動待機（最大{startup_wait}秒）...")
+                    result = await wait_for_probe(voicevox_probe(self.config), startup_wait)
+                    if result.ready:
+                        self.logger.info(f"VOICEVOX接続成功（起動{result.elapsed:.1f}秒）")
+                        return True
                 else:
                     self.logger.error("VOICEVOX自動起動失敗")
                     return False
@@ -0,0 +1,66 @@
+"""
+WAVの読み書き（標準の wave モジュール + NumPy）
+
+VOICEVOX の出力（16bit モノラル）を前提に、サンプルは -1〜1 の float32 モノラルで扱う。
+オフライン描画の口パク、音声ミックスダウン、応答テンプレートの連結で共通に使う。
+"""
+import wave
+from pathlib import Path
+
+import numpy as np
+
+
+def read_wav(path):
+    """WAVをモノラル float32（-1〜1）で読む → (サンプル列, サンプルレート)"""
+    with wave.open(str(path), "rb") as source:
+        rate = source.getframerate()
+        channels = source.getnchannels()
+        sample_width = source.getsampwidth()
+        data = source.readframes(source.getnframes())
+    if sample_width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    elif sample_width == 4:
+        samples = np.frombuffer(data, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"未対応のサンプル幅です: {sample_width}")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def resample(samples, source_rate, rate):
+    """サンプルレートを線形補間で合わせる"""
+    if source_rate == rate or not len(samples):
+        return samples
+    count = max(1, round(len(samples) * rate / source_rate))
+    positions = np.arange(count, dtype=np.float64) * (source_rate / rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def read_samples(path, rate):
+    """WAVをモノラル float32 で読み、サンプルレートを rate に合わせる"""
+    samples, source_rate = read_wav(path)
+    return resample(samples, source_rate, rate)
+
+
+def to_pcm16(samples):
+    """float32 のサンプル列を 16bit リトルエンディアンのバイト列に"""
+    return (np.clip(samples, -1.0, 32767 / 32768) * 32768.0).astype("<i2").tobytes()
+
+
+def open_wav_writer(path, rate):
+    """16bit モノラルで書き出す wave.Wave_write（writeframes(to_pcm16(...)) で追記する）"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    target = wave.open(str(path), "wb")
+    target.setnchannels(1)
+    target.setsampwidth(2)
+    target.setframerate(rate)
+    return target
+
+
+def write_wav(path, samples, rate):
+    """サンプル列を 16bit モノラルのWAVに書き出す"""
+    with open_wav_writer(path, rate) as target:
+        target.writeframes(to_pcm16(samples))
@@ -0,0 +1,101 @@
+"""
+送信メッセージエンコードのマイクロベンチマーク
+
+高頻度メッセージ（volume_level / blink / speech_start）について、
+利用可能なエンコーダごとの1メッセージあたりのエンコード時間と、
+クライアント数に対する「毎回エンコード」と「1回だけエンコード」の差を計測する。
+
+使い方:
+  python test/bench_message_codec.py [--number 100000] [--clients 30]
+"""
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server import message_codec
+from server.message_codec import OutboundMessage, encode_json
+
+HOT_MESSAGES = {
+    "volume_level": {"action": "volume_level", "level": 0.1234, "character": "zundamon"},
+    "blink": {"action": "blink", "character": "metan"},
+    "speech_start": {
+        "action": "speech_start",
+        "text": "みなさん、こんにちはなのだ！今日もずんだもんと一緒に楽しく配信するのだ！",
+        "character": "zundamon"
+    },
+}
+
+
+def available_encoders():
+    """計測対象のエンコーダ一覧"""
+    encoders = {
+        "json(stdlib)": lambda data: json.dumps(data, ensure_ascii=False),
+    }
+    try:
+        import orjson
+        encoders["orjson"] = orjson.dumps
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        encoders["msgspec"] = msgspec.json.Encoder().encode
+    except ImportError:
+        pass
+    encoders[f"encode_json({message_codec.ENCODER_NAME})"] = encode_json
+    return encoders
+
+
+def bench_encoders(number):
+    """エンコーダ別の1メッセージあたり時間"""
+    print(f"=== エンコード時間 (1メッセージあたり, {number}回平均) ===")
+    encoders = available_encoders()
+    header = f"{'message':<14}" + "".join(f"{name:>24}" for name in encoders)
+    print(header)
+    for message_name, message in HOT_MESSAGES.items():
+        row = f"{message_name:<14}"
+        for encoder in encoders.values():
+            elapsed = timeit.timeit(lambda: encoder(message), number=number)
+            row += f"{elapsed / number * 1e6:>21.3f} µs"
+        print(row)
+
+
+def bench_broadcast(number, clients):
+    """一斉送信時のエンコード回数による差"""
+    print(f"\n=== 一斉送信1回あたりのエンコード時間 (クライアント{clients}台) ===")
+    message = HOT_MESSAGES["volume_level"]
+
+    def encode_per_client():
+        for _ in range(clients):
+            json.dumps(message, ensure_ascii=False)
+
+    def encode_once():
+        shared = OutboundMessage.from_dict(message)
+        for _ in range(clients):
+            shared.data
+
+    rounds = max(1, number // clients)
+    per_client = timeit.timeit(encode_per_client, number=rounds) / rounds
+    once = timeit.timeit(encode_once, number=rounds) / rounds
+    print(f"  クライアントごとにjson.dumps: {per_client * 1e6:9.3f} µs")
+    print(f"  1回だけエンコードして共有   : {once * 1e6:9.3f} µs  ({per_client / once:.1f}倍高速)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="送信メッセージエンコードのベンチマーク")
+    parser.add_argument("--number", type=int, default=100000, help="計測回数")
+    parser.add_argument("--clients", type=int, default=30, help="想定クライアント数")
+    args = parser.parse_args()
+
+    print(f"使用エンコーダ: {message_codec.ENCODER_NAME}")
+    bench_encoders(args.number)
+    bench_broadcast(args.number, args.clients)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+テスト用の簡易 obs-websocket v5 サーバー
+
+OBS本体なしで AsyncOBSClient / AsyncOBSController を試すためのもの。
+シーン・入力・シーンアイテムをメモリ上で管理し、受け取ったリクエストを記録する。
+
+使い方（単体起動）:
+  python test/fake_obs_server.py [--port 4455] [--password secret]
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import secrets
+
+import websockets
+
+
+class FakeOBSServer:
+    def __init__(self, host="localhost", port=0, password="", media_duration_ms=1500, emit_media_end=True):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.media_duration_ms = media_duration_ms
+        self.emit_media_end = emit_media_end  # Falseなら再生終了イベントを送らない（取りこぼし再現）
+        self.scenes = {"ずんだもんシーン": []}  # sceneName -> [{"sceneItemId", "sourceName", "sceneItemEnabled"}]
+        self.inputs = {}  # inputName -> {"inputKind", "inputSettings"}
+        self.current_scene = "ずんだもんシーン"
+        self.next_item_id = 1
+        self.received = []  # (op, requestType or [requestType, ...])
+        self.clients = set()
+        self.server = None
+
+    async def start(self):
+        self.server = await websockets.serve(
+            self.handler, self.host, self.port, subprotocols=["obswebsocket.json"]
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    # --- 受信記録の参照 ---
+
+    def request_types(self):
+        """受信した単一リクエストの種別一覧"""
+        return [request for op, request in self.received if op == 6]
+
+    def batches(self):
+        """受信したバッチ（種別リスト）の一覧"""
+        return [request for op, request in self.received if op == 8]
+
+    # --- 接続処理 ---
+
+    async def handler(self, websocket):
+        salt = secrets.token_hex(8)
+        challenge = secrets.token_hex(8)
+        hello = {"obsWebSocketVersion": "5.0.0-fake", "rpcVersion": 1}
+        if self.password:
+            hello["authentication"] = {"salt": salt, "challenge": challenge}
+        await websocket.send(json.dumps({"op": 0, "d": hello}))
+
+        identify = json.loads(await websocket.recv())
+        if self.password and identify["d"].get("authentication") != self._expected_auth(salt, challenge):
+            await websocket.close(4009, "Authentication failed")
+            return
+        await websocket.send(json.dumps({"op": 2, "d": {"negotiatedRpcVersion": 1}}))
+
+        self.clients.add(websocket)
+        try:
+            async for raw in websocket:
+                message = json.loads(raw)
+                data = message["d"]
+                if message["op"] == 6:
+                    self.received.append((6, data["requestType"]))
+                    result = self.handle_request(data["requestType"], data.get("requestData", {}))
+                    result.update(requestId=data["requestId"], requestType=data["requestType"])
+                    await websocket.send(json.dumps({"op": 7, "d": result}))
+                elif message["op"] == 8:
+                    self.received.append((8, [r["requestType"] for r in data["requests"]]))
+                    results = []
+                    for request in data["requests"]:
+                        result = self.handle_request(request["requestType"], request.get("requestData", {}))
+                        result["requestType"] = request["requestType"]
+                        results.append(result)
+                        if data.get("haltOnFailure") and not result["requestStatus"]["result"]:
+                            break
+                    await websocket.send(json.dumps({"op": 9, "d": {"requestId": data["requestId"], "results": results}}))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.clients.discard(websocket)
+
+    def _expected_auth(self, salt, challenge):
+        secret = base64.b64encode(hashlib.sha256((self.password + salt).encode()).digest()).decode()
+        return base64.b64encode(hashlib.sha256((secret + challenge).encode()).digest()).decode()
+
+    async def emit(self, event_type, event_data=None):
+        """全クライアントにイベント送信"""
+        message = json.dumps({"op": 5, "d": {"eventType": event_type, "eventIntent": 0, "eventData": event_data or {}}})
+        for websocket in list(self.clients):
+            await websocket.send(message)
+
+    def emit_soon(self, event_type, event_data=None, delay=0.0):
+        asyncio.get_running_loop().call_later(
+            delay, lambda: asyncio.ensure_future(self.emit(event_type, event_data))
+        )
+
+    # --- リクエスト処理 ---
+
+    @staticmethod
+    def ok(response_data=None):
+        result = {"requestStatus": {"result": True, "code": 100}}
+        if response_data is not None:
+            result["responseData"] = response_data
+        return result
+
+    @staticmethod
+    def error(code, comment):
+        return {"requestStatus": {"result": False, "code": code, "comment": comment}}
+
+    def handle_request(self, request_type, data):
+        handler = getattr(self, f"req_{request_type}", None)
+        if not handler:
+            return self.error(204, f"Unknown request type: {request_type}")
+        return handler(data)
+
+    def req_GetVersion(self, data):
+        return self.ok({"obsVersion": "30.0.0-fake", "obsWebSocketVersion": "5.0.0-fake", "rpcVersion": 1})
+
+    def req_Sleep(self, data):
+        return self.ok()
+
+    def req_GetSceneList(self, data):
+        scenes = [{"sceneName": name, "sceneIndex": i} for i, name in enumerate(self.scenes)]
+        return self.ok({"currentProgramSceneName": self.current_scene, "scenes": scenes})
+
+    def req_GetCurrentProgramScene(self, data):
+        return self.ok({"currentProgramSceneName": self.current_scene})
+
+    def req_CreateScene(self, data):
+        name = data["sceneName"]
+        if name in self.scenes:
+            return self.error(601, f"A source already exists by that scene name: {name}")
+        self.scenes[name] = []
+        self.emit_soon("SceneCreated", {"sceneName": name, "isGroup": False})
+        return self.ok({"sceneUuid": name})
+
+    def req_SetCurrentProgramScene(self, data):
+        name = data["sceneName"]
+        if name not in self.scenes:
+            return self.error(600, f"No source was found by the name of `{name}`.")
+        self.current_scene = name
+        self.emit_soon("CurrentProgramSceneChanged", {"sceneName": name})
+        return self.ok()
+
+    def req_CreateInput(self, data):
+        name = data["inputName"]
+        scene = data["sceneName"]
+        if name in self.inputs:
+            return self.error(601, f"A source already exists by that input name: {name}")
+        if scene not in self.scenes:
+            return self.error(600, f"No source was found by the name of `{scene}`.")
+        self.inputs[name] = {"inputKind": data["inputKind"], "inputSettings": dict(data.get("inputSettings", {}))}
+        item_id = self._add_scene_item(scene, name)
+        self.emit_soon("InputCreated", {"inputName": name, "inputKind": data["inputKind"]})
+        return self.ok({"sceneItemId": item_id})
+
+    def _add_scene_item(self, scene, source_name):
+        item_id = self.next_item_id
+        self.next_item_id += 1
+        self.scenes[scene].append({"sceneItemId": item_id, "sourceName": source_name, "sceneItemEnabled": True})
+        self.emit_soon("SceneItemCreated", {"sceneName": scene, "sourceName": source_name, "sceneItemId": item_id})
+        return item_id
+
+    def req_GetInputList(self, data):
+        return self.ok({"inputs": [
+            {"inputName": name, "inputKind": entry["inputKind"]} for name, entry in self.inputs.items()
+        ]})
+
+    def req_RemoveInput(self, data):
+        name = data["inputName"]
+        if self.inputs.pop(name, None) is None:
+            return self.error(600, f"No source was found by the name of `{name}`.")
+        for items in self.scenes.values():
+            items[:] = [item for item in items if item["sourceName"] != name]
+        self.emit_soon("InputRemoved", {"inputName": name})
+        return self.ok()
+
+    def req_SetInputName(self, data):
+        old_name, new_name = data["inputName"], data["newInputName"]
+        if old_name not in self.inputs:
+            return self.error(600, f"No source was found by the name of `{old_name}`.")
+        self.inputs[new_name] = self.inputs.pop(old_name)
+        for items in self.scenes.values():
+            for item in items:
+                if item["sourceName"] == old_name:
+                    item["sourceName"] = new_name
+        self.emit_soon("InputNameChanged", {"oldInputName": old_name, "inputName": new_name})
+        return self.ok()
+
+    def req_GetInputSettings(self, data):
+        entry = self.inputs.get(data["inputName"])
+        if not entry:
+            return self.error(600, f"No source was found by the name of `{data['inputName']}`.")
+        return self.ok({"inputKind": entry["inputKind"], "inputSettings": entry["inputSettings"]})
+
+    def req_SetInputSettings(self, data):
+        name = data["inputName"]
+        entry = self.inputs.setdefault(name, {"inputKind": "text_gdiplus_v2", "inputSettings": {}})
+        entry["inputSettings"].update(data.get("inputSettings", {}))
+        self.emit_soon("InputSettingsChanged", {"inputName": name, "inputSettings": entry["inputSettings"]})
+        return self.ok()
+
+    def req_GetSceneItemList(self, data):
+        scene = data["sceneName"]
+        if scene not in self.scenes:
+            return self.error(600, f"No source was found by the name of `{scene}`.")
+        return self.ok({"sceneItems": [dict(item) for item in self.scenes[scene]]})
+
+    def req_GetSceneItemId(self, data):
+        for item in self.scenes.get(data["sceneName"], []):
+            if item["sourceName"] == data["sourceName"]:
+                return self.ok({"sceneItemId": item["sceneItemId"]})
+        return self.error(600, "No scene items were found in the specified scene by that name.")
+
+    def req_SetSceneItemEnabled(self, data):
+        for item in self.scenes.get(data["sceneName"], []):
+            if item["sceneItemId"] == data["sceneItemId"]:
+                item["sceneItemEnabled"] = data["sceneItemEnabled"]
+                self.emit_soon("SceneItemEnableStateChanged", {
+                    "sceneName": data["sceneName"],
+                    "sceneItemId": item["sceneItemId"],
+                    "sceneItemEnabled": item["sceneItemEnabled"]
+                })
+                return self.ok()
+        return self.error(600, "No scene item was found.")
+
+    def req_TriggerMediaInputAction(self, data):
+        name = data["inputName"]
+        if name not in self.inputs:
+            return self.error(600, f"No source was found by the name of `{name}`.")
+        self.emit_soon("MediaInputPlaybackStarted", {"inputName": name})
+        if self.emit_media_end:
+            self.emit_soon("MediaInputPlaybackEnded", {"inputName": name}, delay=self.media_duration_ms / 1000)
+        return self.ok()
+
+    def req_GetMediaInputStatus(self, data):
+        if data["inputName"] not in self.inputs:
+            return self.error(600, f"No source was found by the name of `{data['inputName']}`.")
+        return self.ok({"mediaState": "OBS_MEDIA_STATE_PLAYING", "mediaDuration": self.media_duration_ms, "mediaCursor": 0})
+
+
+async def serve_forever(port, password):
+    server = await FakeOBSServer(port=port, password=password).start()
+    print(f"フェイクOBS WebSocketサーバー起動: ws://localhost:{server.port}")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="テスト用フェイクOBS WebSocketサーバー")
+    parser.add_argument("--port", type=int, default=4455)
+    parser.add_argument("--password", default="")
+    args = parser.parse_args()
+    asyncio.run(serve_forever(args.port, args.password))
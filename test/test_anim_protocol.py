@@ -0,0 +1,111 @@
+"""
+アニメーション用バイナリサブプロトコル（zundamon.anim.v1）のテスト
+
+使い方:
+  python -m pytest test/test_anim_protocol.py
+"""
+import asyncio
+import json
+import struct
+import sys
+from pathlib import Path
+
+import pytest
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.anim_protocol import (ANIMATION_SUBPROTOCOL, MSG_VOLUME_FRAME, dequantize_level, encode_animation_entries,
+                                  pack_frame, quantize_level, select_subprotocol, unpack_frame)
+from server.client_fanout import BroadcastHub
+
+
+class FakeWebSocket:
+    def __init__(self, subprotocol=None):
+        self.subprotocol = subprotocol
+        self.sent = []
+
+    async def send(self, message, text=None):
+        self.sent.append(message)
+
+
+def test_frame_round_trip_and_layout():
+    entries = [
+        encode_animation_entries({"action": "volume_level", "character": "zundamon", "level": 0.5}),
+        encode_animation_entries({"action": "animation_frame", "levels": {"metan": 1.0, "zundamon": 0.0}}),
+    ]
+    frame = pack_frame(42, entries)
+
+    # ヘッダ <BBHB（5バイト）+ エントリ <BB（2バイト）×3
+    assert len(frame) == 5 + 3 * 2
+    assert struct.unpack_from("<BBHB", frame) == (1, MSG_VOLUME_FRAME, 42, 3)
+    assert struct.unpack_from("<BB", frame, 5) == (0, 128)
+    assert unpack_frame(frame) == (MSG_VOLUME_FRAME, 42, [
+        ("zundamon", dequantize_level(128)), ("metan", 1.0), ("zundamon", 0.0),
+    ])
+
+    with pytest.raises(ValueError):
+        unpack_frame(b"\x02" + frame[1:])
+
+
+def test_quantize_bounds():
+    assert [quantize_level(level) for level in (-0.5, 0.0, 0.5, 1.0, 1.5)] == [0, 0, 128, 255, 255]
+    assert dequantize_level(0) == 0.0 and dequantize_level(255) == 1.0
+    for step in range(101):
+        level = step / 100
+        assert abs(dequantize_level(quantize_level(level)) - level) <= 0.5 / 255 + 1e-9
+
+
+def test_sequence_wraps_around():
+    assert unpack_frame(pack_frame(0x10000 + 3, []))[1:] == (3, [])
+
+    async def scenario():
+        hub = BroadcastHub("テスト")
+        websocket = FakeWebSocket(ANIMATION_SUBPROTOCOL)
+        connection = hub.register(websocket)
+        connection.frame_seq = 0xFFFE
+        for level in (0.1, 0.2):
+            hub.broadcast({"action": "volume_level", "character": "zundamon", "level": level})
+            await asyncio.sleep(0.01)
+        hub.unregister(websocket)
+        return websocket.sent
+
+    assert [unpack_frame(frame)[1] for frame in asyncio.run(scenario())] == [0xFFFF, 0]
+
+
+def test_unsupported_levels_fall_back_to_json():
+    for data in (
+        {"action": "volume_level", "character": "unknown", "level": 0.5},
+        {"action": "volume_level", "character": "zundamon", "level": "0.5"},
+        {"action": "animation_frame", "levels": {"zundamon": 0.5, "metan": None}},
+        {"action": "animation_frame", "levels": {}},
+        {"action": "speech_start", "character": "zundamon"},
+    ):
+        assert encode_animation_entries(data) is None
+
+    async def scenario():
+        hub = BroadcastHub("テスト")
+        binary, plain = FakeWebSocket(ANIMATION_SUBPROTOCOL), FakeWebSocket()
+        hub.register(binary)
+        hub.register(plain)
+        hub.broadcast({"action": "volume_level", "character": "unknown", "level": 0.5})
+        hub.broadcast({"action": "volume_level", "character": "metan", "level": 0.25})
+        await asyncio.sleep(0.01)
+        hub.unregister(binary)
+        hub.unregister(plain)
+        return binary.sent, plain.sent
+
+    binary_sent, plain_sent = asyncio.run(scenario())
+    assert json.loads(binary_sent[0])["character"] == "unknown"
+    assert unpack_frame(binary_sent[1])[2] == [("metan", dequantize_level(quantize_level(0.25)))]
+    assert [json.loads(message)["character"] for message in plain_sent] == ["unknown", "metan"]
+
+
+def test_select_subprotocol():
+    # websockets 14以降: (connection, client_subprotocols)
+    assert select_subprotocol(object(), ["chat", ANIMATION_SUBPROTOCOL]) == ANIMATION_SUBPROTOCOL
+    assert select_subprotocol(object(), []) is None
+    # 旧API: (client_subprotocols, server_subprotocols)
+    assert select_subprotocol([ANIMATION_SUBPROTOCOL], [ANIMATION_SUBPROTOCOL]) == ANIMATION_SUBPROTOCOL
+    assert select_subprotocol(["zundamon.anim.v2"], [ANIMATION_SUBPROTOCOL]) is None
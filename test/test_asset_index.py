@@ -0,0 +1,131 @@
+"""
+立ち絵アセットのインデックス（マニフェスト）のテスト
+
+使い方:
+  python -m pytest test/test_asset_index.py
+"""
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+from PIL import Image
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.asset_index import AssetIndex
+from server.sprite_atlas import build_character_atlas
+from server.static_server import start_static_server
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_assets(root):
+    character_dir = root / "assets" / "zundamon_en"
+    for relative_path, data in {
+        "outfit2/body.png": b"body",
+        "outfit1/right_arm/basic.png": b"basic-1",
+        "outfit2/right_arm/basic.png": b"basic-2",
+        "outfit1/left_arm/waist.png": b"waist",
+        "mouth/muhu.png": b"muhu",
+    }.items():
+        path = character_dir / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    (character_dir / "mouth" / "muhu_position.json").write_text(
+        json.dumps({"name": "*むふ", "bbox": [1, 2, 3, 4], "canvas_size": [1082, 1650]}), encoding="utf-8"
+    )
+    (character_dir / "position_map.json").write_text(json.dumps({"canvas_size": [1082, 1650], "layers": {}}), encoding="utf-8")
+    aliases = root / "config" / "asset_aliases.json"
+    aliases.parent.mkdir()
+    aliases.write_text(json.dumps({"zundamon": {"body": "outfit2/body.png", "mouth_closed": "mouth/muhu.png"}}), encoding="utf-8")
+    config = {
+        "directories": {"assets_dir": "./assets", "atlas_dir": "./assets_atlas"},
+        "characters": {"zundamon": {"asset_dir": "zundamon_en"}, "metan": {"asset_dir": "shikoku_metan_en"}},
+    }
+    return character_dir, config
+
+
+def test_manifest_is_cached_until_files_change(tmp_path):
+    character_dir, config = make_assets(tmp_path)
+    clock = FakeClock()
+    index = AssetIndex(config, tmp_path, clock=clock)
+
+    manifest = index.get()
+    zundamon = manifest["characters"]["zundamon"]
+    assert "metan" not in manifest["characters"]  # ディレクトリがないキャラクターは含めない
+    assert zundamon["base"] == "/assets/zundamon_en"
+    assert zundamon["canvas_size"] == [1082, 1650]
+    assert zundamon["atlas"] is None
+    assets = zundamon["assets"]
+    # 別名とファイル名のキーの両方で引ける（腕は _right/_left 付き、重複はパス順で先のもの）
+    assert assets["mouth_closed"] is assets["muhu"]
+    assert assets["muhu"]["bbox"] == [1, 2, 3, 4]
+    assert assets["basic_right"]["file"] == "outfit1/right_arm/basic.png"
+    assert assets["waist_left"]["file"] == "outfit1/left_arm/waist.png"
+    assert index.stats["hashed"] == 5
+
+    # 確認間隔内はファイルシステムを走査しない
+    scans = []
+    scan_signature = index._scan_signature
+    index._scan_signature = lambda: scans.append(1) or scan_signature()
+    assert index.get() is manifest
+    assert scans == []
+
+    # 変更がなければ再構築もハッシュ計算もしない
+    clock.now = 2.0
+    assert index.get() is manifest
+    assert scans == [1]
+    assert index.stats == {"builds": 1, "hits": 2, "hashed": 5}
+
+    # 変わったファイルだけハッシュを取り直す
+    old_hash = assets["body"]["hash"]
+    body = character_dir / "outfit2" / "body.png"
+    body.write_bytes(b"new body")
+    os.utime(body, ns=(body.stat().st_atime_ns, body.stat().st_mtime_ns + 1_000_000))
+    assert index.get() is manifest  # 次の確認までは前のまま
+    clock.now = 4.0
+    rebuilt = index.get()
+    assert rebuilt["characters"]["zundamon"]["assets"]["body"]["hash"] != old_hash
+    assert index.stats["builds"] == 2
+    assert index.stats["hashed"] == 6
+
+
+def test_manifest_includes_current_atlas_and_is_served(tmp_path):
+    character_dir = tmp_path / "assets" / "zundamon_en"
+    character_dir.mkdir(parents=True)
+    Image.new("RGBA", (20, 20), (0, 255, 0, 255)).save(character_dir / "body.png")
+    build_character_atlas(character_dir, tmp_path / "assets_atlas" / "zundamon_en", max_size=64)
+    config = {"characters": {"zundamon": {"asset_dir": "zundamon_en"}}}
+    index = AssetIndex(config, tmp_path)
+
+    async def scenario():
+        async def handle(request):
+            body, etag = index.get_body()
+            return web.Response(body=body, content_type="application/json", headers={"ETag": etag})
+
+        server = await start_static_server(tmp_path, "localhost", 0, routes={"/api/assets": handle})
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://localhost:{server.port}/api/assets") as response:
+                    assert response.status == 200
+                    return await response.json()
+        finally:
+            await server.stop()
+
+    manifest = asyncio.run(scenario())
+    zundamon = manifest["characters"]["zundamon"]
+    assert zundamon["atlas"]["base"] == "/assets_atlas/zundamon_en"
+    assert zundamon["assets"]["body"]["frame"] == "zundamon_en/body"
+    assert zundamon["atlas"]["frames"]["zundamon_en/body"] == 0
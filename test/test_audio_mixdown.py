@@ -0,0 +1,77 @@
+"""
+番組全体の音声ミックスダウンのテスト
+
+使い方:
+  python -m pytest test/test_audio_mixdown.py
+"""
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.audio_mixdown import mix_lines
+from server.offline_renderer import schedule_lines, show_duration
+
+RATE = 8000
+
+
+def make_wav(path, seconds, level, rate=RATE):
+    samples = np.full(int(rate * seconds), int(level * 32767), dtype="<i2")
+    with wave.open(str(path), "wb") as target:
+        target.setnchannels(1)
+        target.setsampwidth(2)
+        target.setframerate(rate)
+        target.writeframes(samples.tobytes())
+
+
+def read_mix(path):
+    with wave.open(str(path), "rb") as source:
+        assert source.getframerate() == RATE
+        return np.frombuffer(source.readframes(source.getnframes()), dtype="<i2").astype(np.float32) / 32768.0
+
+
+def test_lines_are_placed_on_the_render_schedule(tmp_path):
+    make_wav(tmp_path / "a.wav", 0.5, 0.3)
+    make_wav(tmp_path / "b.wav", 0.5, 0.2, rate=RATE * 2)  # レートが違えば合わせる
+    timeline = {"timeline": [
+        {"time": 0.0, "character": "zundamon", "text": "いち"},
+        {"time": 0.2, "character": "metan", "text": "に"},
+    ]}
+    audio = {"いち": tmp_path / "a.wav", "に": tmp_path / "b.wav"}
+    lines = schedule_lines(timeline, lambda action: audio[action["text"]], fps=10, speech_end_wait=0.25)
+    duration = show_duration(lines, 0.25)
+
+    stats = mix_lines(lines, tmp_path / "show.wav", rate=RATE, duration=duration, gain_db={"metan": 6.0})
+    mix = read_mix(tmp_path / "show.wav")
+    assert len(mix) == round(duration * RATE)
+    assert stats["placed"] == 2 and stats["overlap_seconds"] == 0.0
+    # 1行目は 0〜0.5秒、2行目は 0.75秒から（+6dB ≒ 2倍）
+    assert abs(mix[int(0.25 * RATE)] - 0.3) < 1e-3
+    assert abs(mix[int(0.6 * RATE)]) < 1e-3
+    assert abs(mix[int(1.0 * RATE)] - 0.2 * 10 ** (6 / 20)) < 1e-3
+
+
+def test_overlapping_lines_are_limited_independent_of_chunk_size(tmp_path):
+    make_wav(tmp_path / "a.wav", 1.0, 0.6)
+    timeline = {"timeline": [
+        {"time": 0.0, "character": "zundamon", "text": "いち"},
+        {"time": 0.5, "character": "metan", "text": "に"},
+    ]}
+    lines = schedule_lines(timeline, lambda action: tmp_path / "a.wav", fps=10, serialize=False)
+
+    stats = mix_lines(lines, tmp_path / "long.wav", rate=RATE, chunk_seconds=10.0)
+    small = mix_lines(lines, tmp_path / "short.wav", rate=RATE, chunk_seconds=0.07)
+    assert np.array_equal(read_mix(tmp_path / "long.wav"), read_mix(tmp_path / "short.wav"))
+
+    mix = read_mix(tmp_path / "long.wav")
+    assert abs(stats["overlap_seconds"] - 0.5) < 1e-6
+    assert stats["max_active"] == 2 and small["max_active"] == 2
+    assert stats["peak"] > 1.0
+    assert stats["limited_samples"] == int(0.5 * RATE)
+    # 重なった部分は 1.0 を超えず、クリップではなくリミッターで丸める
+    assert 0.9 < mix[int(0.75 * RATE)] < 1.0
@@ -0,0 +1,131 @@
+"""
+WebSocketクライアントへの非ブロッキング一斉送信のテスト
+
+使い方:
+  python -m pytest test/test_client_fanout.py
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.client_fanout import BroadcastHub, ClientConnection, coalesce_key_for
+
+
+class FakeWebSocket:
+    """送ったメッセージを記録する（stall=True なら send が終わらない）"""
+
+    subprotocol = None
+
+    def __init__(self, stall=False):
+        self.stall = stall
+        self.sent = []
+        self.close_codes = []
+
+    async def send(self, message, text=None):
+        if self.stall:
+            await asyncio.Event().wait()
+        self.sent.append(json.loads(message))
+
+    async def close(self, code=1000, reason=""):
+        self.close_codes.append(code)
+
+
+def volume(level, character="zundamon"):
+    return {"action": "volume_level", "level": level, "character": character}
+
+
+def payloads(connection):
+    return [json.loads(entry[1].data) for entry in connection.queue]
+
+
+def test_pending_messages_are_coalesced_in_place():
+    async def scenario():
+        hub = BroadcastHub("テスト")
+        connection = ClientConnection(FakeWebSocket(), hub)
+        for data in ({"action": "blink"}, volume(0.1), volume(0.2, "metan"), volume(0.3)):
+            assert connection.enqueue(hub.encode(data), coalesce_key_for(data))
+        return connection
+
+    connection = asyncio.run(scenario())
+    # 未送信の同じキャラクターの音量は最新値で上書きされ、位置は最初のまま
+    assert payloads(connection) == [{"action": "blink"}, volume(0.3), volume(0.2, "metan")]
+    assert connection.stats["coalesced"] == 1
+    assert set(connection.pending) == {("volume_level", "zundamon"), ("volume_level", "metan")}
+
+
+def test_frames_are_not_coalesced_across_state_changes():
+    async def scenario():
+        hub = BroadcastHub("テスト")
+        websocket = FakeWebSocket()
+        connection = ClientConnection(websocket, hub)
+        frames = [{"action": "animation_frame", "levels": {"zundamon": level}} for level in (0.8, 0.4, 0.2)]
+        for data in (frames[0], {"action": "speech_end"}, frames[1], frames[2]):
+            assert connection.enqueue(hub.encode(data), coalesce_key_for(data))
+        connection.start()
+        await asyncio.sleep(0.01)
+        connection.close()
+        return websocket.sent, frames
+
+    sent, frames = asyncio.run(scenario())
+    # speech_end より前のフレームは上書きせず、次の発話の値は speech_end の後に届く
+    assert sent == [frames[0], {"action": "speech_end"}, frames[2]]
+
+
+def test_full_queue_drops_oldest_coalescable_then_rejects():
+    async def scenario():
+        hub = BroadcastHub("テスト", max_queue=3, slow_client_grace=60.0)
+        connection = ClientConnection(FakeWebSocket(), hub)
+        assert connection.enqueue(hub.encode(volume(0.1)), coalesce_key_for(volume(0.1)))
+        assert connection.enqueue(hub.encode({"action": "speech_start"}))
+        assert connection.enqueue(hub.encode(volume(0.2)), coalesce_key_for(volume(0.2)))
+        # 満杯なら置き換え可能な古いメッセージを捨てて空きを作る（speech_start より前の音量も対象）
+        assert connection.enqueue(hub.encode({"action": "blink"}))
+        dropped = (payloads(connection), dict(connection.pending), connection.stats["dropped"])
+        # 残りの置き換え可能メッセージを捨てた後はハード上限（max_queue×4）まで積み、超えたら断る
+        accepted = [connection.enqueue(hub.encode({"action": "blink", "n": n})) for n in range(11)]
+        return connection, dropped, accepted
+
+    connection, dropped, accepted = asyncio.run(scenario())
+    assert dropped == ([{"action": "speech_start"}, volume(0.2), {"action": "blink"}], {}, 1)
+    assert accepted == [True] * 10 + [False]
+    assert len(connection.queue) == 12 and connection.stats["dropped"] == 2
+    assert connection.full_since is not None
+
+
+def test_queue_full_beyond_grace_is_rejected():
+    async def scenario():
+        hub = BroadcastHub("テスト", max_queue=1, slow_client_grace=0.05)
+        connection = ClientConnection(FakeWebSocket(), hub)
+        results = [connection.enqueue(hub.encode({"action": "blink"})) for _ in range(2)]
+        await asyncio.sleep(0.1)
+        results.append(connection.enqueue(hub.encode({"action": "blink"})))
+        return results
+
+    assert asyncio.run(scenario()) == [True, True, False]
+
+
+def test_stalled_client_is_disconnected_without_blocking_others():
+    async def scenario():
+        hub = BroadcastHub("テスト", max_queue=2, send_timeout=60.0, slow_client_grace=0.05)
+        fast, stalled = FakeWebSocket(), FakeWebSocket(stall=True)
+        hub.register(fast)
+        stalled_connection = hub.register(stalled)
+        for n in range(10):
+            hub.broadcast({"action": "speech_start", "n": n})
+            await asyncio.sleep(0.02)
+        await asyncio.sleep(0.05)
+        # 送信が終わらないクライアントは登録解除され、1008 で閉じられる
+        assert list(hub.clients) == [fast]
+        assert stalled.close_codes == [1008]
+        assert stalled.sent == []
+        assert stalled_connection.closed and stalled_connection.task.done()
+        assert not stalled_connection.enqueue(hub.encode({"action": "blink"}))
+        return fast
+
+    fast = asyncio.run(scenario())
+    assert [message["n"] for message in fast.sent] == list(range(10))
@@ -0,0 +1,138 @@
+"""
+コメント受付キューのテスト
+
+使い方:
+  python -m pytest test/test_comment_queue.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.comment_queue import CommentQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def comment(text, username="viewer"):
+    return {"username": username, "text": text}
+
+
+def test_priority_order_and_dedup_window():
+    clock = FakeClock()
+    queue = CommentQueue(max_depth=10, dedup_window=5.0, special_users=["mod"], clock=clock)
+    assert queue.put(comment("こんにちは"))
+    assert queue.put(comment("面白い"))
+    assert queue.put(comment("これはなぜ？"))
+    assert queue.put(comment("すごい", username="mod"))
+    # 全角半角・大文字小文字・空白だけ違うものは同じコメント扱い
+    assert not queue.put(comment("これは なぜ?"))
+    assert queue.metrics()["deduplicated"] == 1
+
+    order = []
+    while (entry := queue.get_nowait()) is not None:
+        order.append((entry.username, entry.text))
+    assert order == [("mod", "すごい"), ("viewer", "これはなぜ？"), ("viewer", "面白い"), ("viewer", "こんにちは")]
+
+    # 窓を過ぎれば同じ内容でも受け付ける
+    clock.now = 4.0
+    assert not queue.put(comment("面白い"))
+    clock.now = 6.0
+    assert queue.put(comment("面白い"))
+
+
+def test_drop_policies_and_metrics():
+    clock = FakeClock()
+    queue = CommentQueue(max_depth=3, dedup_window=0.0, max_wait=10.0, clock=clock)
+    for text in ["こんにちは1", "こんにちは2", "通常1"]:
+        queue.put(comment(text))
+    # 満杯なら最も低いクラス（あいさつ）の古いものから捨てる
+    assert queue.put(comment("通常2"))
+    assert [entry.text for entry in sorted(queue.heap)] == ["通常1", "通常2", "こんにちは2"]
+    assert queue.put(comment("こんにちは3"))  # 同じクラスなら新しい方を残す
+    assert queue.put(comment("質問？"))
+    assert not queue.put(comment("こんにちは4"))  # 新着の方が低ければ新着を捨てる
+
+    metrics = queue.metrics()
+    assert metrics["depth"] == 3
+    assert metrics["depth_by_class"] == {"special": 0, "question": 1, "normal": 2, "greeting": 0}
+    assert metrics["dropped"] == 4
+    assert metrics["peak_depth"] == 3
+
+    clock.now = 2.0
+    assert queue.get_nowait().text == "質問？"
+    clock.now = 20.0  # 待ちすぎたコメントは捨てる
+    assert queue.get_nowait() is None
+    metrics = queue.metrics()
+    assert metrics["served"] == 1 and metrics["expired"] == 2
+    assert metrics["wait_avg"] == 2.0 and metrics["wait_max"] == 2.0
+
+    oldest = CommentQueue(max_depth=2, drop_policy="oldest", clock=clock)
+    for text in ["質問1？", "通常", "こんにちは"]:
+        oldest.put(comment(text))
+    assert sorted(entry.text for entry in oldest.heap) == ["こんにちは", "通常"]
+
+
+def test_get_waits_for_next_comment():
+    async def scenario():
+        queue = CommentQueue()
+        waiter = asyncio.create_task(queue.get())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        queue.put(comment("やっほー"))
+        entry = await asyncio.wait_for(waiter, 1.0)
+        assert entry.text == "やっほー"
+        assert len(queue) == 0
+
+    asyncio.run(scenario())
+
+
+def test_pipeline_prepares_next_replies_while_playing():
+    from server.comment_pipeline import CommentPipeline
+
+    async def scenario():
+        queue = CommentQueue(dedup_window=0.0, max_wait=0)
+        events = []
+
+        async def prepare(entry):
+            events.append(("prepare", entry.text))
+            await asyncio.sleep(0.05)
+            return f"audio:{entry.text}"
+
+        async def play(entry, reply, on_start):
+            events.append(("play", reply))
+            on_start()
+            await asyncio.sleep(0.05)
+
+        pipeline = CommentPipeline(queue, prepare, play, lookahead=2)
+        runner = asyncio.create_task(pipeline.run())
+        for text in ["いち", "に", "さん"]:
+            queue.put(comment(text))
+        await asyncio.sleep(0.08)
+        queue.put(comment("よん"))  # 再生中に届いたものも準備を始める
+        while pipeline.stats["replies"] < 4:
+            await asyncio.sleep(0.01)
+        runner.cancel()
+        return pipeline, events
+
+    pipeline, events = asyncio.run(scenario())
+    assert [reply for kind, reply in events if kind == "play"] == ["audio:いち", "audio:に", "audio:さん", "audio:よん"]
+    # 1件目の再生が始まる前に、次の応答の準備が始まっている
+    assert events.index(("prepare", "に")) < events.index(("play", "audio:いち"))
+    assert events.index(("prepare", "よん")) < events.index(("play", "audio:さん"))
+
+    metrics = pipeline.metrics()
+    assert metrics["replies"] == 4 and metrics["failed"] == 0
+    assert metrics["ready_on_turn"] >= 3  # 2件目以降は順番が来た時点で合成済み
+    assert [record["text"] for record in metrics["recent"]] == ["いち", "に", "さん", "よん"]
+    assert all(record["ttfa"] is not None for record in metrics["recent"])
+    assert metrics["recent"][1]["ttfa"] < 0.05 + 0.05 + 0.05  # 準備を待たずに前の再生のすぐ後
@@ -0,0 +1,72 @@
+"""
+口パク用フレーム化（ティックレート自動調整）のテスト
+
+使い方:
+  python -m pytest test/test_frame_batcher.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.frame_batcher import AnimationFrameBatcher
+
+
+class FakeHub:
+    def __init__(self):
+        self.messages = []
+
+    def broadcast(self, data):
+        self.messages.append(data)
+
+
+def test_rate_adapts_once_per_interval_for_many_clients():
+    batcher = AnimationFrameBatcher(FakeHub(), frame_rate=60, min_frame_rate=10)
+    slow, *healthy = [object() for _ in range(5)]
+
+    # 1クライアントの取りこぼし + 正常な4クライアントの報告 → 1段階だけ下げる
+    batcher.report_client_stats(slow, {"received": 100, "dropped": 20})
+    for client in healthy:
+        batcher.report_client_stats(client, {"received": 100, "dropped": 0})
+    assert batcher.frame_rate == 60  # 報告だけでは変えない
+    batcher.adapt_frame_rate()
+    assert batcher.frame_rate == 45
+
+    # 報告は調整ごとに捨てる（古い取りこぼし率で下げ続けない）
+    batcher.adapt_frame_rate()
+    assert batcher.frame_rate == 45
+
+    # 全員が正常なら、クライアント数によらず1段階だけ上げる
+    batcher.report_client_stats(slow, {"received": 100, "dropped": 0})
+    for client in healthy:
+        batcher.report_client_stats(client, {"received": 100, "dropped": 0})
+    batcher.adapt_frame_rate()
+    assert batcher.frame_rate == 50
+
+    # 表示レートが上限になる（切断したクライアントの分は外す）
+    batcher.report_client_stats(healthy[0], {"received": 10, "dropped": 0, "display_rate": 30})
+    batcher.adapt_frame_rate()
+    assert batcher.frame_rate == 30
+    batcher.forget_client(healthy[0])
+    batcher.report_client_stats(slow, {"received": 10, "dropped": 0})
+    batcher.adapt_frame_rate()
+    assert batcher.frame_rate == 35
+
+
+def test_run_coalesces_updates_into_frames():
+    async def scenario():
+        hub = FakeHub()
+        batcher = AnimationFrameBatcher(hub, frame_rate=50)
+        runner = asyncio.create_task(batcher.run())
+        for level in (0.1, 0.2, 0.3):
+            batcher.update("zundamon", level)
+        await asyncio.sleep(0.05)
+        runner.cancel()
+        return hub, batcher
+
+    hub, batcher = asyncio.run(scenario())
+    assert hub.messages == [{"action": "animation_frame", "seq": 1, "levels": {"zundamon": 0.3}}]
+    assert batcher.stats == {"updates": 3, "frames": 1}
@@ -0,0 +1,94 @@
+"""
+コメント振り分け用のキーワード照合のテスト
+
+使い方:
+  python -m pytest test/test_keyword_matcher.py
+"""
+import json
+import random
+import sys
+from pathlib import Path
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.comment_queue import CommentQueue
+from server.keyword_matcher import KeywordIndex, KeywordMatcher
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_matches_every_category_with_positions():
+    matcher = KeywordMatcher({
+        "greeting": ["こんにちは", "Hello"],
+        "question": ["?", "どう"],
+        "ng": ["にち", "ちは"],
+    })
+    assert len(matcher) == 6
+    assert matcher.classify("HELLO、こんにちは！どうして?") == {
+        "greeting": [(0, 5, "Hello"), (6, 11, "こんにちは")],
+        "ng": [(8, 10, "にち"), (9, 11, "ちは")],
+        "question": [(12, 14, "どう"), (16, 17, "?")],
+    }
+    assert matcher.classify("ふつうのコメント") == {}
+
+
+def test_matches_same_as_naive_scan():
+    rng = random.Random(0)
+    alphabet = "あいうアイab"
+    keywords = {
+        f"c{index}": ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(20)]
+        for index in range(5)
+    }
+    matcher = KeywordMatcher(keywords)
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet + "AB") for _ in range(rng.randint(0, 30)))
+        expected = sorted(
+            (start, start + len(word), category, word)
+            for category, words in keywords.items() for word in set(words)
+            for start in range(len(text) - len(word) + 1) if text[start:start + len(word)].lower() == word
+        )
+        assert sorted(matcher.find_all(text)) == expected
+
+
+def test_keyword_file_is_reloaded_without_restart(tmp_path):
+    path = tmp_path / "keywords.json"
+    path.write_text(json.dumps({"question": ["？"], "ng": []}), encoding="utf-8")
+    clock = FakeClock()
+    index = KeywordIndex(path, check_interval=1.0, clock=clock)
+    queue = CommentQueue(dedup_window=0.0, keywords=index)
+
+    assert queue.put({"username": "a", "text": "ばか？"})
+    assert queue.get_nowait().matches == {"question": [(2, 3, "？")]}
+
+    path.write_text(json.dumps({"question": ["？"], "ng": ["ばか"]}), encoding="utf-8")
+    clock.now = 2.0
+    assert not queue.put({"username": "a", "text": "ばか？"})  # NGワードは受け付けない
+    assert queue.metrics()["blocked"] == 1
+    assert index.stats["builds"] == 2
+
+    # 壊れたファイルでは前のキーワードを使い続ける
+    path.write_text("{", encoding="utf-8")
+    clock.now = 4.0
+    assert "ng" in index.classify("ばか")
+    assert index.stats["errors"] == 1
+
+    # 形の違うファイル（リストだけ、カテゴリが文字列）も読み込みエラーとして前のキーワードを使い続ける
+    for broken in (["ばか"], {"question": "どう"}):
+        path.write_text(json.dumps(broken, ensure_ascii=False), encoding="utf-8")
+        clock.now += 2.0
+        assert not queue.put({"username": "a", "text": "ばか？"})
+        assert index.classify("どう") == {}
+    assert index.stats["errors"] == 3
+    assert index.stats["builds"] == 2
+
+    # 最初から壊れていれば既定のキーワード
+    fresh = KeywordIndex(path, clock=clock)
+    assert "question" in fresh.classify("なぜ")
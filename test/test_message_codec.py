@@ -0,0 +1,79 @@
+"""
+送信メッセージのエンコードのテスト
+
+orjson / msgspec / 標準 json のどれが使われても同じバイト列になることを確認する
+（インストールされていないエンコーダのテストはスキップ）。
+
+使い方:
+  python -m pytest test/test_message_codec.py
+"""
+import asyncio
+import importlib
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server import message_codec
+from server.client_fanout import BroadcastHub, ClientConnection
+
+MESSAGES = [
+    {"action": "volume_level", "level": 0.1234, "character": "zundamon"},
+    {"action": "speech_start", "text": "こんにちはなのだ！\n\"引用\"", "character": "metan"},
+    {"action": "animation_frame", "levels": {"zundamon": 0.5, "metan": 0.0}, "seq": 3, "ok": True, "none": None},
+]
+ENCODER_MODULES = {"orjson": [], "msgspec": ["orjson"], "json": ["orjson", "msgspec"]}
+
+
+@pytest.fixture(params=list(ENCODER_MODULES))
+def codec(request, monkeypatch):
+    """指定したエンコーダを使うように読み直した message_codec"""
+    name = request.param
+    if name != "json":
+        pytest.importorskip(name)
+    for blocked in ENCODER_MODULES[name]:
+        monkeypatch.setitem(sys.modules, blocked, None)
+    module = importlib.reload(message_codec)
+    assert module.ENCODER_NAME == name
+    yield module
+    monkeypatch.undo()
+    importlib.reload(message_codec)
+
+
+def test_output_is_identical_across_encoders(codec):
+    for message in MESSAGES:
+        expected = json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        assert codec.encode_json(message) == expected
+
+
+def test_numpy_scalars_are_encoded(codec):
+    message = {"action": "volume_level", "level": np.float64(0.25), "frame": np.int64(7), "peak": np.float32(0.5)}
+    assert json.loads(codec.encode_json(message)) == {"action": "volume_level", "level": 0.25, "frame": 7, "peak": 0.5}
+    with pytest.raises(TypeError):
+        codec.encode_json({"action": "bad", "value": object()})
+
+
+def test_encoded_bytes_are_shared_across_clients():
+    class FakeWebSocket:
+        subprotocol = None
+
+        async def send(self, message, text=None):
+            pass
+
+    async def scenario():
+        hub = BroadcastHub("テスト")
+        connections = [ClientConnection(FakeWebSocket(), hub) for _ in range(3)]
+        hub.clients = {connection.websocket: connection for connection in connections}
+        hub.broadcast(MESSAGES[1])
+        return [connection.queue[0][1] for connection in connections]
+
+    first, *others = asyncio.run(scenario())
+    assert all(message is first for message in others)
+    assert json.loads(first.data) == MESSAGES[1]
+    assert first.text is first.text  # デコードも初回の1回だけ
@@ -0,0 +1,281 @@
+"""
+非同期OBSクライアントのテスト（フェイクOBSサーバー使用）
+
+使い方:
+  python -m pytest test/test_obs_async_client.py
+  python test/test_obs_async_client.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_obs_server import FakeOBSServer
+from server.obs_async_client import AsyncOBSClient, OBSRequestError
+from server.obs_async_controller import AsyncOBSController
+
+
+def make_config(port, password=""):
+    return {
+        "servers": {
+            "obs_websocket_host": "localhost",
+            "obs_websocket_port": port,
+            "obs_password": password
+        },
+        "obs": {"request_timeout": 2.0}
+    }
+
+
+def test_identify_with_password_and_request():
+    async def scenario():
+        async with FakeOBSServer(password="secret") as server:
+            client = AsyncOBSClient("localhost", server.port, "secret")
+            await client.connect()
+            assert client.negotiated_rpc_version == 1
+
+            version = await client.call("GetVersion")
+            assert version["rpcVersion"] == 1
+
+            try:
+                await client.call("SetCurrentProgramScene", {"sceneName": "存在しないシーン"})
+                assert False, "OBSRequestError が発生するはず"
+            except OBSRequestError as e:
+                assert e.code == 600
+            await client.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_wrong_password_is_rejected():
+    async def scenario():
+        async with FakeOBSServer(password="secret") as server:
+            controller = AsyncOBSController(make_config(server.port, "wrong"))
+            assert await controller.connect() is False
+            assert not controller.is_connected()
+
+    asyncio.run(scenario())
+
+
+def test_prepare_media_scene_is_single_batch():
+    async def scenario():
+        async with FakeOBSServer() as server:
+            controller = AsyncOBSController(make_config(server.port))
+            assert await controller.connect()
+            server.received.clear()  # 接続時の状態読み込み分
+
+            assert await controller.prepare_media_scene("オープニング", "オープニング動画", "opening.mp4")
+            assert server.batches() == [[
+                "CreateScene", "CreateInput", "SetCurrentProgramScene", "TriggerMediaInputAction"
+            ]]
+            assert server.request_types() == []
+            assert server.current_scene == "オープニング"
+
+            # 2回目は作成が失敗しても切り替え・再生は成功扱い
+            assert await controller.prepare_media_scene("オープニング", "オープニング動画", "opening.mp4")
+            assert await controller.get_current_scene() == "オープニング"
+            assert await controller.get_media_duration("オープニング動画") == 1.5
+            await controller.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_preloaded_media_scene_switches_without_create():
+    async def scenario():
+        async with FakeOBSServer() as server:
+            # 前回の配信で作られたソースが残っている
+            server.scenes["エンディング"] = []
+            server.inputs["エンディング動画"] = {"inputKind": "ffmpeg_source", "inputSettings": {"local_file": "/old.mp4"}}
+            server._add_scene_item("エンディング", "エンディング動画")
+
+            controller = AsyncOBSController(make_config(server.port))
+            assert await controller.connect()
+            server.received.clear()
+
+            # 先読みは作成（残っているソースはファイル差し替え）だけで、切り替え・再生はしない
+            await asyncio.gather(
+                controller.prepare_media_scene("オープニング", "オープニング動画", "opening.mp4", switch=False, play=False),
+                controller.prepare_media_scene("エンディング", "エンディング動画", "ending.mp4", switch=False, play=False),
+            )
+            assert sorted(server.batches()) == [["CreateScene", "CreateInput"], ["SetInputSettings"]]
+            assert server.current_scene == "ずんだもんシーン"
+            assert server.inputs["エンディング動画"]["inputSettings"]["local_file"].endswith("/ending.mp4")
+
+            # 切り替え時は作成要求なし
+            server.received.clear()
+            assert await controller.prepare_media_scene("オープニング", "オープニング動画", "opening.mp4")
+            assert server.batches() == [["SetCurrentProgramScene", "TriggerMediaInputAction"]]
+            await controller.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_events_are_dispatched():
+    async def scenario():
+        async with FakeOBSServer() as server:
+            client = AsyncOBSClient("localhost", server.port)
+            await client.connect()
+            changed = asyncio.get_running_loop().create_future()
+            client.on_event("CurrentProgramSceneChanged", lambda data: changed.set_result(data["sceneName"]))
+
+            await client.call("CreateScene", {"sceneName": "エンディング"})
+            await client.call("SetCurrentProgramScene", {"sceneName": "エンディング"})
+            assert await asyncio.wait_for(changed, 2.0) == "エンディング"
+            await client.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_wait_for_media_end_returns_on_event():
+    async def scenario():
+        async with FakeOBSServer(media_duration_ms=300) as server:
+            controller = AsyncOBSController(make_config(server.port))
+            assert await controller.connect()
+            loop = asyncio.get_running_loop()
+
+            await controller.prepare_media_scene("開演準備", "準備動画", "prep.mp4")
+            started = loop.time()
+            assert await controller.wait_for_media_end("準備動画") is True
+            # 再生時間＋猶予（2秒）ではなくイベント受信で戻る
+            assert loop.time() - started < 1.0
+            await controller.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_media_end_before_wait_is_not_lost():
+    async def scenario():
+        async with FakeOBSServer(media_duration_ms=50) as server:
+            controller = AsyncOBSController(make_config(server.port))
+            assert await controller.connect()
+            loop = asyncio.get_running_loop()
+
+            await controller.prepare_media_scene("開演準備", "準備動画", "prep.mp4")
+            await asyncio.sleep(0.3)  # 待機を始める前に再生終了イベントが届く
+            started = loop.time()
+            assert await controller.wait_for_media_end("準備動画") is True
+            assert loop.time() - started < 0.5
+            assert controller.media_end_futures == {}
+
+            # 次の再生では新しい終了を待つ
+            await controller.play_media_source("準備動画")
+            assert not controller.media_end_futures["準備動画"].done()
+            assert await controller.wait_for_media_end("準備動画") is True
+            await controller.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_wait_for_media_end_falls_back_to_duration():
+    async def scenario():
+        async with FakeOBSServer(media_duration_ms=200, emit_media_end=False) as server:
+            config = make_config(server.port)
+            config["obs"]["media_end_grace"] = 0.1
+            controller = AsyncOBSController(config)
+            assert await controller.connect()
+
+            await controller.prepare_media_scene("エンディング", "エンディング動画", "ending.mp4")
+            assert await controller.wait_for_media_end("エンディング動画") is False
+            assert controller.media_end_futures == {}
+            await controller.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_state_cache_answers_from_memory_and_follows_events():
+    async def scenario():
+        async with FakeOBSServer() as server:
+            server.scenes["配信シーン"] = []
+            server.inputs["title_text"] = {"inputKind": "text_gdiplus_v2", "inputSettings": {}}
+            server._add_scene_item("配信シーン", "title_text")
+
+            controller = AsyncOBSController(make_config(server.port))
+            assert await controller.connect()
+            assert controller.state.scene_item_id("配信シーン", "title_text") == 1
+
+            # 一覧・現在シーンは問い合わせなし
+            before = len(server.received)
+            assert await controller.get_scene_list() == ["ずんだもんシーン", "配信シーン"]
+            assert await controller.get_current_scene() == "ずんだもんシーン"
+            assert len(server.received) == before
+
+            # 表示切替はキャッシュ済みIDで SetSceneItemEnabled の1往復だけ
+            assert await controller.switch_scene("配信シーン")
+            before = len(server.received)
+            assert await controller.set_source_visibility("title_text", False)
+            assert server.received[before:] == [(6, "SetSceneItemEnabled")]
+            assert server.scenes["配信シーン"][0]["sceneItemEnabled"] is False
+            assert controller.state.is_scene_item_enabled("配信シーン", "title_text") is False
+
+            # 他のクライアントによる変更もイベントで反映される
+            other = AsyncOBSClient("localhost", server.port)
+            await other.connect()
+            await other.call("CreateScene", {"sceneName": "休憩"})
+            await other.call("CreateInput", {
+                "sceneName": "休憩", "inputName": "休憩画像", "inputKind": "image_source", "inputSettings": {}
+            })
+            await other.call("SetInputName", {"inputName": "title_text", "newInputName": "タイトル"})
+            await other.call("SetCurrentProgramScene", {"sceneName": "休憩"})
+            await other.disconnect()
+            await asyncio.sleep(0.1)
+
+            assert await controller.get_current_scene() == "休憩"
+            assert "休憩" in await controller.get_scene_list()
+            assert controller.state.scene_item_id("休憩", "休憩画像") == server.scenes["休憩"][0]["sceneItemId"]
+            assert controller.state.scene_item_id("配信シーン", "タイトル") == 1
+            assert controller.state.scene_item_id("配信シーン", "title_text") is None
+
+            await controller.disconnect()
+            assert controller.state.loaded is False
+
+    asyncio.run(scenario())
+
+
+def test_redundant_calls_are_suppressed_and_same_tick_calls_batched():
+    async def scenario():
+        async with FakeOBSServer() as server:
+            controller = AsyncOBSController(make_config(server.port))
+            assert await controller.connect()
+            server.received.clear()
+
+            texts = {"title_text": "配信テスト", "listener_text": "ずんだ", "nickname_text": "ずん"}
+            await asyncio.gather(*(controller.update_text_source(name, text) for name, text in texts.items()))
+            assert server.batches() == [["SetInputSettings"] * 3]
+
+            # 同じ値の再送と現在シーンへの切り替えは送らない
+            await asyncio.gather(*(controller.update_text_source(name, text) for name, text in texts.items()))
+            assert await controller.switch_scene("ずんだもんシーン")
+            assert len(server.received) == 1
+
+            # 同じティック内の同じ入力への更新は1リクエストに統合（後勝ち）
+            await asyncio.gather(
+                controller.update_text_source("title_text", "途中"),
+                controller.update_text_source("title_text", "最終"),
+            )
+            assert server.received[-1] == (6, "SetInputSettings")
+            assert server.inputs["title_text"]["inputSettings"]["text"] == "最終"
+
+            stats = controller.get_stats()
+            assert stats == {"sent": 4, "suppressed": 4, "merged": 1, "batches": 1}
+            await controller.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_disconnected_controller_is_noop():
+    async def scenario():
+        controller = AsyncOBSController(make_config(1))
+        assert await controller.switch_scene("ずんだもんシーン") is False
+        assert await controller.get_scene_list() == []
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
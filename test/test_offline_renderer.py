@@ -0,0 +1,133 @@
+"""
+オフライン描画のテスト
+
+使い方:
+  python -m pytest test/test_offline_renderer.py
+"""
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.offline_renderer import CharacterRig, FrameRenderer, OfflineRenderer, read_envelope, schedule_lines
+
+LAYERS = [
+    {"texture": "body"},
+    {"live": "eyeWhite", "default": "normal_white_eye", "blink": "sleepy_eye"},
+    {"live": "mouth", "default": "muhu"},
+]
+MOUTH = {"closed": "muhu", "half_open": "hoa", "open": "hoaa", "threshold_open": 0.22, "threshold_half_open": 0.15}
+
+
+def make_layer(path, box, color, canvas=(100, 100)):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    image = Image.new("RGBA", canvas, (0, 0, 0, 0))
+    image.paste(Image.new("RGBA", (box[2] - box[0], box[3] - box[1]), color), box[:2])
+    image.save(path)
+    return {"file": path.name, "bbox": list(box)}
+
+
+def make_wav(path, seconds, amplitude, rate=8000):
+    samples = (np.sin(np.arange(int(rate * seconds)) * 0.3) * amplitude * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as target:
+        target.setnchannels(1)
+        target.setsampwidth(2)
+        target.setframerate(rate)
+        target.writeframes(samples.tobytes())
+
+
+def make_rig(tmp_path):
+    character_dir = tmp_path / "zundamon_en"
+    assets = {
+        "body": make_layer(character_dir / "body.png", (20, 10, 80, 95), (250, 220, 200, 255)),
+        "normal_white_eye": make_layer(character_dir / "eye.png", (35, 30, 65, 40), (255, 255, 255, 255)),
+        "sleepy_eye": make_layer(character_dir / "sleepy.png", (35, 34, 65, 37), (60, 40, 40, 255)),
+        "muhu": make_layer(character_dir / "muhu.png", (45, 50, 55, 53), (120, 30, 30, 255)),
+        "hoa": make_layer(character_dir / "hoa.png", (44, 50, 56, 58), (200, 40, 40, 128)),
+    }
+    config = {"layers": LAYERS, "mouth": MOUTH}
+    return CharacterRig("zundamon", config, {}, {"assets": assets}, character_dir, {"x": 10, "y": 0, "scale": 1.0})
+
+
+def test_dirty_rect_frames_match_full_redraw(tmp_path):
+    rig = make_rig(tmp_path)
+    renderer = FrameRenderer(120, 100, (0, 177, 64))
+    reference = FrameRenderer(120, 100, (0, 177, 64))
+    states = [
+        (None, False, 1.0), (0.0, False, 1.0), (0.18, False, 1.0), (0.18, False, 1.0),
+        (0.0, True, 1.0), (None, False, 0.5), (0.18, False, 1.0),
+    ]
+    changed_flags = []
+    for level, blinking, brightness in states:
+        sprites = rig.sprites({"expression": "normal"}, level, blinking, brightness)
+        frame, changed = renderer.render(sprites)
+        changed_flags.append(changed)
+        expected, _ = reference.render(sprites, full=True)
+        assert np.array_equal(frame, expected)
+    # 同じ状態が続いたフレームは描き直さない
+    assert changed_flags == [True, False, True, False, True, True, True]
+    # 口の開閉だけなら口の範囲だけ描き直す
+    assert renderer.stats["dirty_pixels"] < reference.stats["dirty_pixels"] / 2
+
+
+def test_timeline_drives_mouth_with_audio_envelope(tmp_path):
+    make_wav(tmp_path / "line1.wav", 1.0, 0.5)
+    envelope, duration = read_envelope(tmp_path / "line1.wav", fps=10)
+    assert len(envelope) == 10
+    assert abs(duration - 1.0) < 1e-6
+    assert 0.9 < envelope.mean() <= 1.0  # RMS 0.35 ×3 → 上限 1.0
+
+    timeline = {"timeline": [
+        {"time": 0.0, "character": "zundamon", "text": "こんにちは", "expression": "happy"},
+        {"time": 0.5, "character": "zundamon", "text": "音声なし"},
+    ]}
+    audio = {"こんにちは": tmp_path / "line1.wav"}
+    lines = schedule_lines(timeline, lambda action: audio.get(action["text"]), fps=10, speech_end_wait=0.5)
+    # 2行目は1行目の音声が終わってから（終了＋0.5秒）、長さは文字数から見積もり
+    assert [(line.start, round(line.end, 2)) for line in lines] == [(0.0, 1.0), (1.5, 2.1)]
+    assert lines[1].envelope is None
+
+    rig = make_rig(tmp_path)
+    config = {"characters": {"zundamon": {}}, "timeline": {"speech_end_wait": 0.5}}
+    renderer = OfflineRenderer(config, {"zundamon": rig}, lines, fps=10, width=120, height=100, background=(0, 0, 0))
+    mouth_pixel = (56, 10 + 46)  # (y, x) 半開きの口だけが描く位置（閉じていれば体の色）
+    frames = [tuple(frame[mouth_pixel]) for _, frame, _ in renderer.frames()]
+    assert renderer.frame_count == 26
+    assert frames[2] != (250, 220, 200)  # 1行目は口が開く
+    assert frames[18] == (250, 220, 200)  # 音声なしの2行目は閉じたまま
+
+
+def test_parallel_segments_match_single_process(tmp_path):
+    from server.parallel_renderer import render_parallel, split_segments
+
+    assert split_segments(100, [30, 52, 80], 4) == [(0, 30), (30, 52), (52, 80), (80, 100)]
+    assert split_segments(100, [], 4) == [(0, 100)]
+
+    make_wav(tmp_path / "line1.wav", 0.8, 0.5)
+    make_wav(tmp_path / "line2.wav", 0.6, 0.1)
+    timeline = {"timeline": [
+        {"time": 0.0, "character": "zundamon", "text": "いち"},
+        {"time": 1.0, "character": "zundamon", "text": "に"},
+        {"time": 2.0, "character": "zundamon", "text": "さん", "blink": False},
+    ]}
+    audio = {"いち": tmp_path / "line1.wav", "に": tmp_path / "line2.wav", "さん": tmp_path / "line1.wav"}
+
+    def make_renderer():
+        lines = schedule_lines(timeline, lambda action: audio[action["text"]], fps=10, speech_end_wait=0.3)
+        config = {"characters": {"zundamon": {}}, "timeline": {"speech_end_wait": 0.3}}
+        return OfflineRenderer(config, {"zundamon": make_rig(tmp_path)}, lines, fps=10, width=120, height=100)
+
+    expected = [frame.copy() for _, frame, _ in make_renderer().frames()]
+    stats = render_parallel(make_renderer(), frames_dir=tmp_path / "frames", workers=2)
+    assert stats["frames"] == len(expected)
+    assert len(stats["segments"]) == 3  # セリフの開始位置で区切る
+    assert sum(worker["frames"] for worker in stats["per_worker"].values()) == len(expected)
+    for number, frame in enumerate(expected):
+        with Image.open(tmp_path / "frames" / f"frame_{number:06d}.png") as image:
+            assert np.array_equal(np.asarray(image), frame)
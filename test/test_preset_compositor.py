@@ -0,0 +1,97 @@
+"""
+プリセット別の立ち絵合成のテスト
+
+使い方:
+  python -m pytest test/test_preset_compositor.py
+"""
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.preset_compositor import build_stack, compose_character, is_current
+
+LAYERS = [
+    {"texture": "body"},
+    {"preset": "outfits", "field": "clothes"},
+    {"preset": "poses", "field": "rightArm", "suffix": "_right", "default": "basic"},
+    {"live": "eyeBlack", "default": "normal_eye"},
+    {"live": "mouth", "default": "muhu"},
+    {"texture": "front_hair"},
+]
+
+PRESETS = {
+    "outfits": {"usual": {"clothes": "usual_clothes"}, "casual": {"clothes": None}},
+    "poses": {"basic": {"rightArm": "basic"}, "point": {"rightArm": "point"}, "wave": {"rightArm": "wave"}},
+}
+
+
+def make_layer(path, box, color, canvas=(100, 100)):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    image = Image.new("RGBA", canvas, (0, 0, 0, 0))
+    image.paste(Image.new("RGBA", (box[2] - box[0], box[3] - box[1]), color), box[:2])
+    image.save(path)
+
+
+def test_static_layers_are_baked_per_outfit_and_pose(tmp_path):
+    character_dir = tmp_path / "zundamon_en"
+    files = {
+        "body": ("outfit2/body.png", (30, 10, 70, 90), (255, 220, 200, 255)),
+        "usual_clothes": ("outfit1/usual_clothes.png", (30, 40, 70, 80), (0, 128, 0, 255)),
+        "basic_right": ("outfit1/right_arm/basic.png", (20, 40, 30, 70), (255, 0, 0, 255)),
+        "point_right": ("outfit1/right_arm/point.png", (5, 40, 30, 50), (0, 0, 255, 255)),
+        "front_hair": ("front_hair.png", (30, 5, 70, 20), (0, 255, 0, 255)),
+    }
+    assets = {}
+    for name, (relative_path, box, color) in files.items():
+        make_layer(character_dir / relative_path, box, color)
+        assets[name] = {"file": relative_path}
+    output_dir = tmp_path / "composite"
+
+    manifest = compose_character("zundamon", LAYERS, PRESETS, character_dir, assets, output_dir)
+
+    # 静的パーツは live の前後で2グループ、スプライト数は 6 → 4
+    assert manifest["stack"] == build_stack(LAYERS)[0]
+    assert [layer.get("group", layer.get("live")) for layer in manifest["stack"]] == [0, "eyeBlack", "mouth", 1]
+    assert manifest["stats"]["sprites_before"] == 6
+    assert manifest["stats"]["sprites_after"] == 4
+
+    usual_point = manifest["images"][manifest["combos"]["usual/point"][0]]
+    assert usual_point["layers"] == ["outfit2/body.png", "outfit1/usual_clothes.png", "outfit1/right_arm/point.png"]
+    assert usual_point["offset"] == [5, 10]
+    with Image.open(output_dir / usual_point["file"]) as image:
+        # 後から重ねたパーツが手前に来る
+        assert image.getpixel((50 - 5, 60 - 10)) == (0, 128, 0, 255)
+        assert image.getpixel((10 - 5, 45 - 10)) == (0, 0, 255, 255)
+
+    # 衣装なし（None）は服を描かない、見つからないポーズは既定の腕
+    casual_basic = manifest["images"][manifest["combos"]["casual/basic"][0]]
+    assert casual_basic["layers"] == ["outfit2/body.png", "outfit1/right_arm/basic.png"]
+    assert manifest["combos"]["usual/wave"] == manifest["combos"]["usual/basic"]
+    # 前髪グループは全組み合わせで同じ画像を共有
+    assert len({ids[1] for ids in manifest["combos"].values()}) == 1
+    assert manifest["stats"]["images"] == 5
+
+    # 変更がなければ再生成しない、プリセットや元ファイルが変われば古い扱い
+    assert is_current(manifest, character_dir, PRESETS, LAYERS)
+    assert compose_character("zundamon", LAYERS, PRESETS, character_dir, assets, output_dir) == manifest
+    assert not is_current(manifest, character_dir, {**PRESETS, "outfits": {"usual": {"clothes": "usual_clothes"}}}, LAYERS)
+    make_layer(character_dir / "front_hair.png", (30, 5, 70, 25), (0, 255, 0, 255))
+    assert not is_current(manifest, character_dir, PRESETS, LAYERS)
+
+    # 作り直しても変わらない画像は残り、使われなくなった画像はマニフェストを書いた後に消える
+    kept = {entry["file"] for digest, entry in manifest["images"].items() if digest != manifest["combos"]["usual/basic"][1]}
+    rebuilt = compose_character("zundamon", LAYERS, PRESETS, character_dir, assets, output_dir)
+    files = {entry["file"] for entry in rebuilt["images"].values()}
+    assert kept <= files
+    assert sorted(path.name for path in output_dir.glob("c_*.png")) == sorted(files)
+    assert not list(output_dir.glob(".*.tmp"))
+
+    # マニフェストに載っている画像が消えていれば作り直す
+    (output_dir / usual_point["file"]).unlink()
+    assert compose_character("zundamon", LAYERS, PRESETS, character_dir, assets, output_dir) == rebuilt
+    assert (output_dir / usual_point["file"]).exists()
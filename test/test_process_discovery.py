@@ -0,0 +1,68 @@
+"""
+プロセス検出（PIDキャッシュ）のテスト
+
+使い方:
+  python -m pytest test/test_process_discovery.py
+"""
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import psutil
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.process_discovery import ProcessDiscovery
+
+
+def test_cached_pid_is_reused_without_rescan():
+    name = psutil.Process().name()
+    discovery = ProcessDiscovery({"self": (name,), "missing": ("no-such-process.exe",)})
+
+    pid = discovery.find("self")
+    assert pid is not None
+    assert psutil.Process(pid).name().lower() == name.lower()
+    assert discovery.stats["scans"] == 1
+
+    assert discovery.find("self") == pid
+    assert discovery.stats == {"hits": 1, "scans": 1}
+
+    # 見つからない対象は毎回走査するが、見つかった対象のキャッシュは保持される
+    assert discovery.find("missing") is None
+    assert discovery.find("self") == pid
+    assert discovery.stats == {"hits": 2, "scans": 2}
+
+
+def test_dead_pid_triggers_rescan():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        discovery = ProcessDiscovery({"child": ("no-such-process.exe",)})
+        discovery.remember("child", child.pid)
+        assert discovery.find("child") == child.pid
+        assert discovery.stats["scans"] == 0
+    finally:
+        child.kill()
+        child.wait()
+
+    assert discovery.find("child") is None
+    assert discovery.stats["scans"] == 1
+
+
+def test_find_executable_uses_path_lookup():
+    discovery = ProcessDiscovery()
+    python_name = os.path.basename(sys.executable)
+    found = discovery.find_executable(["/no/such/dir/obs64.exe", python_name])
+    assert found == shutil.which(python_name)
+    assert discovery.find_executable(["/no/such/dir/obs64.exe"]) is None
+
+
+def test_missing_executable_is_found_after_install(tmp_path):
+    discovery = ProcessDiscovery()
+    executable = tmp_path / "obs64.exe"
+    assert discovery.find_executable([str(executable)]) is None
+    executable.write_bytes(b"")
+    assert discovery.find_executable([str(executable)]) == str(executable)
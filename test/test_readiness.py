@@ -0,0 +1,68 @@
+"""
+起動レディネスプローブのテスト
+
+使い方:
+  python -m pytest test/test_readiness.py
+"""
+import asyncio
+import socket
+import sys
+from pathlib import Path
+
+import websockets
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.readiness import ReadinessProbe, all_required_ready, tcp_probe, wait_for_all, wait_until_ready
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def test_proceeds_as_soon_as_component_is_ready():
+    sessions = []
+
+    async def handler(websocket):
+        sessions.append(websocket)
+        await websocket.wait_closed()
+
+    async def scenario():
+        port = free_port()
+
+        async def start_later():
+            await asyncio.sleep(0.3)
+            return await websockets.serve(handler, "localhost", port)
+
+        server_task = asyncio.create_task(start_later())
+        results = await wait_for_all([tcp_probe("WebSocket", "localhost", port)], timeout=5.0, interval=0.05)
+        server = await server_task
+        await asyncio.sleep(0.1)
+        server.close()
+        await server.wait_closed()
+        return results
+
+    result, = asyncio.run(scenario())
+    assert result.ready
+    assert 0.3 <= result.elapsed < 1.0
+    assert result.attempts > 1
+    # プローブはハンドラーまで届かない（クライアントとして登録されない）
+    assert sessions == []
+
+
+def test_optional_probe_does_not_block_readiness():
+    async def always_ready():
+        return True
+
+    results = wait_until_ready([
+        ReadinessProbe("準備済み", always_ready),
+        tcp_probe("未起動", "localhost", free_port(), required=False),
+    ], timeout=0.3, interval=0.05)
+
+    assert [r.ready for r in results] == [True, False]
+    assert results[1].error is not None
+    assert all_required_ready(results)
@@ -0,0 +1,111 @@
+"""
+応答テンプレートの合成済み音声バンクのテスト
+
+使い方:
+  python -m pytest test/test_response_bank.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.response_bank import ResponseBank, join_with_crossfade, split_template
+from server.wav_io import read_wav, write_wav
+
+RATE = 8000
+PAD = 800  # VOICEVOX と同じく前後に 0.1 秒の無音
+
+
+class FakeVoicevox:
+    """テキストごとに長さの違う音を返す（前後に無音つき）"""
+
+    def __init__(self, audio_dir):
+        self.audio_dir = audio_dir
+        self.requests = []
+
+    def speaker_id_for(self, character):
+        return {"zundamon": 3, "metan": 2}[character]
+
+    async def synthesize_speech(self, text, speaker_id=None):
+        self.requests.append(text)
+        if text == "！":
+            return None
+        path = self.audio_dir / f"speech_{speaker_id}_{len(self.requests)}.wav"
+        voiced = np.full(len(text) * 100, 0.5, dtype=np.float32)
+        write_wav(path, np.concatenate([np.zeros(PAD), voiced, np.zeros(PAD)]), RATE)
+        return str(path)
+
+
+def test_split_template_and_crossfade():
+    assert split_template("{username}さん、こんにちは") == [None, "さん、こんにちは"]
+    assert split_template("うーん、{username}さんの質問") == ["うーん、", None, "さんの質問"]
+    assert split_template("{count}件目") is None
+
+    first = np.concatenate([np.zeros(100), np.ones(50), np.zeros(100)]).astype(np.float32)
+    second = np.concatenate([np.zeros(100), np.full(50, 0.5), np.zeros(100)]).astype(np.float32)
+    joined = join_with_crossfade([first, second], fade=10)
+    # つなぎ目の無音を詰める: 先頭の無音100 + 50 + 余白10 と 余白10 + 50 + 末尾の無音100 を10サンプル重ねる
+    assert len(joined) == (100 + 50 + 10) + (10 + 50 + 100) - 10
+    assert np.all(joined[100:150] == 1.0)
+    assert np.all(joined[160:210] == 0.5)
+
+
+def test_fixed_parts_are_synthesized_once_and_usernames_cached(tmp_path):
+    voicevox = FakeVoicevox(tmp_path)
+    templates = {
+        "greeting": ["{username}さん、こんにちはなのだ！", "やっほー、{username}さん！"],
+        "broken": ["{username}！"],
+    }
+    bank = ResponseBank(voicevox, templates, rate=RATE, crossfade=0.005, regular_viewers=["常連"])
+
+    async def scenario():
+        warmed = await bank.warm()
+        requests_after_warm = list(voicevox.requests)
+        first = await bank.render("{username}さん、こんにちはなのだ！", "たろう")
+        second = await bank.render("やっほー、{username}さん！", "たろう")
+        regular = await bank.render("{username}さん、こんにちはなのだ！", "常連")
+        again = await bank.render("{username}さん、こんにちはなのだ！", "たろう")
+        broken = await bank.render("{username}！", "たろう")
+        return warmed, requests_after_warm, first, second, regular, again, broken
+
+    warmed, requests_after_warm, first, second, regular, again, broken = asyncio.run(scenario())
+    # 固定部分3件（"！" は合成できない）+ 常連1人
+    assert warmed == 4
+    assert requests_after_warm == ["さん、こんにちはなのだ！", "やっほー、", "さん！", "！", "常連"]
+    # 応答時に合成するのはユーザー名だけ（常連・2回目以降は合成なし、合成できなかった部分は再試行）
+    assert voicevox.requests[len(requests_after_warm):] == ["たろう", "！"]
+    assert again == first
+    assert broken is None  # 合成できない部分があれば全文合成に任せる
+    assert bank.metrics()["rendered"] == 3 and bank.metrics()["reused"] == 1
+    assert bank.metrics()["username_hits"] == 3
+
+    samples, rate = read_wav(first)
+    assert rate == RATE
+    fade = round(0.005 * RATE)
+    # 名前(300) と 固定部分(1200) のつなぎ目の無音を詰めて、前後の無音だけ残す
+    assert len(samples) == PAD + 300 + fade + fade + 1200 + PAD - fade
+    assert np.allclose(samples[PAD:PAD + 300], 0.5, atol=1e-3)
+
+
+def test_concurrent_renders_share_one_write(tmp_path):
+    voicevox = FakeVoicevox(tmp_path)
+    bank = ResponseBank(voicevox, {"greeting": ["{username}さん、こんにちは！"]}, rate=RATE)
+
+    async def scenario():
+        return await asyncio.gather(*(bank.render("{username}さん、こんにちは！", "たろう") for _ in range(3)))
+
+    paths = asyncio.run(scenario())
+    # 先読みで重なった同じ応答は1回だけ合成・連結して、同じファイルを返す
+    assert len(set(paths)) == 1
+    assert voicevox.requests == ["たろう", "さん、こんにちは！"]
+    assert bank.metrics()["rendered"] == 1 and bank.metrics()["reused"] == 2
+    assert bank.rendering == {}
+    assert sorted(path.name for path in tmp_path.glob("reply_*")) == [Path(paths[0]).name]
+    assert not list(tmp_path.glob(".*.tmp"))
+    samples, rate = read_wav(paths[0])
+    assert rate == RATE and len(samples) > 0
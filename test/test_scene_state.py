@@ -0,0 +1,92 @@
+"""
+キャラクター・シーン状態ストアのテスト
+
+使い方:
+  python -m pytest test/test_scene_state.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server import main
+from server.frame_batcher import AnimationFrameBatcher
+from server.scene_state import SceneStateStore
+
+
+class FakeHub:
+    def __init__(self):
+        self.clients = {}
+        self.broadcasts = []
+
+    def broadcast(self, data):
+        self.broadcasts.append(data)
+
+
+def test_repeated_changes_are_not_broadcast(monkeypatch):
+    hub = FakeHub()
+    monkeypatch.setattr(main, "browser_hub", hub)
+    monkeypatch.setattr(main, "frame_batcher", AnimationFrameBatcher(hub))
+    monkeypatch.setattr(main, "scene_state", SceneStateStore())
+
+    messages = [
+        {"action": "change_expression", "character": "zundamon", "preset": "smile"},
+        {"action": "change_expression", "character": "zundamon", "preset": "smile"},
+        {"action": "change_pose", "character": "metan", "preset": "basic"},  # 初期状態と同じ
+        {"action": "speech_start", "character": "metan"},
+        {"action": "change_outfit", "preset": "casual"},  # character 省略時は現在の話者
+        {"action": "change_outfit", "character": "metan", "preset": "casual"},
+        {"action": "speech_end"},
+        {"action": "speech_end"},  # 状態以外の意味もあるので毎回送る
+        {"action": "blink", "character": "zundamon"},
+    ]
+
+    async def scenario():
+        for message in messages:
+            await main.broadcast_to_browser(message)
+
+    asyncio.run(scenario())
+    assert hub.broadcasts == [messages[index] for index in (0, 3, 4, 6, 7, 8)]
+
+    store = SceneStateStore()
+    assert [store.apply(message) for message in messages] == [True, False, False, True, True, False, True, True, None]
+
+
+def test_snapshot_matches_accumulated_state():
+    store = SceneStateStore()
+    store.apply_config({"characters": {"zundamon": {"default_expression": "normal", "default_outfit": "uniform"}}})
+    for message in (
+        {"action": "change_expression", "character": "zundamon", "preset": "smile"},
+        {"action": "change_expression", "character": "zundamon", "preset": "smile"},
+        {"action": "speech_start", "character": "metan"},
+        {"action": "change_pose", "preset": "point"},
+        {"action": "timeline_started", "project": "opening"},
+        {"action": "timeline_stopped"},
+    ):
+        store.apply(message)
+    store.set_scene("メイン")
+    store.set_scene("メイン")
+
+    message = store.snapshot_message({"position": 3})
+    assert message == {
+        "action": "state_snapshot",
+        "version": 7,
+        "state": {
+            "characters": {
+                "zundamon": {"expression": "smile", "pose": "basic", "outfit": "uniform"},
+                "metan": {"expression": "normal", "pose": "point", "outfit": "usual"},
+            },
+            "active_speaker": "metan",
+            "speaking": True,
+            "timeline": {"project": "opening", "running": False, "position": 3},
+            "scene": "メイン",
+        },
+    }
+
+    # スナップショットは複製（送信後に状態が変わっても送った内容は変わらない）
+    store.apply({"action": "change_expression", "character": "zundamon", "preset": "angry"})
+    assert message["state"]["characters"]["zundamon"]["expression"] == "smile"
+    assert store.snapshot_message()["version"] == 8
@@ -0,0 +1,92 @@
+"""
+テクスチャアトラス生成のテスト
+
+使い方:
+  python -m pytest test/test_sprite_atlas.py
+"""
+import json
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.sprite_atlas import build_character_atlas, build_from_config
+
+
+def make_layer(path, bbox, color, canvas=(200, 300)):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    image = Image.new("RGBA", canvas, (0, 0, 0, 0))
+    image.paste(Image.new("RGBA", (bbox[2] - bbox[0], bbox[3] - bbox[1]), color), bbox[:2])
+    image.save(path)
+
+
+def test_layers_are_trimmed_packed_and_reused(tmp_path):
+    character_dir = tmp_path / "assets" / "zundamon_en"
+    make_layer(character_dir / "eye" / "smile_eye.png", (40, 60, 90, 70), (0, 255, 0, 255))
+    make_layer(character_dir / "mouth" / "muhu.png", (80, 100, 100, 110), (255, 0, 0, 255))
+    make_layer(character_dir / "outfit1" / "body.png", (10, 20, 190, 280), (0, 0, 255, 255))
+    # 別ディレクトリの同一画像は同じ領域を共有する
+    make_layer(character_dir / "edamame" / "muhu_copy.png", (80, 100, 100, 110), (255, 0, 0, 255))
+    output_dir = tmp_path / "atlas" / "zundamon_en"
+
+    manifest = build_character_atlas(character_dir, output_dir, max_size=512, padding=2)
+    assert manifest["stats"]["layers"] == 4
+    assert manifest["stats"]["atlas_texture_bytes"] < manifest["stats"]["source_texture_bytes"]
+
+    frames = {}
+    for sheet in manifest["sheets"]:
+        data = json.loads((output_dir / sheet["file"]).read_text(encoding="utf-8"))
+        atlas = Image.open(output_dir / data["meta"]["image"].split("?")[0])
+        for name, frame in data["frames"].items():
+            frames[name] = frame
+            # 切り出した領域の中身が元のパーツと一致する
+            rect = frame["frame"]
+            crop = atlas.crop((rect["x"], rect["y"], rect["x"] + rect["w"], rect["y"] + rect["h"]))
+            assert crop.getchannel("A").getextrema() == (255, 255)
+
+    eye = frames["zundamon_en/eye/smile_eye"]
+    assert eye["spriteSourceSize"] == {"x": 40, "y": 60, "w": 50, "h": 10}
+    assert eye["sourceSize"] == {"w": 200, "h": 300}
+    assert frames["zundamon_en/mouth/muhu"]["frame"] == frames["zundamon_en/edamame/muhu_copy"]["frame"]
+
+    # 元ファイルに変更がなければ再生成しない
+    atlas_mtime = (output_dir / "atlas_0.png").stat().st_mtime_ns
+    assert build_character_atlas(character_dir, output_dir, max_size=512, padding=2) == manifest
+    assert (output_dir / "atlas_0.png").stat().st_mtime_ns == atlas_mtime
+
+
+def test_large_layers_spill_to_more_sheets(tmp_path):
+    character_dir = tmp_path / "zundamon_en"
+    for index in range(3):
+        make_layer(character_dir / f"part{index}.png", (0, 0, 150, 150), (index * 80, 0, 0, 255))
+
+    manifest = build_character_atlas(character_dir, tmp_path / "atlas", max_size=200, padding=2)
+    assert len(manifest["sheets"]) == 3
+    assert sorted(manifest["frames"].values()) == [0, 1, 2]
+
+    # シートが減ったら、マニフェストを書き終えてから使われなくなったシートを消す
+    (character_dir / "part2.png").unlink()
+    manifest = build_character_atlas(character_dir, tmp_path / "atlas", max_size=200, padding=2)
+    assert len(manifest["sheets"]) == 2
+    assert sorted(path.name for path in (tmp_path / "atlas").iterdir()) == [
+        "atlas_0.json", "atlas_0.png", "atlas_1.json", "atlas_1.png", "manifest.json",
+    ]
+
+    # マニフェストに載っているシートが消えていれば作り直す
+    (tmp_path / "atlas" / "atlas_1.png").unlink()
+    assert build_character_atlas(character_dir, tmp_path / "atlas", max_size=200, padding=2) == manifest
+    assert (tmp_path / "atlas" / "atlas_1.png").exists()
+
+
+def test_config_paths_resolve_against_root(tmp_path, monkeypatch):
+    make_layer(tmp_path / "assets" / "zundamon_en" / "body.png", (10, 20, 190, 280), (0, 0, 255, 255))
+    monkeypatch.chdir(tmp_path.parent)  # 起動ディレクトリがプロジェクトルートでなくても同じ場所に出力する
+    config = {"directories": {"assets_dir": "./assets", "atlas_dir": "./assets_atlas"}}
+
+    manifests = build_from_config(config, tmp_path)
+    assert list(manifests) == ["zundamon_en"]
+    assert (tmp_path / "assets_atlas" / "zundamon_en" / "manifest.json").exists()
@@ -0,0 +1,43 @@
+"""
+起動時間プロファイル・遅延 import のテスト
+
+使い方:
+  python -m pytest test/test_startup_profile.py
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.startup_profile import ImportProfiler
+
+
+def test_nested_imports_are_recorded(tmp_path):
+    (tmp_path / "profile_child.py").write_text("import time\ntime.sleep(0.02)\n", encoding="utf-8")
+    (tmp_path / "profile_parent.py").write_text("import profile_child\n", encoding="utf-8")
+    sys.path.insert(0, str(tmp_path))
+    profiler = ImportProfiler().install()
+    try:
+        import profile_parent
+    finally:
+        profiler.uninstall()
+        sys.path.remove(str(tmp_path))
+    assert profile_parent.profile_child.__name__ == "profile_child"
+
+    parent_cumulative, parent_self = profiler.records["profile_parent"]
+    child_cumulative, child_self = profiler.records["profile_child"]
+    assert child_cumulative >= 0.02
+    assert parent_cumulative >= child_cumulative
+    assert parent_self < child_self
+    assert profiler.top_modules(1)[0][0] == "profile_parent"
+
+
+def test_server_import_does_not_load_heavy_optional_modules():
+    code = "import sys, server.main; print(sorted(m for m in ('numpy', 'psutil', 'selenium', 'openai') if m in sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=project_root, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "[]"
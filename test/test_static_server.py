@@ -0,0 +1,82 @@
+"""
+静的ファイルサーバー（aiohttp）のテスト
+
+使い方:
+  python -m pytest test/test_static_server.py
+"""
+import asyncio
+import gzip
+import sys
+from pathlib import Path
+
+import aiohttp
+
+# パッケージパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from server.static_server import start_static_server
+
+
+def make_site(root):
+    (root / "web").mkdir()
+    (root / "web" / "index.html").write_text("<html>" + "ずんだ" * 1000 + "</html>", encoding="utf-8")
+    (root / "web" / "app.js").write_text("console.log('zunda');\n" * 200, encoding="utf-8")
+    (root / "assets").mkdir()
+    (root / "assets" / "body.png").write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 4096)
+
+
+def test_compression_etag_and_cache_headers(tmp_path):
+    site_root = tmp_path / "site"
+    site_root.mkdir()
+    make_site(site_root)
+
+    async def scenario():
+        server = await start_static_server(site_root, "localhost", 0)
+        base = f"http://localhost:{server.port}"
+        try:
+            async with aiohttp.ClientSession(auto_decompress=False) as session:
+                # テキストは gzip で返し、2回目は圧縮結果を再利用
+                headers = {"Accept-Encoding": "gzip"}
+                async with session.get(f"{base}/web/app.js", headers=headers) as response:
+                    assert response.status == 200
+                    assert response.headers["Content-Encoding"] == "gzip"
+                    assert response.headers["Cache-Control"] == "no-cache"
+                    body = gzip.decompress(await response.read())
+                    assert body.startswith(b"console.log")
+                    etag = response.headers["ETag"]
+                async with session.get(f"{base}/web/app.js", headers=headers) as response:
+                    await response.read()
+                assert server.stats["compressed_builds"] == 1
+                assert server.stats["compressed_hits"] == 1
+
+                # ETag一致なら 304
+                async with session.get(f"{base}/web/app.js", headers={**headers, "If-None-Match": etag}) as response:
+                    assert response.status == 304
+
+                # ?v= 付きは immutable、PNG は圧縮せずそのまま
+                async with session.get(f"{base}/assets/body.png?v=abc123", headers=headers) as response:
+                    assert response.status == 200
+                    assert "immutable" in response.headers["Cache-Control"]
+                    assert "Content-Encoding" not in response.headers
+                    assert response.headers["Content-Type"] == "image/png"
+                    assert len(await response.read()) == 4104
+                    png_etag = response.headers["ETag"]
+                async with session.get(f"{base}/assets/body.png", headers={"If-None-Match": png_etag}) as response:
+                    assert response.status == 304
+
+                # ディレクトリは index.html、ルート外は 404
+                async with session.get(f"{base}/web/", headers=headers) as response:
+                    assert response.status == 200
+                    assert response.headers["Content-Type"].startswith("text/html")
+                async with session.get(f"{base}/web", allow_redirects=False) as response:
+                    assert response.status == 301
+                    assert response.headers["Location"] == "/web/"
+                async with session.get(f"{base}/web/%2e%2e/%2e%2e/etc/passwd") as response:
+                    assert response.status == 404
+                async with session.get(f"{base}/missing.js") as response:
+                    assert response.status == 404
+        finally:
+            await server.stop()
+
+    asyncio.run(scenario())
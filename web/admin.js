@@ -608,6 +608,13 @@ function handleServerMessage(data) {
       console.log("音量レベル:", data.level);
       updateMouthByVolume(data.level, data.character);
       break;
+
+    case "animation_frame":
+      // ティックごとにまとめられた全キャラクターの音量
+      for (const [character, level] of Object.entries(data.levels || {})) {
+        updateMouthByVolume(level, character);
+      }
+      break;
       
     case "speech_end":
       console.log("音声終了");
@@ -14,16 +14,32 @@ document.body.appendChild(app.view);
 let ws = null;
 let wsReconnectTimer = null;
 
+// 口パク用バイナリサブプロトコル（server/anim_protocol.py と合わせること）
+const ANIM_SUBPROTOCOL = "zundamon.anim.v1";
+const ANIM_PROTOCOL_VERSION = 1;
+const ANIM_MSG_VOLUME_FRAME = 1;
+const ANIM_HEADER_SIZE = 5;
+const ANIM_CHARACTERS = ["zundamon", "metan"];
+
 function connectWebSocket() {
-  ws = new WebSocket("ws://localhost:8767");
+  // 設定で無効化されていなければバイナリの音量フレームを要求
+  const useBinaryAnimation = config.broadcast?.binary_animation !== false;
+  ws = useBinaryAnimation
+    ? new WebSocket("ws://localhost:8767", [ANIM_SUBPROTOCOL])
+    : new WebSocket("ws://localhost:8767");
+  ws.binaryType = "arraybuffer";
   
   ws.onopen = () => {
-    console.log("✅ WebSocket接続完了");
+    console.log("✅ WebSocket接続完了", ws.protocol ? `(${ws.protocol})` : "");
     updateDebugStatus("ws-status", "接続済み", true);
     clearTimeout(wsReconnectTimer);
   };
   
   ws.onmessage = (event) => {
+    if (event.data instanceof ArrayBuffer) {
+      handleAnimationFrame(event.data);
+      return;
+    }
     try {
       const data = JSON.parse(event.data);
       handleServerMessage(data);
@@ -44,6 +60,70 @@ function connectWebSocket() {
   };
 }
 
+// バイナリ音量フレームのデコード
+function handleAnimationFrame(buffer) {
+  const view = new DataView(buffer);
+  if (view.byteLength < ANIM_HEADER_SIZE) return;
+
+  const version = view.getUint8(0);
+  const type = view.getUint8(1);
+  const count = view.getUint8(4);
+  if (version !== ANIM_PROTOCOL_VERSION || type !== ANIM_MSG_VOLUME_FRAME) {
+    console.warn("未対応のアニメーションフレーム:", version, type);
+    return;
+  }
+
+  const levels = {};
+  for (let i = 0; i < count; i++) {
+    const offset = ANIM_HEADER_SIZE + i * 2;
+    const character = ANIM_CHARACTERS[view.getUint8(offset)];
+    if (character) {
+      levels[character] = view.getUint8(offset + 1) / 255;
+    }
+  }
+  queueAnimationLevels(levels);
+}
+
+// 受信した口パクフレームは表示フレーム（PIXIのticker）ごとに最新の値だけ反映する
+// 表示前に次のフレームで上書きされたものは取りこぼしとしてサーバーに報告
+const FRAME_STATS_INTERVAL = 2000;
+let pendingAnimationLevels = null;
+let frameStats = { received: 0, dropped: 0 };
+
+function queueAnimationLevels(levels) {
+  frameStats.received++;
+  if (pendingAnimationLevels) {
+    frameStats.dropped++;
+    Object.assign(pendingAnimationLevels, levels);
+  } else {
+    pendingAnimationLevels = { ...levels };
+  }
+}
+
+function applyPendingAnimationLevels() {
+  if (!pendingAnimationLevels) return;
+  const levels = pendingAnimationLevels;
+  pendingAnimationLevels = null;
+  for (const [character, level] of Object.entries(levels)) {
+    handleVolumeLevel(character, level);
+  }
+}
+
+function reportFrameStats() {
+  if (ws && ws.readyState === WebSocket.OPEN && frameStats.received > 0) {
+    ws.send(JSON.stringify({
+      action: "frame_stats",
+      received: frameStats.received,
+      dropped: frameStats.dropped,
+      display_rate: Math.round(app.ticker.FPS)
+    }));
+  }
+  frameStats = { received: 0, dropped: 0 };
+}
+
+app.ticker.add(applyPendingAnimationLevels);
+setInterval(reportFrameStats, FRAME_STATS_INTERVAL);
+
 // グローバル変数
 let zundamonContainer;
 let metanContainer;
@@ -73,12 +153,10 @@ let metanState = {
 const characters = {
   zundamon: {
     name: "ずんだもん",
-    assetPath: "/assets/zundamon_en",
     position: { x: 750, y: 50 } // 右側
   },
   metan: {
     name: "四国めたん",
-    assetPath: "/assets/shikoku_metan_en",
     position: { x: 550, y: 80 } // 左側（右寄り・少し下）
   }
 };
@@ -157,15 +235,16 @@ function handleServerMessage(data) {
     case "volume_level":
       const volumeCharacter = data.character || activeCharacter;
       console.log(`[口パク] ${volumeCharacter}: ${data.level}`);
-      if (volumeCharacter === "zundamon") {
-        updateZundamonMouth(data.level);
-      } else if (volumeCharacter === "metan") {
-        updateMetanMouth(data.level);
-      }
+      handleVolumeLevel(volumeCharacter, data.level);
+      break;
+
+    case "animation_frame":
+      queueAnimationLevels(data.levels || {});
       break;
 
     case "speech_end":
       console.log("音声終了");
+      pendingAnimationLevels = null;
       resetMouth(activeCharacter);
       resetCharacterHighlight();
       updateDebugStatus("speech-status", "待機中", false);
@@ -210,6 +289,10 @@ function handleServerMessage(data) {
       updateCharacterState(outfitCharacter);
       break;
 
+    case "state_snapshot":
+      applyStateSnapshot(data.state || {}, data.version);
+      break;
+
     case "update_character":
       const updateCharacter = data.character || activeCharacter;
       updateCharacterState(updateCharacter);
@@ -220,11 +303,57 @@ function handleServerMessage(data) {
   }
 }
 
+// 接続時スナップショットの反映（変化したキャラクターだけ再構築）
+function applyStateSnapshot(state, version) {
+  console.log(`状態スナップショット受信 (version ${version}):`, state);
+  const localStates = { zundamon: zundamonState, metan: metanState };
+  const containers = { zundamon: zundamonContainer, metan: metanContainer };
+
+  for (const [character, remote] of Object.entries(state.characters || {})) {
+    const local = localStates[character];
+    if (!local) continue;
+
+    let changed = false;
+    for (const field of ["expression", "pose", "outfit"]) {
+      if (remote[field] !== undefined && local[field] !== remote[field]) {
+        local[field] = remote[field];
+        changed = true;
+      }
+    }
+    // アセット読み込み前ならキャラクター生成時に反映される
+    if (changed && containers[character]) {
+      updateCharacterState(character);
+    }
+  }
+
+  if (state.active_speaker) {
+    activeCharacter = state.active_speaker;
+  }
+  if (state.speaking && state.active_speaker) {
+    highlightActiveCharacter(state.active_speaker);
+    updateDebugStatus("speech-status", `${state.active_speaker}が話中`, true);
+  } else {
+    resetCharacterHighlight();
+  }
+}
+
+// 音量レベルによる口パク（JSON・バイナリ共通）
+function handleVolumeLevel(character, level) {
+  if (character === "zundamon") {
+    updateZundamonMouth(level);
+  } else if (character === "metan") {
+    updateMetanMouth(level);
+  }
+}
+
 // キャラクター状態更新（個別更新用）
 function updateCharacterState(character) {
   console.log(`キャラクター状態更新[${character}]`);
 
-  if (character === "zundamon") {
+  if (compositeRigs[character]) {
+    // 合成済み立ち絵はテクスチャの差し替えだけ（スプライトは作り直さない）
+    applyCharacterPresets(character);
+  } else if (character === "zundamon") {
     createZundamon();
   } else if (character === "metan") {
     createMetan();
@@ -317,116 +446,103 @@ function startBlinkAnimation(character) {
   }
 }
 
-// キャラクター別アセット読み込み
-async function loadCharacterAssets(character) {
-  console.log(`📦 ${characters[character].name}のアセット読み込み開始`);
-
-  const basePath = characters[character].assetPath;
+// アセットマニフェスト（サーバーが assets_dir を走査して生成、内容ハッシュ付き）
+let assetManifest = null;
 
-  // 既存のアセットをクリア
-  if (app.loader.resources) {
-    for (const key in app.loader.resources) {
-      delete app.loader.resources[key];
-    }
+async function loadAssetManifest() {
+  const response = await fetch('/api/assets');
+  if (!response.ok) {
+    throw new Error(`HTTP ${response.status}`);
   }
+  assetManifest = await response.json();
+  return assetManifest;
+}
 
-  // キャラクター別アセット設定
-  const assetConfig = getAssetConfig(character, basePath);
-
+// PIXI.Loader で読み込んで resources を返す（キャラクターごとに別ローダー）
+function loadResources(entries) {
+  const loader = new PIXI.Loader();
+  for (const [name, url] of entries) {
+    loader.add(name, url);
+  }
   return new Promise((resolve) => {
-    app.loader.reset();
+    loader.load((loader, resources) => resolve(resources));
+  });
+}
 
-    // アセットを動的に追加
-    for (const [key, path] of Object.entries(assetConfig)) {
-      app.loader.add(key, path);
-    }
+// キャラクター別アセット読み込み（テクスチャ名 → { texture } を返す）
+async function loadCharacterAssets(character) {
+  console.log(`📦 ${characters[character].name}のアセット読み込み開始`);
 
-    app.loader.load((loader, resources) => {
-      console.log(`✅ ${characters[character].name}のアセット読み込み完了`);
-      textures = resources;
-      resolve();
-    });
-  });
+  const entry = assetManifest?.characters?.[character];
+  if (!entry) {
+    console.warn(`アセットがありません: ${character}`);
+    return {};
+  }
+
+  // テクスチャアトラスがあればそちらを使う（なければパーツPNGを個別に読み込む）
+  const result = entry.atlas ? await loadCharacterAtlas(character, entry) : await loadCharacterParts(character, entry);
+  console.log(`✅ ${characters[character].name}のアセット読み込み完了${entry.atlas ? "（アトラス）" : ""}`);
+  return result;
 }
 
-// キャラクター別アセット設定
-function getAssetConfig(character, basePath) {
-  if (character === "metan") {
-    // 四国めたんのアセット設定
-    return {
-      "uniform": `${basePath}/outfit1/uniform.png`,
-      "basic_right": `${basePath}/outfit1/right_arm/normal.png`,
-      "basic_left": `${basePath}/outfit1/left_arm/normal.png`,
-      "twin_drill_left": `${basePath}/twin_drill_left.png`,
-      "twin_drill_right": `${basePath}/twin_drill_right.png`,
-      "front_hair_sideburns": `${basePath}/front_hair_sideburns.png`,
-      "normal_white_eye": `${basePath}/eye/eye_set/normal_white_eye.png`,
-      "normal_eye": `${basePath}/eye/eye_set/pupil/normal_eye.png`,
-      "peaceful_eye": `${basePath}/eye/peaceful_eye.png`,
-      "peaceful_eye2": `${basePath}/eye/peaceful_eye2.png`,
-      "normal_eyebrow": `${basePath}/eyebrow/thick_happy_eyebrow.png`,
-      // 口パーツ（全種類）
-      "smile": `${basePath}/mouth/smile.png`,
-      "grin": `${basePath}/mouth/grin.png`,
-      "mu": `${basePath}/mouth/mu.png`,
-      "o": `${basePath}/mouth/o.png`,
-      "waaa": `${basePath}/mouth/waaa.png`,
-      "hee": `${basePath}/mouth/hee.png`,
-      "momu": `${basePath}/mouth/momu.png`,
-      "nn": `${basePath}/mouth/nn.png`,
-      "tongue_out": `${basePath}/mouth/tongue_out.png`,
-      "triangle_down": `${basePath}/mouth/triangle_down.png`,
-      "triangle_up": `${basePath}/mouth/triangle_up.png`,
-      "ueh": `${basePath}/mouth/ueh.png`,
-      "yu": `${basePath}/mouth/yu.png`
-    };
-  } else {
-    // ずんだもんのアセット設定（既存）
-    return {
-      "body": `${basePath}/outfit2/body.png`,
-      "swimsuit": `${basePath}/outfit2/swimsuit.png`,
-      "usual_clothes": `${basePath}/outfit1/usual_clothes.png`,
-      "uniform": `${basePath}/outfit1/uniform.png`,
-      "basic_right": `${basePath}/outfit1/right_arm/basic.png`,
-      "basic_left": `${basePath}/outfit1/left_arm/basic.png`,
-      "point_right": `${basePath}/outfit1/right_arm/point.png`,
-      "waist_left": `${basePath}/outfit1/left_arm/waist.png`,
-      "raise_hand_right": `${basePath}/outfit1/right_arm/raise_hand.png`,
-      "think_left": `${basePath}/outfit1/left_arm/think.png`,
-      "mic_right": `${basePath}/outfit1/right_arm/mic.png`,
-      "edamame": `${basePath}/edamame/edamame_normal.png`,
-      "normal_white_eye": `${basePath}/eye/eye_set/normal_white_eye.png`,
-      "sharp_white_eye": `${basePath}/eye/eye_set/sharp_white_eye.png`,
-      "normal_eye": `${basePath}/eye/eye_set/pupil/normal_eye.png`,
-      "smile_eye": `${basePath}/eye/smile_eye.png`,
-      "sharp_eye": `${basePath}/eye/sharp_eye.png`,
-      "sleepy_eye": `${basePath}/eye/sleepy_eye.png`,
-      "normal_eyebrow": `${basePath}/eyebrow/normal_eyebrow.png`,
-      "angry_eyebrow": `${basePath}/eyebrow/angry_eyebrow.png`,
-      "troubled_eyebrow1": `${basePath}/eyebrow/troubled_eyebrow1.png`,
-      "troubled_eyebrow2": `${basePath}/eyebrow/troubled_eyebrow2.png`,
-      "muhu": `${basePath}/mouth/muhu.png`,
-      "hoa": `${basePath}/mouth/hoa.png`,
-      "hoaa": `${basePath}/mouth/hoaa.png`,
-      "o": `${basePath}/mouth/o.png`,
-      "triangle": `${basePath}/mouth/triangle.png`,
-      "nn": `${basePath}/mouth/nn.png`,
-      "nnaa": `${basePath}/mouth/nnaa.png`
-    };
+// パーツPNGを個別に読み込む（同じファイルを指すテクスチャ名は1回だけ読む）
+async function loadCharacterParts(character, entry) {
+  const urls = new Map();
+  for (const asset of Object.values(entry.assets)) {
+    urls.set(asset.file, `${entry.base}/${asset.file}?v=${asset.hash}`);
+  }
+  const resources = await loadResources(
+    [...urls].map(([file, url]) => [`${character}/${file}`, url])
+  );
+
+  const result = {};
+  for (const [key, asset] of Object.entries(entry.assets)) {
+    const resource = resources[`${character}/${asset.file}`];
+    if (resource?.texture) {
+      result[key] = { texture: resource.texture };
+    }
+  }
+  return result;
+}
+
+// アトラスからテクスチャを読み込む（全シートを並行して読み込む）
+async function loadCharacterAtlas(character, entry) {
+  const { atlas } = entry;
+  const resources = await loadResources(
+    atlas.sheets.map((sheet, index) => [`${character}_atlas_${index}`, `${atlas.base}/${sheet.file}?v=${sheet.hash}`])
+  );
+
+  const result = {};
+  for (const [key, asset] of Object.entries(entry.assets)) {
+    const sheet = resources[`${character}_atlas_${atlas.frames[asset.frame]}`];
+    const texture = sheet?.textures?.[asset.frame];
+    if (texture) {
+      result[key] = { texture };
+    } else {
+      console.warn(`アトラスにフレームなし: ${asset.frame || asset.file}`);
+    }
   }
+  return result;
 }
 
 // 両キャラクター初期化
 async function loadAssets() {
   console.log("📦 両キャラクターのアセット読み込み開始");
 
-  // ずんだもんのアセット読み込み
-  await loadCharacterAssets("zundamon");
-  zundamonTextures = { ...textures };
+  try {
+    await loadAssetManifest();
+  } catch (error) {
+    console.error("❌ アセットマニフェスト読み込みエラー:", error);
+    updateDebugStatus("character-status", "アセット読み込み失敗", false);
+    return;
+  }
 
-  // 四国めたんのアセット読み込み
-  await loadCharacterAssets("metan");
-  metanTextures = { ...textures };
+  // 両キャラクターを並行して読み込む
+  [zundamonTextures, metanTextures] = await Promise.all([
+    loadCharacterAssets("zundamon"),
+    loadCharacterAssets("metan")
+  ]);
+  textures = zundamonTextures;
 
   // 両キャラクター作成
   createBothCharacters();
@@ -466,6 +582,10 @@ function createBothCharacters() {
 
 // ずんだもん専用作成
 function createZundamon() {
+  if (assetManifest?.characters?.zundamon?.composite) {
+    createCompositeCharacter("zundamon");
+    return;
+  }
   console.log("🟢 ずんだもん専用描画開始");
 
   // コンテナクリア
@@ -491,6 +611,10 @@ function createZundamon() {
 
 // 四国めたん専用作成
 function createMetan() {
+  if (assetManifest?.characters?.metan?.composite) {
+    createCompositeCharacter("metan");
+    return;
+  }
   console.log("🔵 四国めたん専用描画開始");
 
   // コンテナクリア
@@ -514,6 +638,107 @@ function createMetan() {
   console.log("✅ 四国めたん描画完了");
 }
 
+// 合成済み立ち絵（python -m server.preset_compositor またはサーバー起動時に生成）
+// 体・衣装・腕は衣装×ポーズごとに1枚に合成済みで、目・眉・口だけを個別のスプライトで持つ
+const compositeRigs = {};  // キャラクター → { groups: [合成画像スプライト], comboKey }
+const compositeTextures = {};  // URL → Promise<Texture>
+
+function getCharacterRefs(character) {
+  if (character === "zundamon") {
+    return { container: zundamonContainer, sprites: zundamonSprites, textures: zundamonTextures, state: zundamonState };
+  }
+  return { container: metanContainer, sprites: metanSprites, textures: metanTextures, state: metanState };
+}
+
+function loadCompositeTexture(url) {
+  if (!compositeTextures[url]) {
+    compositeTextures[url] = PIXI.Texture.fromURL(url).catch((error) => {
+      delete compositeTextures[url];
+      throw error;
+    });
+  }
+  return compositeTextures[url];
+}
+
+// レイヤー構成に従ってスプライトを並べる（合成画像グループと目・眉・口）
+function createCompositeCharacter(character) {
+  console.log(`🎨 ${characters[character].name}（合成済み）描画開始`);
+  const { container, sprites } = getCharacterRefs(character);
+  const composite = assetManifest.characters[character].composite;
+
+  container.removeChildren();
+  for (const key in sprites) {
+    delete sprites[key];
+  }
+
+  const rig = { groups: [], comboKey: null };
+  for (const layer of composite.stack) {
+    const sprite = new PIXI.Sprite(PIXI.Texture.EMPTY);
+    container.addChild(sprite);
+    if ("group" in layer) {
+      rig.groups[layer.group] = sprite;
+    } else {
+      sprites[layer.live] = sprite;
+    }
+  }
+  compositeRigs[character] = rig;
+
+  applyCharacterPresets(character);
+}
+
+// 現在の表情・ポーズ・衣装をスプライトに反映
+async function applyCharacterPresets(character) {
+  const rig = compositeRigs[character];
+  const { sprites, textures, state } = getCharacterRefs(character);
+  const composite = assetManifest.characters[character].composite;
+
+  // 目・眉・口（表情プリセットの値、キャラクターにないテクスチャは既定値）
+  const expression = presets.expressions?.[state.expression] || {};
+  for (const layer of composite.stack) {
+    if (!("live" in layer)) continue;
+    const value = expression[layer.live];
+    const name = value === null ? null : (textures[value] ? value : layer.default);
+    const sprite = sprites[layer.live];
+    sprite.visible = Boolean(name && textures[name]);
+    if (sprite.visible) {
+      sprite.texture = textures[name].texture;
+    }
+  }
+
+  // 体・衣装・腕（衣装×ポーズの合成済み画像、未知のプリセットは既定の組み合わせ）
+  const characterConfig = config.characters?.[character] || {};
+  let comboKey = `${state.outfit}/${state.pose}`;
+  if (!composite.combos[comboKey]) {
+    comboKey = `${characterConfig.default_outfit || "usual"}/${characterConfig.default_pose || "basic"}`;
+  }
+  if (comboKey === rig.comboKey) return;
+  rig.comboKey = comboKey;
+
+  const imageIds = composite.combos[comboKey] || [];
+  let loaded;
+  try {
+    loaded = await Promise.all(imageIds.map((id) => {
+      const image = composite.images[id];
+      return image ? loadCompositeTexture(`${composite.base}/${image.file}?v=${image.hash}`) : null;
+    }));
+  } catch (error) {
+    console.error(`合成画像の読み込みエラー[${character}]:`, error);
+    rig.comboKey = null;
+    return;
+  }
+  // 読み込み中に次の変更が来ていたら反映しない
+  if (rig.comboKey !== comboKey) return;
+
+  rig.groups.forEach((sprite, index) => {
+    const image = composite.images[imageIds[index]];
+    sprite.visible = Boolean(image && loaded[index]);
+    if (sprite.visible) {
+      sprite.texture = loaded[index];
+      sprite.position.set(image.offset[0], image.offset[1]);
+    }
+  });
+}
+
 // ずんだもん専用スプライト追加
 function addZundamonSprite(name, textureName) {
   if (zundamonTextures[textureName]) {